@@ -29,7 +29,7 @@ public function triggerClustering(Request $request)
             $maxClusters = $validated['max_clusters'] ?? 6;
             
             // Call Python service for clustering
-            $response = Http::timeout(30)->post('http://localhost:8000/cluster', [
+            $response = Http::timeout(30)->post(env('PYTHON_SERVICE_URL', 'http://python_service:8000') . '/cluster', [
                 'min_clusters' => $minClusters,
                 'max_clusters' => $maxClusters,
             ]);
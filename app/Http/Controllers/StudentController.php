@@ -66,8 +66,8 @@ public function submitSolution(Request $request, Challenge $challenge)
             return back()->with('error', 'Maximum attempts reached for this challenge.');
         }
 
-        // Call Python evaluation service
-        $response = Http::timeout(30)->post('http://python_service:8000/evaluate', [
+        // Call Python evaluation service (gzip-compressed response, decoded by Guzzle)
+        $response = Http::timeout(30)->withOptions(['decode_content' => 'gzip'])->post(env('PYTHON_SERVICE_URL', 'http://python_service:8000') . '/evaluate', [
             'code' => $request->code,
             'test_cases' => $challenge->test_cases,
             'language' => 'python',
@@ -127,7 +127,7 @@ private function updateLearnerProfile($user, $attempt, $challenge)
         $profile->save();
 
         // Call Python profile update service
-        Http::post('http://python_service:8000/update_profile', [
+        Http::post(env('PYTHON_SERVICE_URL', 'http://python_service:8000') . '/update_profile', [
             'user_id' => $user->id,
             'attempt_data' => $attempt->toArray(),
             'challenge_data' => $challenge->toArray(),
@@ -136,7 +136,7 @@ private function updateLearnerProfile($user, $attempt, $challenge)
 
     private function generateAiFeedback($attempt)
     {
-        $response = Http::post('http://python_service:8000/recommend', [
+        $response = Http::post(env('PYTHON_SERVICE_URL', 'http://python_service:8000') . '/recommend', [
             'attempt_id' => $attempt->id,
             'code' => $attempt->submitted_code,
             'test_results' => $attempt->test_results,
@@ -131,7 +131,7 @@ public function clusters()
     {
         try {
             // Get clustering from Python service
-            $response = Http::timeout(10)->post('http://localhost:8000/cluster', [
+            $response = Http::timeout(10)->post(env('PYTHON_SERVICE_URL', 'http://python_service:8000') . '/cluster', [
                 'min_clusters' => 3,
                 'max_clusters' => 6,
             ]);   
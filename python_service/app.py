@@ -7,20 +7,37 @@ FastAPI application providing code evaluation, profiling, clustering, and recomm
 Author: Learner Environment Research
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Match
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 import logging
+import hmac
 import json
+import os
+import time
+import asyncio
+import multiprocessing
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # Import service modules
 from evaluator import CodeEvaluator
 from profile import ProfileManager
 from cluster import ClusteringService
-from expert_rules import ExpertRulesEngine
+from expert_rules import ExpertRulesEngine, init_batch_worker, extract_features_job
+from health import HealthMonitor
+from metrics import REGISTRY, REQUEST_LATENCY, REQUESTS_IN_FLIGHT, QUEUE_DEPTH
+from profiling import RequestProfiler
+from serialization import (
+    NegotiatedResponse, negotiate, response_media_type, parse_fields, select_fields,
+    describe as describe_serialization
+)
+from compression import CompressionMiddleware
+from feature_upload import FeatureMatrixBuilder, FeatureUploadError, create_parser, parse_columns
 
 
 # Configure logging
@@ -34,7 +51,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Learner Environment AI Services",
     description="Microservices for code evaluation, learner profiling, and adaptive feedback",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=NegotiatedResponse
 )
 
 # Configure CORS for Laravel integration
@@ -46,6 +64,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# brotli/gzip for large bodies (evaluation results, cluster listings)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+)
+
+
+def _endpoint_label(request: Request) -> str:
+    """Route path template for metric labels (bounded cardinality)."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "other")
+    return "unmatched"
+
+
+# Opt-in request profiling (X-Profile header or sampled fraction of requests)
+request_profiler = RequestProfiler(
+    capacity=int(os.getenv("PROFILE_BUFFER_SIZE", "20")),
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    interval=float(os.getenv("PROFILE_INTERVAL_MS", "1")) / 1000.0
+)
+# Traces sample the shared event-loop thread, so they show other requests'
+# stacks too: forcing a profile and reading traces need this token, and
+# both are disabled while it is unset
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")
+
+
+def _is_admin(token: Optional[str]) -> bool:
+    return bool(PROFILE_ADMIN_TOKEN) and token is not None and \
+        hmac.compare_digest(token.encode(), PROFILE_ADMIN_TOKEN.encode())
+
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Record a sampled stack trace for opted-in requests."""
+    requested = request.headers.get("x-profile", "").lower() in ("1", "true", "yes")
+    if requested and not _is_admin(request.headers.get("x-admin-token")):
+        requested = False
+    if not request_profiler.should_profile(requested):
+        return await call_next(request)
+
+    with request_profiler.capture(f"{request.method} {request.url.path}") as trace:
+        response = await call_next(request)
+    response.headers["X-Profile-Id"] = str(trace["trace_id"])
+    return response
+
+
+@app.middleware("http")
+async def negotiate_response_format(request: Request, call_next):
+    """Pick JSON or MessagePack for the response from the Accept header."""
+    token = response_media_type.set(negotiate(request.headers.get("accept")))
+    try:
+        return await call_next(request)
+    finally:
+        response_media_type.reset(token)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Track per-endpoint latency and in-flight requests."""
+    endpoint = _endpoint_label(request)
+    status = 500
+    REQUESTS_IN_FLIGHT.inc(endpoint=endpoint)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started,
+            endpoint=endpoint, method=request.method, status=str(status)
+        )
+
 # Initialize service instances with error handling
 try:
     code_evaluator = CodeEvaluator()
@@ -61,6 +155,34 @@ except Exception as e:
     clustering_service = None
     expert_rules = None
 
+# Deep health checks run in the background; probes read the cached result
+health_monitor = HealthMonitor(
+    services=[
+        # Own instances: probes must not count as evaluations, feed the test
+        # history, or touch the feedback cache and similarity index
+        ("evaluator", CodeEvaluator() if code_evaluator is not None else None),
+        ("profile_manager", profile_manager),
+        ("clustering", clustering_service),
+        ("expert_rules", ExpertRulesEngine() if expert_rules is not None else None)
+    ],
+    interval=float(os.getenv("HEALTH_CHECK_INTERVAL", "60"))
+)
+
+
+@app.on_event("startup")
+async def start_health_monitor():
+    await health_monitor.start()
+
+
+@app.on_event("shutdown")
+async def stop_health_monitor():
+    await health_monitor.stop()
+
+
+@app.on_event("shutdown")
+def flush_metrics():
+    REGISTRY.close()
+
 
 # Pydantic models for request/response validation
 class EvaluationRequest(BaseModel):
@@ -68,6 +190,21 @@ class EvaluationRequest(BaseModel):
     test_cases: List[Dict[str, Any]] = Field(..., description="Test cases to run")
     language: str = Field(default="python", description="Programming language")
     timeout: int = Field(default=5, description="Execution timeout in seconds")
+    max_complexity: Optional[str] = Field(
+        default=None,
+        description="Expected Big-O class, e.g. 'O(n log n)'; tests marked large are skipped for slower code"
+    )
+    count_instructions: bool = Field(default=False, description="Report executed bytecode instructions per test")
+    max_instructions: Optional[int] = Field(default=None, ge=1, description="Per-test instruction budget")
+    mode: str = Field(
+        default="full",
+        pattern="^(full|fail_fast|smoke_first)$",
+        description="full, fail_fast (stop at the first failure) or smoke_first (cheap tests first, stop at the first failure)"
+    )
+    reuse_setup: bool = Field(
+        default=False,
+        description="Run module-level code once and start each test from a copy of its globals"
+    )
     
     class Config:
         json_schema_extra = {
@@ -88,9 +225,12 @@ class EvaluationResponse(BaseModel):
     test_results: List[Dict[str, Any]]
     score: int
     execution_time: Optional[float] = None
+    instructions: Optional[int] = None
     memory_used: Optional[int] = None
     error: Optional[str] = None
     code_quality: Optional[Dict[str, Any]] = None
+    tests_run: Optional[int] = None
+    setup_reuse: Optional[Dict[str, Any]] = None
 
 
 class ProfileUpdateRequest(BaseModel):
@@ -129,6 +269,8 @@ class ClusterRequest(BaseModel):
     max_clusters: int = Field(default=6, ge=2, le=10)
     feature_data: Optional[List[Dict[str, float]]] = None
     force_regenerate: bool = Field(default=False, description="Force regeneration of sample data")
+    dtype: Optional[str] = Field(default=None, pattern="^float(32|64)$",
+                                 description="Working precision (default: CLUSTERING_DTYPE, float64)")
     
     class Config:
         json_schema_extra = {
@@ -150,6 +292,8 @@ class ClusterResponse(BaseModel):
     optimal_k: int
     silhouette_score: float
     message: str
+    upload: Optional[Dict[str, Any]] = None
+    memory: Optional[Dict[str, Any]] = None
 
 
 class RecommendationRequest(BaseModel):
@@ -181,6 +325,40 @@ class RecommendationResponse(BaseModel):
     confidence: float
 
 
+class BatchRecommendationRequest(BaseModel):
+    # Items are validated individually so one bad attempt does not fail the batch
+    attempts: List[Dict[str, Any]] = Field(..., description="Attempts shaped like RecommendationRequest")
+    include_cluster_insight: bool = Field(default=True, description="Add cluster-based insight per attempt")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "attempts": [
+                    {
+                        "attempt_id": 123,
+                        "code": "def factorial(n):\n    return n * factorial(n-1)",
+                        "test_results": [{"test_id": 1, "passed": False, "error_type": "RecursionError"}],
+                        "error_message": "maximum recursion depth exceeded"
+                    }
+                ],
+                "include_cluster_insight": True
+            }
+        }
+
+
+class SimilarSubmissionsRequest(BaseModel):
+    code: str = Field(..., description="Submission to look up")
+    limit: int = Field(default=5, ge=1, le=50)
+    min_similarity: float = Field(default=0.5, ge=0.0, le=1.0, description="Minimum estimated Jaccard similarity")
+
+
+class SimilarSubmissionsResponse(BaseModel):
+    success: bool
+    neighbours: List[Dict[str, Any]]
+    index_size: int
+    lookup_ms: float
+
+
 # API Endpoints
 
 @app.get("/")
@@ -194,19 +372,25 @@ async def root():
             "/evaluate",
             "/update_profile", 
             "/cluster",
-            "/recommend"
+            "/recommend",
+            "/recommend/batch",
+            "/similar"
         ],
         "timestamp": datetime.now().isoformat()
     }
 
 
 @app.post("/evaluate", response_model=EvaluationResponse)
-async def evaluate_code(request: EvaluationRequest):
+async def evaluate_code(request: EvaluationRequest, fields: Optional[str] = None, summary: bool = False):
     """
     Evaluate student code against test cases.
     
     This endpoint securely executes student code and returns test results,
     performance metrics, and code quality indicators.
+    
+    ``?summary=true`` returns only the outcome (score, counts, failing test
+    ids); ``?fields=score,passed`` keeps the named response and per-test
+    fields. Both skip serializing per-test inputs, outputs and tracebacks.
     """
     if code_evaluator is None:
         raise HTTPException(status_code=503, detail="Code evaluator service not available")
@@ -219,7 +403,12 @@ async def evaluate_code(request: EvaluationRequest):
             code=request.code,
             test_cases=request.test_cases,
             language=request.language,
-            timeout=request.timeout
+            timeout=request.timeout,
+            max_complexity=request.max_complexity,
+            count_instructions=request.count_instructions,
+            max_instructions=request.max_instructions,
+            mode=request.mode,
+            reuse_setup=request.reuse_setup
         )
         
         # Calculate score
@@ -227,14 +416,32 @@ async def evaluate_code(request: EvaluationRequest):
         total_tests = len(request.test_cases)
         score = int((passed_tests / total_tests) * 100) if total_tests > 0 else 0
         
+        if summary:
+            return NegotiatedResponse({
+                "success": result['success'],
+                "score": score,
+                "passed_tests": passed_tests,
+                "total_tests": total_tests,
+                "failed_tests": [request.test_cases[i].get('id', i)
+                                 for i, tr in enumerate(result['test_results']) if not tr.get('passed', False)],
+                "execution_time": result.get('execution_time'),
+                "error": result.get('error')
+            })
+        selected = parse_fields(fields)
+        if selected is not None:
+            return NegotiatedResponse(select_fields({**result, "score": score}, selected))
+        
         return EvaluationResponse(
             success=result['success'],
             test_results=result['test_results'],
             score=score,
             execution_time=result.get('execution_time'),
+            instructions=result.get('instructions'),
             memory_used=result.get('memory_used'),
             error=result.get('error'),
-            code_quality=result.get('code_quality')
+            code_quality=result.get('code_quality'),
+            tests_run=result.get('tests_run'),
+            setup_reuse=result.get('setup_reuse')
         )
         
     except Exception as e:
@@ -265,6 +472,7 @@ async def update_learner_profile(request: ProfileUpdateRequest, background_tasks
         
         # Schedule background analysis if needed
         if result.get('requires_clustering', False):
+            QUEUE_DEPTH.inc(queue="clustering_update")
             background_tasks.add_task(
                 trigger_clustering_update,
                 user_id=request.user_id
@@ -382,7 +590,9 @@ async def perform_clustering(request: ClusterRequest):
         result = clustering_service.cluster_students(
             min_k=request.min_clusters,
             max_k=request.max_clusters,
-            feature_data=feature_matrix
+            feature_data=feature_matrix,
+            dtype=request.dtype,
+            copy=False
         )
         
         return ClusterResponse(
@@ -390,7 +600,8 @@ async def perform_clustering(request: ClusterRequest):
             clusters=result['clusters'],
             optimal_k=result['optimal_k'],
             silhouette_score=result['silhouette_score'],
-            message=result['message']
+            message=result['message'],
+            memory=result.get('memory')
         )
         
     except HTTPException:
@@ -400,6 +611,104 @@ async def perform_clustering(request: ClusterRequest):
         raise HTTPException(status_code=500, detail=f"Clustering analysis failed: {str(e)}")
 
 
+# Rows accepted by /cluster/upload (6 float32 columns: 24 bytes per row)
+CLUSTER_UPLOAD_MAX_ROWS = int(os.getenv("CLUSTER_UPLOAD_MAX_ROWS", "2000000"))
+
+
+@app.post("/cluster/upload", response_model=ClusterResponse, openapi_extra={
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/x-ndjson": {"schema": {"type": "string"}},
+            "text/csv": {"schema": {"type": "string"}},
+            "application/octet-stream": {"schema": {"type": "string", "format": "binary"}}
+        }
+    }
+})
+async def perform_clustering_upload(request: Request,
+                                    min_clusters: int = 3,
+                                    max_clusters: int = 6,
+                                    columns: Optional[str] = None,
+                                    dtype: str = "float32"):
+    """
+    Cluster learners from a streamed feature upload.
+    
+    The body is NDJSON, CSV or raw little-endian float32 rows (by
+    ``Content-Type``) and is parsed chunk by chunk into a float32 matrix,
+    so large cohorts never exist as JSON objects. ``columns`` names the
+    source columns in order (required for binary bodies, replaces the CSV
+    header); see ``feature_upload`` for the formats. The parsed matrix is
+    clustered in place, in float32 unless ``dtype=float64`` is requested.
+    """
+    if clustering_service is None:
+        raise HTTPException(status_code=503, detail="Clustering service not available")
+    if not (2 <= min_clusters <= 10 and 2 <= max_clusters <= 10):
+        raise HTTPException(status_code=400, detail="min_clusters and max_clusters must be between 2 and 10")
+    if min_clusters > max_clusters:
+        raise HTTPException(
+            status_code=400,
+            detail="min_clusters must be less than or equal to max_clusters"
+        )
+    if dtype not in ("float32", "float64"):
+        raise HTTPException(status_code=400, detail="dtype must be float32 or float64")
+    
+    started = time.perf_counter()
+    content_length = request.headers.get("content-length")
+    builder = FeatureMatrixBuilder(max_rows=CLUSTER_UPLOAD_MAX_ROWS)
+    try:
+        parser = create_parser(request.headers.get("content-type"), builder, parse_columns(columns),
+                               int(content_length) if content_length and content_length.isdigit() else None)
+        async for chunk in request.stream():
+            parser.feed(chunk)
+        feature_matrix = parser.close()
+    except FeatureUploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    upload = {
+        "format": type(parser).__name__.replace("UploadParser", "").lower(),
+        "rows": int(feature_matrix.shape[0]),
+        "bytes": parser.bytes_read,
+        "ignored_columns": parser.ignored_columns,
+        "matrix_bytes": builder.nbytes,
+        "parse_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+    logger.info(f"Clustering upload: {upload['rows']} rows ({upload['format']}, {upload['bytes']} bytes), "
+                f"k={min_clusters}-{max_clusters}")
+    
+    if feature_matrix.shape[0] < max_clusters:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Not enough samples ({feature_matrix.shape[0]}) for {max_clusters} clusters"
+        )
+    
+    try:
+        result = clustering_service.cluster_students(
+            min_k=min_clusters,
+            max_k=max_clusters,
+            feature_data=feature_matrix,
+            dtype=dtype,
+            copy=False
+        )
+        if not result.get('success', False):
+            raise HTTPException(status_code=500, detail=f"Clustering analysis failed: {result.get('message')}")
+        
+        return ClusterResponse(
+            success=True,
+            clusters=result['clusters'],
+            optimal_k=result['optimal_k'],
+            silhouette_score=result['silhouette_score'],
+            message=result['message'],
+            upload=upload,
+            memory=result.get('memory')
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Clustering upload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Clustering analysis failed: {str(e)}")
+
+
 @app.post("/recommend", response_model=RecommendationResponse)
 async def generate_recommendations(request: RecommendationRequest):
     """
@@ -418,7 +727,8 @@ async def generate_recommendations(request: RecommendationRequest):
         code_features = expert_rules.extract_code_features(
             code=request.code,
             test_results=request.test_results,
-            error_message=request.error_message
+            error_message=request.error_message,
+            submission_id=request.attempt_id
         )
         
         # Apply expert rules
@@ -446,6 +756,184 @@ async def generate_recommendations(request: RecommendationRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Feature extraction pool for /recommend/batch, created on first large batch
+BATCH_PARALLEL_MIN = int(os.getenv("BATCH_PARALLEL_MIN", "8"))
+BATCH_MAX_WORKERS = int(os.getenv(
+    "BATCH_MAX_WORKERS",
+    str(max(1, (os.cpu_count() or 1) // int(os.getenv("MAX_WORKERS", "1"))))
+))
+_batch_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_batch_pool() -> ProcessPoolExecutor:
+    global _batch_pool
+    if _batch_pool is None:
+        # spawn: forking a threaded server process can copy held locks
+        _batch_pool = ProcessPoolExecutor(
+            max_workers=BATCH_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_batch_worker,
+            initargs=(str(expert_rules.rules_path),)
+        )
+    return _batch_pool
+
+
+@app.on_event("shutdown")
+async def stop_batch_pool():
+    if _batch_pool is not None:
+        _batch_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submission_key(attempt: Dict[str, Any]) -> str:
+    """Identity of an attempt for deduplication: code, error and test outcomes."""
+    outcomes = [(t.get('passed', False), t.get('error_type')) for t in attempt.get('test_results') or []]
+    return json.dumps([attempt['code'], attempt.get('error_message'), outcomes])
+
+
+@app.post("/recommend/batch")
+async def generate_batch_recommendations(request: BatchRecommendationRequest):
+    """
+    Generate recommendations for many attempts, streamed as NDJSON.
+    
+    Identical submissions are analyzed once; feature extraction runs in a
+    process pool for large batches, and each group of completed
+    submissions gets a single vectorized cluster lookup. One JSON line is
+    emitted per attempt as soon as it is ready, followed by a summary line.
+    """
+    if expert_rules is None:
+        raise HTTPException(status_code=503, detail="Expert rules service not available")
+    
+    started = time.perf_counter()
+    invalid = []
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for index, attempt in enumerate(request.attempts):
+        if not isinstance(attempt.get('code'), str) or 'attempt_id' not in attempt:
+            invalid.append({"attempt_id": attempt.get('attempt_id'), "index": index, "success": False,
+                            "error": "attempt needs 'attempt_id' and string 'code'"})
+            continue
+        groups.setdefault(_submission_key(attempt), []).append(attempt)
+    
+    logger.info(f"Batch recommendations: {len(request.attempts)} attempts, {len(groups)} unique")
+    
+    def render(features: Dict[str, Any], attempts: List[Dict[str, Any]], cluster_insight) -> List[str]:
+        lines = []
+        for attempt in attempts:
+            feedback = expert_rules.generate_feedback(features, attempt.get('user_profile'))
+            result = {
+                "attempt_id": attempt['attempt_id'],
+                "success": True,
+                "feedback": feedback['primary_feedback'],
+                "hints": feedback['hints'],
+                "resources": feedback['resources'],
+                "next_steps": feedback['next_steps'],
+                "confidence": feedback['confidence']
+            }
+            if cluster_insight is not None:
+                result["cluster_insight"] = cluster_insight
+            lines.append(json.dumps(result) + "\n")
+        return lines
+    
+    async def stream():
+        for item in invalid:
+            yield json.dumps(item) + "\n"
+        
+        with_clusters = (request.include_cluster_insight and clustering_service is not None
+                         and clustering_service.model_loaded)
+        keys = list(groups)
+        
+        loop = asyncio.get_running_loop()
+        if len(keys) < BATCH_PARALLEL_MIN:
+            # Too few for the process pool, but still off the event loop
+            def extract_all() -> List[Any]:
+                return [(key, expert_rules.extract_code_features(
+                    groups[key][0]['code'], groups[key][0].get('test_results') or [],
+                    groups[key][0].get('error_message'), submission_id=groups[key][0]['attempt_id']))
+                    for key in keys]
+            pending = {}
+            batches = [await loop.run_in_executor(None, extract_all)]
+        else:
+            pool = _get_batch_pool()
+            pending = {
+                asyncio.wrap_future(pool.submit(
+                    extract_features_job, groups[key][0]['code'],
+                    groups[key][0].get('test_results') or [], groups[key][0].get('error_message')
+                ), loop=loop): key
+                for key in keys
+            }
+            batches = None
+        
+        failed = 0
+        QUEUE_DEPTH.inc(len(pending), queue="batch_recommend")
+        try:
+            while batches or pending:
+                if batches:
+                    completed = batches.pop()
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    completed = []
+                    for future in done:
+                        key = pending.pop(future)
+                        QUEUE_DEPTH.dec(queue="batch_recommend")
+                        try:
+                            features = future.result()
+                            first = groups[key][0]
+                            expert_rules.index_submission(first['attempt_id'], first['code'],
+                                                          first.get('test_results') or [],
+                                                          first.get('error_message'), features)
+                            completed.append((key, features))
+                        except Exception as e:
+                            failed += len(groups[key])
+                            for attempt in groups[key]:
+                                yield json.dumps({"attempt_id": attempt['attempt_id'], "success": False,
+                                                  "error": str(e)}) + "\n"
+                
+                # One scale/predict pass for everything that just completed
+                insights = (clustering_service.get_cluster_recommendations([f for _, f in completed])
+                            if with_clusters and completed else [None] * len(completed))
+                for (key, features), insight in zip(completed, insights):
+                    for line in render(features, groups[key], insight):
+                        yield line
+        finally:
+            QUEUE_DEPTH.dec(len(pending), queue="batch_recommend")
+            for future in pending:
+                future.cancel()
+        
+        yield json.dumps({"summary": {
+            "attempts": len(request.attempts),
+            "unique_submissions": len(groups),
+            "invalid": len(invalid),
+            "failed": failed,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3)
+        }}) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/similar", response_model=SimilarSubmissionsResponse)
+async def find_similar_submissions(request: SimilarSubmissionsRequest):
+    """
+    Find previously analyzed submissions similar to the given code.
+    
+    Lets teachers spot near-duplicate solutions; similarity is estimated
+    from MinHash signatures of normalized token shingles.
+    
+    The index lives in the worker process, so only submissions analysed by
+    the worker answering this request are searched (roughly 1/N of them
+    with N uvicorn workers).
+    """
+    if expert_rules is None:
+        raise HTTPException(status_code=503, detail="Expert rules service not available")
+    
+    started = time.perf_counter()
+    neighbours = expert_rules.find_similar(request.code, request.limit, request.min_similarity)
+    return SimilarSubmissionsResponse(
+        success=True,
+        neighbours=neighbours,
+        index_size=len(expert_rules.similarity_index.entries),
+        lookup_ms=round((time.perf_counter() - started) * 1000, 3)
+    )
+
+
 # Utility endpoints for debugging and monitoring
 
 @app.get("/stats")
@@ -458,7 +946,8 @@ async def get_statistics():
             "profile_manager": profile_manager is not None,
             "clustering": clustering_service is not None,
             "expert_rules": expert_rules is not None
-        }
+        },
+        "serialization": describe_serialization()
     }
     
     try:
@@ -488,38 +977,69 @@ async def get_statistics():
     return stats
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition, aggregated across all worker processes."""
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _require_admin(token: Optional[str]) -> None:
+    if not PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Profile admin endpoints are disabled (PROFILE_ADMIN_TOKEN unset)")
+    if not _is_admin(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/admin/profiles")
+async def list_profiles(x_admin_token: Optional[str] = Header(default=None)):
+    """List buffered request profiles held by this worker, newest first."""
+    _require_admin(x_admin_token)
+    return {
+        "stats": request_profiler.get_stats(),
+        "traces": request_profiler.list_traces()
+    }
+
+
+@app.get("/admin/profiles/{trace_id}", response_class=PlainTextResponse)
+async def get_profile(trace_id: int, x_admin_token: Optional[str] = Header(default=None)):
+    """Collapsed-stack text for one trace, ready for flamegraph rendering."""
+    _require_admin(x_admin_token)
+    collapsed = request_profiler.get_collapsed(trace_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail=f"Profile {trace_id} not found on this worker")
+    return PlainTextResponse(collapsed)
+
+
+@app.get("/livez")
+async def liveness_check():
+    """Constant-time liveness probe; does not touch any service."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readiness_check():
+    """Readiness probe served from the cached background health checks."""
+    snapshot = health_monitor.snapshot()
+    ready = snapshot["overall"] == "healthy"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "status": snapshot["overall"],
+            "services": snapshot["services"],
+            "last_checked": snapshot["last_checked"],
+            "age_seconds": snapshot["age_seconds"]
+        }
+    )
+
+
 @app.get("/health")
 async def health_check():
-    """Detailed health check for all services."""
-    health_status = {
-        "overall": "healthy",
-        "services": {},
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    # Check each service individually
-    services = [
-        ("evaluator", code_evaluator),
-        ("profile_manager", profile_manager),
-        ("clustering", clustering_service),
-        ("expert_rules", expert_rules)
-    ]
-    
-    for service_name, service in services:
-        try:
-            if service is not None:
-                health_status["services"][service_name] = service.health_check()
-            else:
-                health_status["services"][service_name] = False
-        except Exception as e:
-            logger.error(f"Health check failed for {service_name}: {e}")
-            health_status["services"][service_name] = False
-    
-    # Check if any service is unhealthy
-    if any(not status for status in health_status["services"].values()):
-        health_status["overall"] = "degraded"
-    
-    return health_status
+    """Detailed health check for all services (cached, see /readyz)."""
+    return health_monitor.snapshot()
 
 
 # Background tasks
@@ -534,11 +1054,14 @@ async def trigger_clustering_update(user_id: int):
             result = clustering_service.cluster_students(
                 min_k=3,
                 max_k=6,
-                feature_data=feature_data
+                feature_data=feature_data,
+                copy=False
             )
             logger.info(f"Background clustering completed: {result['optimal_k']} clusters")
     except Exception as e:
         logger.error(f"Background clustering failed: {str(e)}")
+    finally:
+        QUEUE_DEPTH.dec(queue="clustering_update")
 
 
 if __name__ == "__main__":
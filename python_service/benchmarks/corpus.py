@@ -0,0 +1,132 @@
+"""
+Submission Corpus
+=================
+Representative correct and buggy student submissions shared by the
+benchmark suite and the load generator.
+"""
+
+from typing import Dict, List, Any
+
+TWO_SUM_TESTS = [
+    {"input": {"nums": [2, 7, 11, 15], "target": 9}, "output": [0, 1]},
+    {"input": {"nums": [3, 3], "target": 6}, "output": [0, 1]},
+    {"input": {"nums": [3, 2, 4], "target": 6}, "output": [1, 2]},
+]
+
+FACTORIAL_TESTS = [
+    {"input": {"n": 5}, "output": 120},
+    {"input": {"n": 0}, "output": 1},
+    {"input": {"n": 10}, "output": 3628800},
+]
+
+SUBMISSIONS: List[Dict[str, Any]] = [
+    {
+        "name": "two_sum_hash",
+        "correct": True,
+        "code": (
+            "def two_sum(nums, target):\n"
+            "    seen = {}\n"
+            "    for i, n in enumerate(nums):\n"
+            "        if target - n in seen:\n"
+            "            return [seen[target - n], i]\n"
+            "        seen[n] = i\n"
+            "    return []\n"
+        ),
+        "test_cases": TWO_SUM_TESTS,
+    },
+    {
+        "name": "two_sum_quadratic",
+        "correct": True,
+        "code": (
+            "def two_sum(nums, target):\n"
+            "    for i in range(len(nums)):\n"
+            "        for j in range(i + 1, len(nums)):\n"
+            "            if nums[i] + nums[j] == target:\n"
+            "                return [i, j]\n"
+            "    return []\n"
+        ),
+        "test_cases": TWO_SUM_TESTS,
+    },
+    {
+        "name": "two_sum_constant",
+        "correct": False,
+        "code": "def two_sum(nums, target):\n    return [0, 1]\n",
+        "test_cases": TWO_SUM_TESTS,
+    },
+    {
+        "name": "two_sum_off_by_one",
+        "correct": False,
+        "code": (
+            "def two_sum(nums, target):\n"
+            "    for i in range(len(nums) + 1):\n"
+            "        for j in range(i + 1, len(nums) + 1):\n"
+            "            if nums[i] + nums[j] == target:\n"
+            "                return [i, j]\n"
+            "    return []\n"
+        ),
+        "test_cases": TWO_SUM_TESTS,
+    },
+    {
+        "name": "factorial_recursive",
+        "correct": True,
+        "code": (
+            "def factorial(n):\n"
+            "    if n <= 1:\n"
+            "        return 1\n"
+            "    return n * factorial(n - 1)\n"
+        ),
+        "test_cases": FACTORIAL_TESTS,
+    },
+    {
+        "name": "factorial_missing_base_case",
+        "correct": False,
+        "code": "def factorial(n):\n    return n * factorial(n - 1)\n",
+        "test_cases": FACTORIAL_TESTS,
+    },
+    {
+        "name": "factorial_syntax_error",
+        "correct": False,
+        "code": "def factorial(n)\n    return 1 if n == 0 else n * factorial(n - 1)\n",
+        "test_cases": FACTORIAL_TESTS,
+    },
+]
+
+
+def generate_large_submission(lines: int) -> str:
+    """
+    Build a syntactically valid submission of roughly ``lines`` lines.
+
+    Mixes loops, conditionals, recursion and builtin calls so every
+    feature extractor has work to do.
+    """
+    blocks = []
+    block = (
+        "def helper_{i}(values, depth):\n"
+        "    total = 0\n"
+        "    for v in sorted(values):\n"
+        "        if v % 2 == 0 and depth > 0:\n"
+        "            total += helper_{i}(values[1:], depth - 1)\n"
+        "        elif v > max(values) // 2:\n"
+        "            total -= min(values)\n"
+        "        else:\n"
+        "            total += len(values)\n"
+        "    while total > 100:\n"
+        "        total //= 2\n"
+        "    return total\n"
+        "\n"
+    )
+    block_lines = block.count("\n")
+    for i in range(max(1, lines // block_lines)):
+        blocks.append(block.format(i=i))
+    blocks.append("def solution(values):\n    return helper_0(values, 3)\n")
+    return "".join(blocks)
+
+
+def generate_test_cases(count: int) -> List[Dict[str, Any]]:
+    """Two-sum style test cases for ``count``-test evaluation runs."""
+    cases = []
+    for i in range(count):
+        nums = list(range(i + 2))
+        cases.append({"input": {"nums": nums, "target": nums[-1] + nums[-2]},
+                      "output": [len(nums) - 2, len(nums) - 1]})
+    return cases
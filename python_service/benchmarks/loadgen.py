@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Load Generator
+==============
+Replays a realistic mix of submission traffic against a running service.
+
+Usage (from python_service/):
+    python benchmarks/loadgen.py --url http://localhost:8000 --rps 50 --duration 60
+    python benchmarks/loadgen.py --rps 200 --concurrency 64 \\
+        --mix evaluate=60,update_profile=25,recommend=14,cluster=1 --output load.json
+
+Requests are issued open-loop at the target rate; when ``--concurrency``
+requests are already in flight the generator waits, and the delay is
+reported as schedule lag so saturation is visible in the results.
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Any, Tuple
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import SUBMISSIONS  # noqa: E402
+
+DEFAULT_MIX = {"evaluate": 55, "update_profile": 25, "recommend": 18, "cluster": 2}
+
+ERROR_MESSAGES = {
+    "factorial_missing_base_case": "maximum recursion depth exceeded",
+    "two_sum_off_by_one": "list index out of range",
+    "factorial_syntax_error": "invalid syntax",
+}
+
+
+class TrafficModel:
+    """Builds request payloads for each endpoint from the submission corpus."""
+
+    def __init__(self, seed: int, users: int, cohort_size: int):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.cohort_size = cohort_size
+
+    def build(self, endpoint: str) -> Tuple[str, Dict[str, Any]]:
+        submission = self.rng.choice(SUBMISSIONS)
+        if endpoint == "evaluate":
+            return "/evaluate", {
+                "code": submission["code"],
+                "test_cases": submission["test_cases"],
+                "timeout": 5
+            }
+        if endpoint == "update_profile":
+            success = submission["correct"]
+            return "/update_profile", {
+                "user_id": self.rng.randint(1, self.users),
+                "attempt_data": {
+                    "is_successful": success,
+                    "score": 100 if success else self.rng.choice([0, 33, 66]),
+                    "time_spent": self.rng.randint(30, 1200),
+                    "hints_used": self.rng.randint(0, 3)
+                },
+                "challenge_data": {
+                    "competency_id": self.rng.randint(1, 8),
+                    "difficulty": self.rng.choice(["easy", "medium", "hard"]),
+                    "points": 100
+                }
+            }
+        if endpoint == "recommend":
+            passed = submission["correct"]
+            return "/recommend", {
+                "attempt_id": self.rng.randint(1, 10 ** 6),
+                "code": submission["code"],
+                "test_results": [
+                    {"test_id": i, "passed": passed or (i == 0 and self.rng.random() < 0.5)}
+                    for i in range(len(submission["test_cases"]))
+                ],
+                "error_message": ERROR_MESSAGES.get(submission["name"]),
+                "user_profile": {
+                    "cognitive": {"problem_solving_score": self.rng.uniform(20, 90)},
+                    "motivational": {"engagement_level": self.rng.uniform(20, 90)},
+                    "behavioral": {"learning_pace": self.rng.choice(["slow", "moderate", "fast"])}
+                }
+            }
+        if endpoint == "cluster":
+            keys = ["cognitive_score", "behavioral_score", "motivational_score",
+                    "success_rate", "avg_time", "attempts_count"]
+            return "/cluster", {
+                "min_clusters": 3,
+                "max_clusters": 6,
+                "feature_data": [
+                    {k: self.rng.random() for k in keys} for _ in range(self.cohort_size)
+                ]
+            }
+        raise ValueError(f"Unknown endpoint {endpoint}")
+
+
+class LoadStats:
+    """Per-endpoint latency and error accounting."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.lag: List[float] = []
+
+    def record(self, endpoint: str, latency: float, error: str = None) -> None:
+        self.latencies.setdefault(endpoint, []).append(latency)
+        if error:
+            bucket = self.errors.setdefault(endpoint, {})
+            bucket[error] = bucket.get(error, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        total = 0
+        for endpoint, values in sorted(self.latencies.items()):
+            values.sort()
+            errors = sum(self.errors.get(endpoint, {}).values())
+            total += len(values)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "throughput_rps": len(values) / elapsed,
+                "error_rate": errors / len(values),
+                "errors": self.errors.get(endpoint, {}),
+                "latency_ms": {
+                    "p50": _percentile(values, 50) * 1000,
+                    "p90": _percentile(values, 90) * 1000,
+                    "p95": _percentile(values, 95) * 1000,
+                    "p99": _percentile(values, 99) * 1000,
+                    "max": values[-1] * 1000
+                }
+            }
+        self.lag.sort()
+        return {
+            "elapsed_seconds": elapsed,
+            "total_requests": total,
+            "achieved_rps": total / elapsed if elapsed else 0.0,
+            "schedule_lag_ms": {
+                "p50": _percentile(self.lag, 50) * 1000,
+                "p99": _percentile(self.lag, 99) * 1000
+            },
+            "endpoints": endpoints
+        }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint in mix: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    model = TrafficModel(args.seed, args.users, args.cohort_size)
+    endpoints = list(args.mix.keys())
+    weights = list(args.mix.values())
+    stats = LoadStats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    total = int(args.rps * args.duration)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+
+        async def fire(endpoint: str, path: str, payload: Dict[str, Any]) -> None:
+            started = time.perf_counter()
+            error = None
+            try:
+                response = await client.post(path, json=payload)
+                if response.status_code >= 400:
+                    error = f"http_{response.status_code}"
+            except httpx.TimeoutException:
+                error = "timeout"
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            finally:
+                semaphore.release()
+            stats.record(endpoint, time.perf_counter() - started, error)
+
+        tasks = []
+        started = time.perf_counter()
+        for i in range(total):
+            scheduled = started + i / args.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await semaphore.acquire()
+            stats.lag.append(max(0.0, time.perf_counter() - scheduled))
+
+            endpoint = model.rng.choices(endpoints, weights)[0]
+            path, payload = model.build(endpoint)
+            tasks.append(asyncio.create_task(fire(endpoint, path, payload)))
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return stats.summary(elapsed)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{report['total_requests']} requests in {report['elapsed_seconds']:.1f}s "
+          f"-> {report['achieved_rps']:.1f} req/s "
+          f"(schedule lag p99 {report['schedule_lag_ms']['p99']:.1f} ms)\n")
+    print(f"{'endpoint':<16}{'reqs':>7}{'rps':>9}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for endpoint, data in report["endpoints"].items():
+        lat = data["latency_ms"]
+        print(f"{endpoint:<16}{data['requests']:>7}{data['throughput_rps']:>9.1f}"
+              f"{data['error_rate'] * 100:>6.1f}%{lat['p50']:>9.1f}{lat['p95']:>9.1f}"
+              f"{lat['p99']:>9.1f}{lat['max']:>9.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--rps", type=float, default=20.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=32, help="max in-flight requests")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="endpoint weights, e.g. evaluate=60,recommend=30,update_profile=10")
+    parser.add_argument("--users", type=int, default=500, help="distinct learner ids")
+    parser.add_argument("--cohort-size", type=int, default=200, help="learners per /cluster upload")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report to this path")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args))
+    report.update({
+        "timestamp": datetime.now().isoformat(),
+        "config": {"url": args.url, "rps": args.rps, "duration": args.duration,
+                   "concurrency": args.concurrency, "mix": args.mix, "seed": args.seed}
+    })
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
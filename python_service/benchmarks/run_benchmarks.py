@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Service Benchmark Suite
+=======================
+Reproducible micro and end-to-end benchmarks for the service hot paths.
+
+Usage (from python_service/):
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+    python benchmarks/run_benchmarks.py --filter evaluator --quick
+
+Results are written as JSON so runs can be diffed; ``--compare`` exits
+non-zero when any benchmark's median regressed beyond ``--threshold``.
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import SUBMISSIONS, generate_large_submission, generate_test_cases  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+
+class BenchmarkRunner:
+    """Times callables and collects summary statistics."""
+
+    def __init__(self, repeat: int = 5, min_time: float = 0.05, name_filter: Optional[str] = None):
+        self.repeat = repeat
+        self.min_time = min_time
+        self.name_filter = name_filter
+        self.results: List[Dict[str, Any]] = []
+
+    def bench(self, name: str, func: Callable[[], Any],
+              params: Optional[Dict[str, Any]] = None,
+              setup: Optional[Callable[[], None]] = None,
+              repeat: Optional[int] = None) -> None:
+        """
+        Time ``func`` and record per-call statistics.
+
+        Each round calls ``setup`` (untimed) and then ``func`` enough
+        times to fill ``min_time``; the per-call mean of a round is one
+        sample.
+        """
+        if self.name_filter and self.name_filter not in name:
+            return
+
+        repeat = repeat or self.repeat
+        if setup:
+            setup()
+        func()  # warm-up, also calibrates the loop count
+
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        single = max(time.perf_counter() - started, 1e-9)
+        number = max(1, int(self.min_time / single))
+
+        samples = []
+        for _ in range(repeat):
+            if setup:
+                setup()
+            gc.collect()
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter() - started) / number)
+
+        result = {
+            "name": name,
+            "params": params or {},
+            "rounds": repeat,
+            "calls_per_round": number,
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "mean": statistics.mean(samples),
+            "max": max(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "ops_per_sec": 1.0 / statistics.median(samples)
+        }
+        self.results.append(result)
+        print(f"{name:<60} median {result['median'] * 1000:10.3f} ms  "
+              f"({result['ops_per_sec']:,.1f} ops/s)")
+
+    def record(self, name: str, params: Dict[str, Any], values: Dict[str, Any]) -> None:
+        """Record a benchmark measured by the caller (e.g. throughput)."""
+        if self.name_filter and self.name_filter not in name:
+            return
+        self.results.append({"name": name, "params": params, **values})
+        print(f"{name:<60} {values}")
+
+
+def _proc_status(*fields: str) -> Optional[Dict[str, int]]:
+    """Byte values of ``/proc/self/status`` fields, or None off Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            values = {}
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    values[name] = int(value.split()[0]) * 1024  # reported in kB
+            return values if len(values) == len(fields) else None
+    except OSError:
+        return None
+
+
+class PeakRSS:
+    """
+    Peak resident set size of a block (Linux only, else None).
+
+    Resets the kernel's process-wide high-water mark on entry, so it is
+    only meaningful here, where nothing else runs in the process.
+    """
+
+    def __init__(self):
+        self.peak_rss_bytes: Optional[int] = None
+        self.rss_growth_bytes: Optional[int] = None
+        self._rss_on_entry: Optional[int] = None
+
+    def __enter__(self) -> "PeakRSS":
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")  # reset VmHWM to the current VmRSS
+            status = _proc_status("VmRSS")
+            self._rss_on_entry = status["VmRSS"] if status else None
+        except OSError:
+            self._rss_on_entry = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        status = _proc_status("VmHWM") if self._rss_on_entry is not None else None
+        if status:
+            self.peak_rss_bytes = status["VmHWM"]
+            self.rss_growth_bytes = max(status["VmHWM"] - self._rss_on_entry, 0)
+
+
+# ----------------------------------------------------------------------
+# Benchmarks
+# ----------------------------------------------------------------------
+
+def bench_evaluator(runner: BenchmarkRunner, quick: bool) -> None:
+    from evaluator import CodeEvaluator
+
+    evaluator = CodeEvaluator()
+    two_sum = SUBMISSIONS[0]["code"]
+
+    for count in ([1, 10] if quick else [1, 10, 50, 200]):
+        tests = generate_test_cases(count)
+        runner.bench(f"evaluator.evaluate[tests={count}]",
+                     lambda: evaluator.evaluate(two_sum, tests),
+                     params={"tests": count, "code_lines": two_sum.count("\n")})
+
+    for lines in ([100] if quick else [100, 1000, 5000]):
+        code = generate_large_submission(lines)
+        tests = [{"input": {"values": [1, 2, 3, 4]}, "output": None}]
+        runner.bench(f"evaluator.evaluate[lines={lines}]",
+                     lambda: evaluator.evaluate(code, tests),
+                     params={"tests": 1, "code_lines": lines})
+
+
+def bench_expert_rules(runner: BenchmarkRunner, quick: bool, workdir: Path) -> None:
+    from expert_rules import ExpertRulesEngine
+
+    engine = ExpertRulesEngine(rules_path=str(workdir / "rules"))
+    failing = [{"passed": False}, {"passed": True}, {"passed": False}]
+
+    for submission in SUBMISSIONS:
+        code = submission["code"]
+        runner.bench(f"expert_rules.extract_code_features[{submission['name']}]",
+                     lambda: engine.extract_code_features(code, failing, "maximum recursion depth exceeded"),
+                     params={"code_lines": code.count("\n")})
+
+    features = engine.extract_code_features(SUBMISSIONS[5]["code"], failing, "maximum recursion depth exceeded")
+    profile = {"cognitive": {"problem_solving_score": 35},
+               "motivational": {"engagement_level": 80},
+               "behavioral": {"learning_pace": "slow"}}
+    runner.bench("expert_rules.generate_feedback[no_profile]",
+                 lambda: engine.generate_feedback(features))
+    runner.bench("expert_rules.generate_feedback[profile]",
+                 lambda: engine.generate_feedback(features, profile))
+
+    # Feature extraction should scale linearly with submission size
+    per_line = {}
+    for lines in ([1000, 2000] if quick else [1000, 2500, 5000, 10000]):
+        code = generate_large_submission(lines)
+        runner.bench(f"expert_rules.extract_code_features[lines={lines}]",
+                     lambda: engine.extract_code_features(code, failing, None),
+                     params={"code_lines": lines}, repeat=3)
+        if runner.results and runner.results[-1]["name"].endswith(f"[lines={lines}]"):
+            per_line[lines] = runner.results[-1]["median"] / lines * 1e6
+    if per_line:
+        # ~1.0 means linear; quadratic extraction grows with the size ratio
+        runner.record("expert_rules.extract_code_features[scaling]", {}, {
+            "us_per_line": per_line,
+            "largest_to_smallest": per_line[max(per_line)] / per_line[min(per_line)]
+        })
+
+
+def bench_pattern_matcher(runner: BenchmarkRunner, quick: bool) -> None:
+    import random
+    import string
+    from pattern_matcher import MultiPatternMatcher
+
+    rng = random.Random(42)
+    code = generate_large_submission(1000 if quick else 5000).lower()
+    for count in ([10, 100] if quick else [10, 100, 500]):
+        patterns = {
+            f"pattern_{i}": ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+                             for _ in range(4)]
+            for i in range(count)
+        }
+        matcher = MultiPatternMatcher(patterns)
+        runner.bench(f"pattern_matcher.scan[patterns={count}]",
+                     lambda: matcher.scan({"code": code}),
+                     params={"patterns": count, "indicators": count * 4})
+
+
+def bench_profile_manager(runner: BenchmarkRunner, quick: bool, workdir: Path) -> None:
+    from profile import ProfileManager
+
+    attempt = {"is_successful": True, "score": 80, "time_spent": 300, "hints_used": 1,
+               "code_quality": {"has_recursion": True, "complexity_estimate": 6}}
+    challenge = {"competency_id": 3, "difficulty": "medium", "points": 100}
+
+    storage = workdir / "profiles"
+    state = {"manager": None, "user": 0}
+
+    def cold_setup():
+        shutil.rmtree(storage, ignore_errors=True)
+        state["manager"] = ProfileManager(storage_path=str(storage))
+
+    def cold():
+        # New manager per round and a new user per call: file create + write
+        state["user"] += 1
+        state["manager"].update_profile(state["user"], attempt, challenge)
+
+    runner.bench("profile.update_profile[cold]", cold, setup=cold_setup)
+
+    warm_manager = ProfileManager(storage_path=str(storage))
+    warm_manager.update_profile(1, attempt, challenge)
+    runner.bench("profile.update_profile[warm]",
+                 lambda: warm_manager.update_profile(1, attempt, challenge))
+
+
+def bench_clustering(runner: BenchmarkRunner, quick: bool, workdir: Path) -> None:
+    import numpy as np
+    from cluster import ClusteringService
+
+    service = ClusteringService(model_path=str(workdir / "models"))
+    rng = np.random.default_rng(42)
+
+    sizes = [100, 1000] if quick else [100, 1000, 5000]
+    ranges = [(2, 4)] if quick else [(2, 4), (3, 6), (3, 10)]
+    for n in sizes:
+        data = rng.random((n, service.n_features))
+        for min_k, max_k in ranges:
+            runner.bench(f"cluster.cluster_students[n={n},k={min_k}-{max_k}]",
+                         lambda: service.cluster_students(min_k, max_k, data),
+                         params={"n": n, "min_k": min_k, "max_k": max_k}, repeat=3)
+        runner.bench(f"cluster.cluster_students[n={n},k=2-4,float32]",
+                     lambda: service.cluster_students(2, 4, data, dtype="float32"),
+                     params={"n": n, "min_k": 2, "max_k": 4, "dtype": "float32"}, repeat=3)
+        for dtype in ("float64", "float32"):
+            with PeakRSS() as peak:
+                memory = service.cluster_students(2, 4, data, dtype=dtype)["memory"]
+            runner.record(f"cluster.memory[n={n},{dtype}]", {"n": n, "dtype": dtype},
+                          {**memory, "peak_rss_bytes": peak.peak_rss_bytes,
+                           "rss_growth_bytes": peak.rss_growth_bytes})
+
+
+def api_payloads() -> Dict[str, Dict[str, Any]]:
+    """One representative request body per JSON endpoint."""
+    submission = SUBMISSIONS[5]
+    return {
+        "/evaluate": {"code": SUBMISSIONS[0]["code"], "test_cases": SUBMISSIONS[0]["test_cases"]},
+        "/update_profile": {"user_id": 1, "attempt_data": {"is_successful": False, "score": 40},
+                            "challenge_data": {"competency_id": 1}},
+        "/recommend": {"attempt_id": 1, "code": submission["code"],
+                       "test_results": [{"test_id": 1, "passed": False, "error": "RecursionError"}],
+                       "error_message": "maximum recursion depth exceeded"},
+        "/cluster": {"min_clusters": 2, "max_clusters": 4},
+    }
+
+
+def bench_api(runner: BenchmarkRunner, quick: bool, workdir: Path) -> None:
+    """End-to-end throughput through the ASGI stack with an in-process client."""
+    os.chdir(workdir)
+    from fastapi.testclient import TestClient
+    import app as service_app
+
+    payloads = api_payloads()
+    requests_per_endpoint = 50 if quick else 300
+
+    with TestClient(service_app.app) as client:
+        for endpoint, payload in payloads.items():
+            name = f"api.throughput[{endpoint}]"
+            if runner.name_filter and runner.name_filter not in name:
+                continue
+            count = requests_per_endpoint if endpoint != "/cluster" else max(5, requests_per_endpoint // 20)
+            client.post(endpoint, json=payload)
+            latencies = []
+            errors = 0
+            started = time.perf_counter()
+            for _ in range(count):
+                t0 = time.perf_counter()
+                response = client.post(endpoint, json=payload)
+                latencies.append(time.perf_counter() - t0)
+                errors += response.status_code >= 400
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            runner.record(name, {"requests": count}, {
+                "requests_per_sec": count / elapsed,
+                "median": latencies[len(latencies) // 2],
+                "p95": latencies[int(len(latencies) * 0.95) - 1],
+                "errors": errors
+            })
+
+
+def bench_serialization(runner: BenchmarkRunner, quick: bool, workdir: Path) -> None:
+    """Payload size and encode time of each endpoint's response per format."""
+    os.chdir(workdir)
+    from fastapi.testclient import TestClient
+    import app as service_app
+    import serialization
+
+    payloads = api_payloads()
+    # A large evaluation response: many tests, each echoing input and output
+    payloads["/evaluate[tests=200]"] = {"code": SUBMISSIONS[0]["code"], "test_cases": generate_test_cases(200)}
+
+    encoders = {
+        "json": lambda content: json.dumps(content, ensure_ascii=False, allow_nan=False,
+                                           separators=(",", ":")).encode("utf-8"),
+        "negotiated_json": lambda content: serialization.encode(content)[0],
+    }
+    if serialization.msgpack is not None:
+        encoders["msgpack"] = lambda content: serialization.encode(content, serialization.MSGPACK_MEDIA_TYPE)[0]
+
+    with TestClient(service_app.app) as client:
+        for label, payload in payloads.items():
+            endpoint = label.split("[")[0]
+            content = client.post(endpoint, json=payload).json()
+            for encoder_name, encoder in encoders.items():
+                runner.bench(f"serialization.{encoder_name}[{label}]", lambda: encoder(content),
+                             params={"endpoint": label, "bytes": len(encoder(content))})
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> int:
+    """Print median deltas against a baseline; return count of regressions."""
+    with open(baseline_path, 'r') as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+
+    regressions = 0
+    print(f"\nComparison against {baseline_path} (threshold {threshold:.0%}):")
+    for result in results:
+        old = baseline.get(result["name"])
+        if old is None or "median" not in result or "median" not in old:
+            continue
+        delta = (result["median"] - old["median"]) / old["median"]
+        flag = "REGRESSION" if delta > threshold else ("improved" if delta < -threshold else "")
+        regressions += delta > threshold
+        print(f"{result['name']:<60} {delta:+8.1%} {flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative median slowdown counted as a regression")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="smaller parameter sweep")
+    args = parser.parse_args()
+
+    runner = BenchmarkRunner(repeat=args.repeat, name_filter=args.filter)
+    workdir = Path(tempfile.mkdtemp(prefix="learner_bench_"))
+    os.environ.setdefault("METRICS_MULTIPROC_DIR", str(workdir / "metrics"))
+    try:
+        bench_evaluator(runner, args.quick)
+        bench_expert_rules(runner, args.quick, workdir)
+        bench_pattern_matcher(runner, args.quick)
+        bench_profile_manager(runner, args.quick, workdir)
+        bench_clustering(runner, args.quick, workdir)
+        bench_api(runner, args.quick, workdir)
+        bench_serialization(runner, args.quick, workdir)
+    finally:
+        os.chdir(SERVICE_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": runner.results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        return 1 if compare(runner.results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
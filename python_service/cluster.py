@@ -11,15 +11,28 @@ silhouette scores. Can integrate with existing dataset patterns.
 import numpy as np
 import json
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import os
+from typing import List, Dict, Any, Optional, Tuple, Union
 from pathlib import Path
+from sklearn import config_context
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import silhouette_score
 import pickle
 
+from metrics import observe_stage
+from feature_encoder import CLUSTER_FEATURE_ENCODER
+
 logger = logging.getLogger(__name__)
 
+# Silhouette analysis is quadratic in the sample count; larger inputs are
+# scored on a fixed random subsample
+SILHOUETTE_SAMPLE_SIZE = 10000
+
+# Upper bound (MiB) for the distance blocks silhouette scoring allocates;
+# scikit-learn's default of 1 GiB would dominate the clustering footprint
+SILHOUETTE_WORKING_MEMORY_MB = 64
+
 
 class ClusteringService:
     """
@@ -28,7 +41,7 @@ class ClusteringService:
     Supports both real-time clustering and pre-trained model loading.
     """
     
-    def __init__(self, model_path: str = "./models"):
+    def __init__(self, model_path: str = "./models", dtype=None):
         self.model_path = Path(model_path)
         self.model_path.mkdir(exist_ok=True)
         
@@ -39,6 +52,8 @@ class ClusteringService:
         self.model_loaded = False
         self.clustering_count = 0
         self.n_features = 6  # Fixed feature dimensionality
+        # Working precision; float32 halves every buffer of a large clustering run
+        self.dtype = np.dtype(dtype or os.getenv("CLUSTERING_DTYPE", "float64"))
         
         # Try to load existing model
         self._load_model()
@@ -46,25 +61,34 @@ class ClusteringService:
     def cluster_students(self,
                         min_k: int = 3,
                         max_k: int = 6,
-                        feature_data: Optional[np.ndarray] = None) -> Dict[str, Any]:
+                        feature_data: Optional[np.ndarray] = None,
+                        dtype=None,
+                        copy: bool = True) -> Dict[str, Any]:
         """
         Perform clustering on student data.
         
+        Features are brought into one buffer of the working dtype, scaled
+        in place once, and that single scaled matrix serves the k sweep,
+        the final model and the cluster statistics.
+        
         Args:
             min_k: Minimum number of clusters to test
             max_k: Maximum number of clusters to test
             feature_data: Optional numpy array of shape (n_samples, n_features)
+            dtype: Working precision (float32 or float64; default ``self.dtype``)
+            copy: False lets a matrix that already has the working dtype and
+                layout be used, and overwritten, as the buffer itself
             
         Returns:
-            Clustering results including labels and metrics
+            Clustering results including labels, metrics and a ``memory`` report
         """
         self.clustering_count += 1
         
         # Validate input parameters
-        if min_k >= max_k:
+        if min_k > max_k:
             return {
                 'success': False,
-                'message': 'min_clusters must be less than max_clusters',
+                'message': 'min_clusters must be less than or equal to max_clusters',
                 'clusters': [],
                 'optimal_k': min_k,
                 'silhouette_score': 0.0
@@ -72,11 +96,12 @@ class ClusteringService:
         
         # Prepare feature matrix
         if feature_data is not None:
-            X = self._validate_and_prepare_features(feature_data)
+            X = self._validate_and_prepare_features(feature_data, dtype=dtype, copy=copy)
         else:
             # Generate synthetic data for testing
-            X = self._generate_synthetic_features()
-        
+            X = self._validate_and_prepare_features(self._generate_synthetic_features(),
+                                                    dtype=dtype, copy=False)
+    
         if X is None or X.shape[0] < min_k:
             return {
                 'success': False,
@@ -85,7 +110,7 @@ class ClusteringService:
                 'optimal_k': min_k,
                 'silhouette_score': 0.0
             }
-        
+    
         # Validate cluster count against sample size
         max_feasible_k = min(max_k, X.shape[0] - 1)
         if min_k > max_feasible_k:
@@ -96,36 +121,33 @@ class ClusteringService:
                 'optimal_k': min_k,
                 'silhouette_score': 0.0
             }
-        
+    
         try:
+            # Scale once, in place: X holds the scaled features from here on
+            X_scaled = self._scale_in_place(X)
+        
             # Find optimal k using silhouette score
-            optimal_k, best_score = self._find_optimal_k(X, min_k, max_feasible_k)
-            
-            # Perform final clustering with optimal k
-            X_scaled = self.scaler.fit_transform(X)
-            self.kmeans_model = KMeans(n_clusters=optimal_k, random_state=42, n_init=10)
-            labels = self.kmeans_model.fit_predict(X_scaled)
-            
+            optimal_k, best_score, best_model = self._find_optimal_k(X_scaled, min_k, max_feasible_k)
+        
+            # The sweep already fitted the optimal k (same data and seed)
+            if best_model is None:
+                best_model = KMeans(n_clusters=optimal_k, random_state=42, n_init=10, copy_x=False)
+                best_model.fit(X_scaled)
+            self.kmeans_model = best_model
+            labels = best_model.labels_
+        
             # Validate clustering results
             unique_labels = np.unique(labels)
             if len(unique_labels) != optimal_k:
                 logger.warning(f"Expected {optimal_k} clusters, got {len(unique_labels)}")
-            
+        
             # Save model
             self._save_model()
             self.model_loaded = True
-            
+        
             # Generate cluster analysis
-            clusters = self._analyze_clusters(X, labels, X_scaled)
-            
-            return {
-                'success': True,
-                'clusters': clusters,
-                'optimal_k': optimal_k,
-                'silhouette_score': best_score,
-                'message': f'Successfully clustered {X.shape[0]} samples into {optimal_k} groups'
-            }
-            
+            clusters = self._analyze_clusters(X_scaled, labels)
+        
         except Exception as e:
             logger.error(f"Clustering failed: {str(e)}")
             return {
@@ -136,12 +158,37 @@ class ClusteringService:
                 'silhouette_score': 0.0
             }
     
-    def _validate_and_prepare_features(self, feature_data: np.ndarray) -> Optional[np.ndarray]:
+        memory = {
+            'dtype': X.dtype.name,
+            'input_bytes': int(feature_data.nbytes) if feature_data is not None else 0,
+            'input_copied': feature_data is None or not np.shares_memory(X, feature_data),
+            'feature_buffer_bytes': int(X.nbytes)
+        }
+        logger.info(f"Clustered {X.shape[0]} samples ({memory['dtype']}), "
+                    f"feature buffer {memory['feature_buffer_bytes']} bytes")
+        
+        return {
+            'success': True,
+            'clusters': clusters,
+            'optimal_k': optimal_k,
+            'silhouette_score': best_score,
+            'message': f'Successfully clustered {X.shape[0]} samples into {optimal_k} groups',
+            'memory': memory
+        }
+    
+    def _validate_and_prepare_features(self, feature_data: np.ndarray,
+                                       dtype=None, copy: bool = True) -> Optional[np.ndarray]:
         """
         Validate and prepare feature data ensuring correct dimensionality.
         
+        Casting, truncation and zero padding happen in a single copy into a
+        preallocated buffer, skipped entirely when ``copy`` is False and the
+        input already fits; NaN and infinite values are zeroed in place.
+        
         Args:
             feature_data: Input feature matrix
+            dtype: Output precision (default ``self.dtype``)
+            copy: Whether the input must be left untouched
             
         Returns:
             Validated and potentially reshaped feature matrix
@@ -158,32 +205,43 @@ class ClusteringService:
             return None
         
         n_samples, n_features = feature_data.shape
+        dtype = np.dtype(dtype) if dtype is not None else self.dtype
         
         # Validate sample count
         if n_samples < 2:
             logger.error(f"Need at least 2 samples for clustering, got {n_samples}")
             return None
         
-        # Handle feature dimension mismatch
         if n_features != self.n_features:
             logger.warning(f"Expected {self.n_features} features, got {n_features}")
-            
+        
+        if (not copy and feature_data.dtype == dtype and n_features == self.n_features
+                and feature_data.flags.c_contiguous and feature_data.flags.writeable):
+            X = feature_data
+        else:
+            # Truncate excess features / pad missing ones with zeros while casting
+            X = np.empty((n_samples, self.n_features), dtype=dtype)
+            width = min(n_features, self.n_features)
+            X[:, :width] = feature_data[:, :width]
+            X[:, width:] = 0
             if n_features > self.n_features:
-                # Truncate excess features
-                feature_data = feature_data[:, :self.n_features]
                 logger.info(f"Truncated to {self.n_features} features")
-            else:
-                # Pad with zeros for missing features
-                padding = np.zeros((n_samples, self.n_features - n_features))
-                feature_data = np.hstack([feature_data, padding])
+            elif n_features < self.n_features:
                 logger.info(f"Padded to {self.n_features} features with zeros")
         
         # Validate for NaN or infinite values
-        if not np.isfinite(feature_data).all():
+        if not np.isfinite(X).all():
             logger.warning("Feature data contains NaN or infinite values, replacing with zeros")
-            feature_data = np.nan_to_num(feature_data, nan=0.0, posinf=0.0, neginf=0.0)
+            np.nan_to_num(X, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
         
-        return feature_data
+        return X
+    
+    def _scale_in_place(self, X: np.ndarray) -> np.ndarray:
+        """Fit the scaler on ``X`` and standardize ``X`` in place (no scaled copy)."""
+        self.scaler.fit(X)
+        X -= self.scaler.mean_.astype(X.dtype)
+        X /= self.scaler.scale_.astype(X.dtype)
+        return X
     
     def _generate_synthetic_features(self, n_samples: int = 50) -> np.ndarray:
         """
@@ -195,7 +253,8 @@ class ClusteringService:
         Returns:
             Synthetic feature matrix of shape (n_samples, self.n_features)
         """
-        np.random.seed(42)  # Ensure reproducibility
+        # Own generator: reproducible without reseeding the global one
+        rng = np.random.RandomState(42)
         
         # Define cluster prototypes with correct dimensionality
         cluster_prototypes = [
@@ -213,7 +272,7 @@ class ClusteringService:
                 prototype = prototype[:self.n_features] + [0.5] * max(0, self.n_features - len(prototype))
             
             # Generate samples around prototype
-            cluster_samples = np.random.multivariate_normal(
+            cluster_samples = rng.multivariate_normal(
                 mean=prototype,
                 cov=np.eye(self.n_features) * 0.01,  # Small covariance
                 size=samples_per_cluster
@@ -226,7 +285,7 @@ class ClusteringService:
         # Handle remaining samples
         remaining = n_samples - (samples_per_cluster * len(cluster_prototypes))
         if remaining > 0:
-            extra_samples = np.random.multivariate_normal(
+            extra_samples = rng.multivariate_normal(
                 mean=cluster_prototypes[-1],
                 cov=np.eye(self.n_features) * 0.01,
                 size=remaining
@@ -238,34 +297,34 @@ class ClusteringService:
         logger.info(f"Generated synthetic data: {result.shape}")
         return result
     
-    def _find_optimal_k(self, X: np.ndarray, min_k: int, max_k: int) -> Tuple[int, float]:
+    @observe_stage("find_optimal_k")
+    def _find_optimal_k(self, X_scaled: np.ndarray, min_k: int, max_k: int) -> Tuple[int, float, Optional[KMeans]]:
         """
         Find optimal number of clusters using silhouette analysis.
         
         Args:
-            X: Feature matrix of shape (n_samples, n_features)
+            X_scaled: Scaled feature matrix of shape (n_samples, n_features)
             min_k: Minimum number of clusters to test
             max_k: Maximum number of clusters to test
             
         Returns:
-            Tuple of (optimal_k, best_silhouette_score)
+            Tuple of (optimal_k, best_silhouette_score, fitted model for optimal_k)
         """
         # Ensure we have enough samples
-        max_feasible_k = min(max_k, X.shape[0] - 1)
+        max_feasible_k = min(max_k, X_scaled.shape[0] - 1)
         if min_k > max_feasible_k:
             logger.warning(f"Adjusted max_k from {max_k} to {max_feasible_k}")
             max_k = max_feasible_k
         
-        # Scale features for clustering
-        X_scaled = self.scaler.fit_transform(X)
-        
         best_k = min_k
         best_score = -1
+        best_model = None
         scores = []
         
         for k in range(min_k, max_k + 1):
             try:
-                kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
+                # copy_x=False: KMeans centers the caller's buffer instead of a copy
+                kmeans = KMeans(n_clusters=k, random_state=42, n_init=10, copy_x=False)
                 labels = kmeans.fit_predict(X_scaled)
                 
                 # Ensure we have the expected number of clusters
@@ -275,12 +334,18 @@ class ClusteringService:
                     continue
                 
                 # Calculate silhouette score
-                score = silhouette_score(X_scaled, labels)
+                with config_context(working_memory=SILHOUETTE_WORKING_MEMORY_MB):
+                    score = silhouette_score(
+                        X_scaled, labels,
+                        sample_size=SILHOUETTE_SAMPLE_SIZE if len(X_scaled) > SILHOUETTE_SAMPLE_SIZE else None,
+                        random_state=42
+                    )
                 scores.append((k, score))
                 
                 if score > best_score:
                     best_score = score
                     best_k = k
+                    best_model = kmeans
                 
                 logger.debug(f"k={k}, silhouette_score={score:.3f}")
                 
@@ -290,19 +355,22 @@ class ClusteringService:
         
         if not scores:
             logger.error("No valid clustering solutions found")
-            return min_k, -1
+            return min_k, -1, None
         
         logger.info(f"Optimal k={best_k} with silhouette score={best_score:.3f}")
-        return best_k, best_score
+        return best_k, float(best_score), best_model
     
-    def _analyze_clusters(self, X: np.ndarray, labels: np.ndarray, X_scaled: np.ndarray) -> List[Dict[str, Any]]:
+    def _analyze_clusters(self, X_scaled: np.ndarray, labels: np.ndarray) -> List[Dict[str, Any]]:
         """
         Analyze cluster characteristics and generate interpretations.
         
+        Per-cluster sums are accumulated in one pass over the scaled matrix
+        and mapped back to the original feature scale through the fitted
+        scaler, so no unscaled copy or per-cluster subset is materialized.
+        
         Args:
-            X: Original feature matrix
-            labels: Cluster labels for each sample
             X_scaled: Scaled feature matrix used for clustering
+            labels: Cluster labels for each sample
             
         Returns:
             List of cluster analysis dictionaries
@@ -316,12 +384,22 @@ class ClusteringService:
             return clusters
         
         centers = self.kmeans_model.cluster_centers_
+        n_centers, n_features = centers.shape
+        
+        # Per-cluster sums and sums of squares (float64 accumulators)
+        counts = np.bincount(labels, minlength=n_centers)
+        sums = np.empty((n_centers, n_features))
+        squares = np.empty((n_centers, n_features))
+        for j in range(n_features):
+            column = X_scaled[:, j]
+            sums[:, j] = np.bincount(labels, weights=column, minlength=n_centers)
+            squares[:, j] = np.bincount(labels, weights=column * column, minlength=n_centers)
+        
+        mean, scale = self.scaler.mean_, self.scaler.scale_
         
         for label in unique_labels:
-            cluster_mask = labels == label
-            cluster_data = X[cluster_mask]
-            
-            if len(cluster_data) == 0:
+            size = int(counts[label]) if label < len(counts) else 0
+            if size == 0:
                 continue
             
             # Ensure label is within valid range
@@ -332,20 +410,28 @@ class ClusteringService:
             # Calculate cluster statistics
             cluster_info = {
                 'cluster_id': int(label),
-                'size': int(np.sum(cluster_mask)),
+                'size': size,
                 'centroid': centers[label].tolist(),
                 'characteristics': self._interpret_cluster(centers[label])
             }
             
+            # Statistics in the original feature scale
+            scaled_mean = sums[label] / size
+            scaled_var = np.maximum(squares[label] / size - scaled_mean ** 2, 0.0)
+            original_mean = scaled_mean * scale + mean
+            
             # Add performance metrics
-            if cluster_data.shape[1] >= 3:
-                cluster_info['avg_cognitive'] = float(np.mean(cluster_data[:, 0]))
-                cluster_info['avg_behavioral'] = float(np.mean(cluster_data[:, 1]))
-                cluster_info['avg_motivational'] = float(np.mean(cluster_data[:, 2]))
+            if n_features >= 3:
+                cluster_info['avg_cognitive'] = float(original_mean[0])
+                cluster_info['avg_behavioral'] = float(original_mean[1])
+                cluster_info['avg_motivational'] = float(original_mean[2])
             
             # Add statistical measures
-            cluster_info['std_deviation'] = float(np.mean(np.std(cluster_data, axis=0)))
-            cluster_info['inertia'] = float(np.sum((X_scaled[cluster_mask] - centers[label]) ** 2))
+            center = centers[label].astype(np.float64)
+            cluster_info['std_deviation'] = float(np.mean(np.sqrt(scaled_var) * scale))
+            cluster_info['inertia'] = float(max(
+                squares[label].sum() - 2 * sums[label] @ center + size * center @ center, 0.0
+            ))
             
             clusters.append(cluster_info)
         
@@ -356,8 +442,8 @@ class ClusteringService:
         self.cluster_metadata = {
             'clusters': clusters,
             'timestamp': str(np.datetime64('now')),
-            'n_samples': len(X),
-            'n_features': X.shape[1]
+            'n_samples': len(X_scaled),
+            'n_features': X_scaled.shape[1]
         }
         
         return clusters
@@ -447,61 +533,82 @@ class ClusteringService:
         Returns:
             Cluster recommendation results
         """
+        return self.get_cluster_recommendations([student_features])[0]
+    
+    def get_cluster_recommendations(self,
+                                    students_features: Union[List[Dict[str, float]], np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Get cluster-based recommendations for many students at once.
+        
+        Builds one feature matrix and runs a single scale/predict pass
+        instead of one per student.
+        
+        Args:
+            students_features: List of student performance feature dictionaries,
+                or a matrix already encoded with ``CLUSTER_FEATURE_ENCODER``
+            
+        Returns:
+            Cluster recommendation results, in input order
+        """
         if not self.model_loaded or self.kmeans_model is None:
-            return {
+            return [{
                 'success': False,
                 'message': 'No clustering model available'
-            }
+            } for _ in students_features]
+        
+        if len(students_features) == 0:
+            return []
         
         try:
-            # Prepare features with proper dimensionality
-            feature_vector = np.array([[
-                student_features.get('cognitive_score', 50.0) / 100.0,  # Normalize to 0-1
-                student_features.get('behavioral_score', 50.0) / 100.0,
-                student_features.get('motivational_score', 50.0) / 100.0,
-                student_features.get('success_rate', 0.5),
-                student_features.get('avg_time', 300.0) / 600.0,  # Normalize assuming max 600 seconds
-                student_features.get('attempts_count', 1.0) / 10.0  # Normalize assuming max 10 attempts
-            ]])
+            if isinstance(students_features, np.ndarray):
+                feature_matrix = np.asarray(students_features, dtype=CLUSTER_FEATURE_ENCODER.dtype)
+            else:
+                feature_matrix = CLUSTER_FEATURE_ENCODER.encode_batch(students_features)
             
             # Ensure correct dimensionality
-            if feature_vector.shape[1] != self.n_features:
-                feature_vector = self._validate_and_prepare_features(feature_vector)
-                if feature_vector is None:
-                    return {'success': False, 'message': 'Invalid feature dimensions'}
+            if feature_matrix.shape[1] != self.n_features:
+                feature_matrix = self._validate_and_prepare_features(feature_matrix)
+                if feature_matrix is None:
+                    return [{'success': False, 'message': 'Invalid feature dimensions'}
+                            for _ in students_features]
             
             # Scale and predict
-            feature_scaled = self.scaler.transform(feature_vector)
-            cluster_label = self.kmeans_model.predict(feature_scaled)[0]
+            feature_scaled = self.scaler.transform(feature_matrix)
+            cluster_labels = self.kmeans_model.predict(
+                feature_scaled.astype(self.kmeans_model.cluster_centers_.dtype, copy=False)
+            )
             
             # Get cluster info
-            cluster_info = None
-            for cluster in self.cluster_metadata.get('clusters', []):
-                if cluster['cluster_id'] == cluster_label:
-                    cluster_info = cluster
-                    break
-            
-            if cluster_info:
-                return {
-                    'success': True,
-                    'cluster_id': int(cluster_label),
-                    'cluster_size': cluster_info['size'],
-                    'characteristics': cluster_info['characteristics'],
-                    'peers_count': cluster_info['size'] - 1,
-                    'category': cluster_info['characteristics'].get('category', 'Unknown')
-                }
-            
-            return {
-                'success': False,
-                'message': 'Cluster information not found'
+            clusters_by_id = {
+                cluster['cluster_id']: cluster
+                for cluster in self.cluster_metadata.get('clusters', [])
             }
             
+            results = []
+            for cluster_label in cluster_labels:
+                cluster_info = clusters_by_id.get(int(cluster_label))
+                if cluster_info:
+                    results.append({
+                        'success': True,
+                        'cluster_id': int(cluster_label),
+                        'cluster_size': cluster_info['size'],
+                        'characteristics': cluster_info['characteristics'],
+                        'peers_count': cluster_info['size'] - 1,
+                        'category': cluster_info['characteristics'].get('category', 'Unknown')
+                    })
+                else:
+                    results.append({
+                        'success': False,
+                        'message': 'Cluster information not found'
+                    })
+            return results
+            
         except Exception as e:
             logger.error(f"Cluster recommendation failed: {str(e)}")
-            return {
+            return [{
                 'success': False,
                 'message': f'Recommendation failed: {str(e)}'
-            }
+            } for _ in students_features]
     
     def _save_model(self) -> None:
         """Save clustering model and metadata."""
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Output Comparator
+=================
+Structural comparison of function outputs against expected values, and
+bounded previews of large values for responses.
+
+Plain ``==`` stays the fast path: outputs that are equal pass without a
+Python-level walk. Only when it fails does the comparator walk both
+values to apply float tolerance and to locate the first difference,
+which is reported as a path (``[3]['total']``) with previews of both
+sides instead of the full values.
+
+Per test case options (``test_case['compare']``):
+    rel_tol / abs_tol: float tolerance (default ``rel_tol=1e-9``; ints
+        are always compared exactly)
+    unordered: compare the top-level list as a multiset
+    checker: name of a registered checker (``any_of``, ...)
+
+A test case may give ``output_hash`` (``sha256:<hex>`` of the canonical
+JSON of the output) instead of ``output`` so huge expected values never
+have to be stored or shipped.
+"""
+
+import hashlib
+import json
+import math
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+DEFAULT_REL_TOL = 1e-9
+
+# Failing outputs with more elements than this get an ``actual_hash`` in results
+HASH_THRESHOLD = 10000
+
+_MISSING = object()
+
+CHECKERS: Dict[str, Callable[[Any, Any, Dict[str, Any]], bool]] = {}
+
+
+def register_checker(name: str):
+    """Decorator registering ``fn(actual, expected, options) -> bool`` as a checker."""
+    def decorator(fn):
+        CHECKERS[name] = fn
+        return fn
+    return decorator
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (set, frozenset)):
+        return _sorted_items(value)
+    return repr(value)
+
+
+def canonical_json(value: Any) -> str:
+    """Serialization used for hashing and for ordering unsortable items."""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=_json_default)
+
+
+def output_digest(value: Any) -> str:
+    """``sha256:<hex>`` digest of a value's canonical JSON."""
+    return "sha256:" + hashlib.sha256(canonical_json(value).encode()).hexdigest()
+
+
+def element_count(value: Any, limit: int = HASH_THRESHOLD + 1) -> int:
+    """Number of elements in a value, counted up to ``limit``."""
+    count = 0
+    stack = [value]
+    while stack and count < limit:
+        item = stack.pop()
+        count += 1
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return count
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _sorted_items(items) -> List[Any]:
+    try:
+        return sorted(items)
+    except TypeError:
+        return sorted(items, key=canonical_json)
+
+
+class OutputComparator:
+    """
+    Compares outputs and bounds the values echoed back in test results.
+
+    ``preview_items`` caps the elements kept per container (and in total)
+    and ``preview_chars`` the characters kept per string.
+    """
+
+    def __init__(self, preview_items: int = 20, preview_chars: int = 200):
+        self.preview_items = preview_items
+        self.preview_chars = preview_chars
+
+    def compare(self, actual: Any, expected: Any, test_case: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compare one output.
+
+        Returns ``passed`` and, for failures, ``mismatch`` describing the
+        first difference found.
+        """
+        options = test_case.get('compare') or {}
+        checker = options.get('checker')
+        if checker is not None:
+            if checker not in CHECKERS:
+                raise ValueError(f"Unknown checker {checker!r}")
+            passed = bool(CHECKERS[checker](actual, expected, options))
+            return {'passed': passed, 'mismatch': None if passed else {'path': '', 'reason': f"rejected by {checker}"}}
+
+        if 'output_hash' in test_case and 'output' not in test_case:
+            digest = output_digest(actual)
+            if digest == test_case['output_hash']:
+                return {'passed': True, 'mismatch': None}
+            return {'passed': False, 'mismatch': {'path': '', 'reason': "output hash differs",
+                                                  'actual_hash': digest}}
+
+        if options.get('unordered') and isinstance(actual, (list, tuple)) and isinstance(expected, list):
+            actual, expected = _sorted_items(actual), _sorted_items(expected)
+
+        if actual == expected:
+            return {'passed': True, 'mismatch': None}
+        tolerance = (float(options.get('rel_tol', DEFAULT_REL_TOL)), float(options.get('abs_tol', 0.0)))
+        mismatch = self._difference(actual, expected, '', tolerance)
+        return {'passed': mismatch is None, 'mismatch': mismatch}
+
+    def _difference(self, actual: Any, expected: Any, path: str,
+                    tolerance: Tuple[float, float]) -> Optional[Dict[str, Any]]:
+        """First difference between two values, None if equal within tolerance."""
+        if actual == expected:
+            return None
+        if _is_number(actual) and _is_number(expected):
+            if (isinstance(actual, float) or isinstance(expected, float)) and \
+                    math.isclose(actual, expected, rel_tol=tolerance[0], abs_tol=tolerance[1]):
+                return None
+            return self._mismatch(path, actual, expected, "values differ")
+        if type(actual) is not type(expected):
+            return self._mismatch(path, actual, expected,
+                                  f"type {type(actual).__name__} != {type(expected).__name__}")
+        if isinstance(expected, (list, tuple)):
+            for i, (a, e) in enumerate(zip(actual, expected)):
+                found = self._difference(a, e, f"{path}[{i}]", tolerance)
+                if found is not None:
+                    return found
+            if len(actual) != len(expected):
+                return self._mismatch(path, actual, expected,
+                                      f"length {len(actual)} != {len(expected)}")
+            return None
+        if isinstance(expected, dict):
+            for key in expected:
+                if key not in actual:
+                    return self._mismatch(f"{path}[{key!r}]", None, expected[key], "missing key")
+                found = self._difference(actual[key], expected[key], f"{path}[{key!r}]", tolerance)
+                if found is not None:
+                    return found
+            extra = next((key for key in actual if key not in expected), _MISSING)
+            if extra is _MISSING:
+                return None
+            return self._mismatch(f"{path}[{extra!r}]", actual[extra], None, "unexpected key")
+        return self._mismatch(path, actual, expected, "values differ")
+
+    def _mismatch(self, path: str, actual: Any, expected: Any, reason: str) -> Dict[str, Any]:
+        return {
+            'path': path,
+            'reason': reason,
+            'expected': self.preview(expected)[0],
+            'actual': self.preview(actual)[0]
+        }
+
+    def preview(self, value: Any) -> Tuple[Any, bool]:
+        """JSON-friendly copy of ``value`` cut to the preview limits, and whether anything was cut."""
+        budget = [self.preview_items]
+        truncated = [False]
+
+        def bound(item):
+            if isinstance(item, str):
+                if len(item) > self.preview_chars:
+                    truncated[0] = True
+                    return item[:self.preview_chars] + f"...(+{len(item) - self.preview_chars} chars)"
+                return item
+            if isinstance(item, dict):
+                kept = {}
+                for key, sub in item.items():
+                    if budget[0] <= 0:
+                        truncated[0] = True
+                        kept["..."] = f"+{len(item) - len(kept)} more keys"
+                        break
+                    budget[0] -= 1
+                    kept[key] = bound(sub)
+                return kept
+            if isinstance(item, (list, tuple, set, frozenset)):
+                kept = []
+                for sub in item:
+                    if budget[0] <= 0:
+                        truncated[0] = True
+                        kept.append(f"...(+{len(item) - len(kept)} more items)")
+                        break
+                    budget[0] -= 1
+                    kept.append(bound(sub))
+                return kept
+            return item
+
+        return bound(value), truncated[0]
+
+    def bound_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace large ``input``/``expected``/``actual`` values in a test result by previews."""
+        truncated = []
+        for field in ('input', 'expected', 'actual'):
+            if field in result and element_count(result[field], self.preview_items + 2) > self.preview_items:
+                if field == 'actual' and not result.get('passed') and \
+                        element_count(result[field]) > HASH_THRESHOLD:
+                    result['actual_hash'] = output_digest(result[field])
+                result[field], cut = self.preview(result[field])
+                if cut:
+                    truncated.append(field)
+            elif isinstance(result.get(field), str) and len(result[field]) > self.preview_chars:
+                result[field], _ = self.preview(result[field])
+                truncated.append(field)
+        if truncated:
+            result['truncated_fields'] = truncated
+        return result
+
+
+@register_checker('any_of')
+def _any_of(actual: Any, expected: Any, options: Dict[str, Any]) -> bool:
+    """``expected`` lists every acceptable output."""
+    return any(actual == candidate for candidate in expected)
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Static Complexity Analyzer
+==========================
+Estimates the asymptotic time complexity of a submission from its AST,
+without executing it.
+
+Each statement gets a cost ``n^degree * log(n)^log`` (or exponential).
+Loops over input-sized iterables multiply the cost of their body, a
+while loop that halves its variable counts as ``log n``, and calls with
+a known cost (``sorted``, ``list.index``, ``in`` on a list, slicing)
+add their own term. Recursive functions are solved from their fan-out
+and how the argument shrinks (``n - 1`` vs ``n // 2``), Master-theorem
+style. The result is an upper-bound estimate meant for flagging
+obviously inefficient solutions, not a proof.
+"""
+
+import ast
+import math
+import re
+from typing import Dict, List, Any, Optional, NamedTuple, Set, Union
+
+
+class Cost(NamedTuple):
+    """``2^n`` if exponential, else ``n^degree * log(n)^log``; ordered by growth."""
+    exponential: bool = False
+    degree: float = 0.0
+    log: int = 0
+
+    def __mul__(self, other: "Cost") -> "Cost":
+        return Cost(self.exponential or other.exponential, self.degree + other.degree, self.log + other.log)
+
+    def label(self) -> str:
+        if self.exponential:
+            return "O(2^n)"
+        if self.degree == 0 and self.log == 0:
+            return "O(1)"
+        parts = []
+        if self.degree:
+            degree = int(self.degree) if float(self.degree).is_integer() else round(self.degree, 2)
+            parts.append("n" if degree == 1 else f"n^{degree}")
+        if self.log:
+            parts.append("log n" if self.log == 1 else f"log^{self.log} n")
+        return "O(" + " ".join(parts) + ")"
+
+
+CONSTANT = Cost()
+LOGARITHMIC = Cost(log=1)
+LINEAR = Cost(degree=1)
+LINEARITHMIC = Cost(degree=1, log=1)
+EXPONENTIAL = Cost(exponential=True)
+
+COMPLEXITY_RE = re.compile(
+    r'^O\(\s*(?:(?P<const>1)|(?P<exp>2\^n)|'
+    r'(?:(?P<n>n)(?:\^(?P<degree>\d+(?:\.\d+)?))?)?\s*(?P<log>log(?:\^(?P<logpow>\d+))?\s*n)?)\s*\)$',
+    re.IGNORECASE
+)
+
+# Builtins that walk their whole argument
+LINEAR_BUILTINS = frozenset({'min', 'max', 'sum', 'any', 'all', 'list', 'tuple', 'set', 'dict',
+                             'frozenset', 'str', 'reversed', 'sorted', 'map', 'filter'})
+# Lazy iterables: iterating them costs what iterating the argument costs
+PASSTHROUGH_ITERABLES = frozenset({'enumerate', 'zip', 'reversed', 'sorted', 'list', 'tuple',
+                                   'set', 'iter', 'map', 'filter'})
+# list methods that scan or shift the list
+LINEAR_METHODS = frozenset({'index', 'count', 'remove', 'insert', 'copy', 'extend', 'join', 'reverse'})
+MEMO_DECORATORS = frozenset({'lru_cache', 'cache'})
+HALVING_OPS = (ast.FloorDiv, ast.RShift, ast.Div)
+
+
+def parse_complexity(text: str) -> Cost:
+    """Parse ``O(1)``, ``O(log n)``, ``O(n)``, ``O(n log n)``, ``O(n^2)``, ``O(2^n)``."""
+    found = COMPLEXITY_RE.match(text.strip())
+    if not found or not any(found.group(g) for g in ('const', 'exp', 'n', 'log')):
+        raise ValueError(f"Unrecognized complexity class: {text!r}")
+    if found.group('const'):
+        return CONSTANT
+    if found.group('exp'):
+        return EXPONENTIAL
+    degree = float(found.group('degree') or 1) if found.group('n') else 0.0
+    log = int(found.group('logpow') or 1) if found.group('log') else 0
+    return Cost(degree=degree, log=log)
+
+
+def _is_constant(node: ast.AST) -> bool:
+    """Literal built only from constants (its size does not depend on input)."""
+    if isinstance(node, ast.Constant):
+        return True
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return all(_is_constant(e) for e in node.elts)
+    if isinstance(node, ast.UnaryOp):
+        return _is_constant(node.operand)
+    return False
+
+
+def _grown_names(stmts: List[ast.stmt]) -> Set[str]:
+    """Names a block grows in place (``append``/``extend``/``insert``/``add``/``update``, ``+=``)."""
+    grown = set()
+    for node in (child for stmt in stmts for child in ast.walk(stmt)):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and \
+                isinstance(node.func.value, ast.Name) and \
+                node.func.attr in ('append', 'extend', 'insert', 'add', 'update'):
+            grown.add(node.func.value.id)
+        elif isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name) and \
+                isinstance(node.op, (ast.Add, ast.BitOr)):
+            grown.add(node.target.id)
+    return grown
+
+
+def _call_name(node: ast.Call) -> Optional[str]:
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+def _has_halving(node: ast.AST) -> bool:
+    """Whether ``node`` divides or shifts something (``n // 2``, ``x >>= 1``, ``i *= 2``)."""
+    for child in ast.walk(node):
+        if isinstance(child, ast.BinOp) and isinstance(child.op, HALVING_OPS):
+            return True
+        if isinstance(child, ast.AugAssign) and isinstance(child.op, HALVING_OPS + (ast.Mult,)):
+            return True
+    return False
+
+
+class _FunctionContext:
+    """What is known about the names of one function while it is analyzed."""
+
+    def __init__(self, name: Optional[str], params: Set[str], body: Optional[List[ast.stmt]] = None):
+        self.name = name
+        self.params = params
+        self.grown = _grown_names(body or [])  # never constant-size, whatever they start as
+        self.hashed: Set[str] = set()      # dicts/sets: O(1) membership
+        self.constant: Set[str] = set()    # bound to constant literals
+        self.halved: Set[str] = set()      # bound to e.g. ``len(a) // 2``
+        self.self_calls: List[ast.Call] = []
+
+
+class ComplexityAnalyzer:
+    """Big-O estimate for Python source without running it."""
+
+    def __init__(self, max_hotspots: int = 5):
+        self.max_hotspots = max_hotspots
+
+    def analyze(self, code: Union[str, ast.AST], entry: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Estimate the time complexity of ``entry`` (or of the costliest
+        top-level function when not given).
+
+        Returns:
+            ``time_complexity`` label plus its components, maximum loop
+            nesting, recursion shape and the costliest lines.
+        """
+        tree = ast.parse(code) if isinstance(code, str) else code
+        self._functions = {
+            node.name: node for node in tree.body
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        }
+        self._function_costs: Dict[str, Cost] = {}
+        self._recursion: Dict[str, Dict[str, Any]] = {}
+        self._in_progress: Set[str] = set()
+        self._hotspots: Dict[int, Dict[str, Any]] = {}
+        self._max_depth = 0
+
+        for name in self._functions:
+            self._function_cost(name)
+        module_body = [n for n in tree.body if not isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+        module_cost = self._block(module_body, _FunctionContext(None, set(), module_body), 0)
+
+        if entry in self._function_costs:
+            cost = self._function_costs[entry]
+        else:
+            cost = max([module_cost, *self._function_costs.values()])
+            entry = max(self._function_costs, key=self._function_costs.get) if self._function_costs else None
+
+        hotspots = sorted(self._hotspots.values(), key=lambda h: (h['_cost'], -h['line']), reverse=True)
+        return {
+            "time_complexity": cost.label(),
+            "degree": cost.degree,
+            "log_factor": cost.log,
+            "exponential": cost.exponential,
+            "entry": entry,
+            "max_loop_depth": self._max_depth,
+            "recursion": self._recursion.get(entry),
+            "functions": {name: c.label() for name, c in self._function_costs.items()},
+            "hotspots": [
+                {key: value for key, value in h.items() if key != '_cost'}
+                for h in hotspots[:self.max_hotspots]
+            ]
+        }
+
+    def exceeds(self, analysis: Dict[str, Any], limit: str) -> bool:
+        """Whether an ``analyze`` result grows faster than ``limit`` (e.g. ``O(n log n)``)."""
+        estimate = Cost(analysis['exponential'], analysis['degree'], analysis['log_factor'])
+        return estimate > parse_complexity(limit)
+
+    # Functions and recursion
+
+    def _function_cost(self, name: str) -> Cost:
+        if name in self._function_costs:
+            return self._function_costs[name]
+        if name in self._in_progress:
+            return CONSTANT  # mutual recursion: counted at the outer call
+        self._in_progress.add(name)
+        node = self._functions[name]
+        args = node.args
+        params = {a.arg for a in args.posonlyargs + args.args + args.kwonlyargs}
+        ctx = _FunctionContext(name, params, node.body)
+        defaults = zip(reversed(args.posonlyargs + args.args), reversed(args.defaults))
+        ctx.hashed.update(arg.arg for arg, default in defaults if isinstance(default, (ast.Dict, ast.Set)))
+        body = self._block(node.body, ctx, 0)
+
+        cost = body
+        if ctx.self_calls:
+            cost = self._solve_recursion(node, ctx, body)
+        self._in_progress.discard(name)
+        self._function_costs[name] = cost
+        return cost
+
+    def _solve_recursion(self, node, ctx: _FunctionContext, body: Cost) -> Cost:
+        fan_out = self._fan_out(node.body, ctx.name)
+        halving = any(
+            _has_halving(arg) or any(isinstance(n, ast.Name) and n.id in ctx.halved for n in ast.walk(arg))
+            for call in ctx.self_calls for arg in call.args
+        )
+        memoized = self._is_memoized(node)
+
+        if not halving:
+            # T(n) = a T(n - 1) + f(n)
+            cost = body * LINEAR if fan_out <= 1 or memoized else EXPONENTIAL
+        else:
+            # T(n) = a T(n / 2) + f(n)
+            critical = math.log2(fan_out) if fan_out > 1 else 0.0
+            if body.degree > critical:
+                cost = body
+            elif body.degree == critical:
+                cost = Cost(degree=critical, log=body.log + 1)
+            else:
+                cost = Cost(degree=critical)
+
+        self._recursion[ctx.name] = {
+            "function": ctx.name,
+            "fan_out": fan_out,
+            "reduction": "halving" if halving else "decrement",
+            "memoized": memoized
+        }
+        self._record(node.lineno, cost, f"recursion in {ctx.name}() (fan-out {fan_out})")
+        return cost
+
+    def _fan_out(self, stmts: List[ast.stmt], name: str) -> int:
+        """Recursive calls on the costliest path through ``stmts``."""
+        total = 0
+        for index, stmt in enumerate(stmts):
+            if isinstance(stmt, ast.If):
+                total += self._count_calls(stmt.test, name)
+                if stmt.body and isinstance(stmt.body[-1], (ast.Return, ast.Raise)):
+                    # Early return: the statements after the if are the other branch
+                    rest = stmt.orelse + stmts[index + 1:]
+                    return total + max(self._fan_out(stmt.body, name), self._fan_out(rest, name))
+                total += max(self._fan_out(stmt.body, name), self._fan_out(stmt.orelse, name))
+            elif isinstance(stmt, (ast.For, ast.While, ast.AsyncFor)):
+                header = stmt.test if isinstance(stmt, ast.While) else stmt.iter
+                inside = self._fan_out(stmt.body, name) + self._count_calls(header, name)
+                # A recursive call per iteration branches like backtracking
+                total += 2 * inside if inside else 0
+            elif isinstance(stmt, (ast.Try, ast.With, ast.AsyncWith)):
+                total += self._fan_out(stmt.body, name)
+            elif not isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                total += self._count_calls(stmt, name)
+            if isinstance(stmt, (ast.Return, ast.Raise)):
+                break
+        return total
+
+    @staticmethod
+    def _count_calls(node: ast.AST, name: str) -> int:
+        return sum(1 for n in ast.walk(node)
+                   if isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id == name)
+
+    @staticmethod
+    def _is_memoized(node) -> bool:
+        for decorator in node.decorator_list:
+            target = decorator.func if isinstance(decorator, ast.Call) else decorator
+            if isinstance(target, (ast.Name, ast.Attribute)) and \
+                    (getattr(target, 'id', None) or getattr(target, 'attr', None)) in MEMO_DECORATORS:
+                return True
+        # memo dict: ``if n in memo`` ... ``memo[n] = ...``
+        looked_up, stored = set(), set()
+        for child in ast.walk(node):
+            if isinstance(child, ast.Compare) and isinstance(child.ops[0], ast.In) and \
+                    isinstance(child.comparators[0], ast.Name):
+                looked_up.add(child.comparators[0].id)
+            elif isinstance(child, ast.Assign):
+                for target in child.targets:
+                    if isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name):
+                        stored.add(target.value.id)
+        return bool(looked_up & stored)
+
+    # Statements
+
+    def _block(self, stmts: List[ast.stmt], ctx: _FunctionContext, depth: int) -> Cost:
+        cost = CONSTANT
+        for stmt in stmts:
+            cost = max(cost, self._stmt(stmt, ctx, depth))
+        return cost
+
+    def _stmt(self, node: ast.stmt, ctx: _FunctionContext, depth: int) -> Cost:
+        if isinstance(node, (ast.For, ast.AsyncFor)):
+            iterations = self._iterations(node.iter, ctx)
+            nested = depth + (iterations > CONSTANT)
+            self._max_depth = max(self._max_depth, nested)
+            body = self._block(node.body, ctx, nested)
+            cost = max(self._expr(node.iter, ctx), iterations * body, self._block(node.orelse, ctx, depth))
+            if iterations > CONSTANT and body > CONSTANT:
+                self._record(node.lineno, cost, f"loop with {body.label()} body")
+            return cost
+        if isinstance(node, ast.While):
+            iterations = LOGARITHMIC if _has_halving(node) else LINEAR
+            nested = depth + 1
+            self._max_depth = max(self._max_depth, nested)
+            body = max(self._expr(node.test, ctx), self._block(node.body, ctx, nested))
+            cost = iterations * body
+            if body > CONSTANT:
+                self._record(node.lineno, cost, f"while loop with {body.label()} body")
+            return cost
+        if isinstance(node, ast.If):
+            return max(self._expr(node.test, ctx),
+                       self._block(node.body, ctx, depth),
+                       self._block(node.orelse, ctx, depth))
+        if isinstance(node, (ast.Try, ast.With, ast.AsyncWith)):
+            blocks = [node.body] + [getattr(node, 'orelse', []), getattr(node, 'finalbody', [])]
+            blocks += [handler.body for handler in getattr(node, 'handlers', [])]
+            items = [self._expr(item.context_expr, ctx) for item in getattr(node, 'items', [])]
+            return max([CONSTANT, *items, *(self._block(b, ctx, depth) for b in blocks)])
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            return CONSTANT
+        if isinstance(node, ast.Assign):
+            self._track_assignment(node.targets, node.value, ctx)
+        cost = CONSTANT
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.expr):
+                cost = max(cost, self._expr(child, ctx))
+        return cost
+
+    def _track_assignment(self, targets: List[ast.expr], value: ast.expr, ctx: _FunctionContext) -> None:
+        hashed = isinstance(value, (ast.Dict, ast.Set, ast.DictComp, ast.SetComp)) or (
+            isinstance(value, ast.Call) and _call_name(value) in ('dict', 'set', 'defaultdict', 'Counter')
+        )
+        for target in targets:
+            if not isinstance(target, ast.Name):
+                continue
+            ctx.hashed.discard(target.id)
+            ctx.constant.discard(target.id)
+            ctx.halved.discard(target.id)
+            if hashed:
+                ctx.hashed.add(target.id)
+            elif _is_constant(value) and target.id not in ctx.grown:
+                ctx.constant.add(target.id)
+            elif _has_halving(value):
+                ctx.halved.add(target.id)
+
+    # Expressions
+
+    def _iterations(self, node: ast.expr, ctx: _FunctionContext) -> Cost:
+        """How many times a loop over ``node`` runs."""
+        if _is_constant(node) or (isinstance(node, ast.Name) and node.id in ctx.constant):
+            return CONSTANT
+        if isinstance(node, ast.Call):
+            name = _call_name(node)
+            if name == 'range':
+                if all(_is_constant(a) or (isinstance(a, ast.Name) and a.id in ctx.constant) for a in node.args):
+                    return CONSTANT
+                return LINEAR
+            if name in PASSTHROUGH_ITERABLES and node.args:
+                return max(self._iterations(a, ctx) for a in node.args)
+        return LINEAR
+
+    def _expr(self, node: ast.expr, ctx: _FunctionContext) -> Cost:
+        if isinstance(node, (ast.Lambda, ast.Constant)):
+            return CONSTANT
+        if isinstance(node, (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)):
+            cost = CONSTANT
+            for generator in node.generators:
+                cost = cost * self._iterations(generator.iter, ctx)
+            elements = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+            inner = max([CONSTANT, *(self._expr(e, ctx) for e in elements),
+                         *(self._expr(c, ctx) for g in node.generators for c in g.ifs)])
+            return max(self._expr(node.generators[0].iter, ctx), cost * inner)
+
+        children = max([CONSTANT, *(self._expr(c, ctx) for c in ast.iter_child_nodes(node)
+                                    if isinstance(c, ast.expr))])
+        own = CONSTANT
+        if isinstance(node, ast.Call):
+            own = self._call_cost(node, ctx)
+        elif isinstance(node, ast.Compare):
+            for op, right in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.In, ast.NotIn)) and self._linear_membership(right, ctx):
+                    own = LINEAR
+                    self._record(node.lineno, own, "membership test on a list")
+        elif isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Slice):
+            if not _is_constant(node.value):
+                own = LINEAR
+        return max(own, children)
+
+    def _linear_membership(self, node: ast.expr, ctx: _FunctionContext) -> bool:
+        if _is_constant(node) or isinstance(node, (ast.Dict, ast.Set, ast.DictComp, ast.SetComp)):
+            return False
+        if isinstance(node, ast.Name):
+            return node.id not in ctx.hashed and node.id not in ctx.constant
+        if isinstance(node, ast.Call) and _call_name(node) in ('keys', 'set', 'dict', 'frozenset'):
+            return False
+        return True
+
+    def _call_cost(self, node: ast.Call, ctx: _FunctionContext) -> Cost:
+        name = _call_name(node)
+        if isinstance(node.func, ast.Name):
+            if name == ctx.name:
+                ctx.self_calls.append(node)
+                return CONSTANT
+            if name in self._functions:
+                return self._function_cost(name)
+            if name == 'sorted':
+                return CONSTANT if all(_is_constant(a) for a in node.args) else LINEARITHMIC
+            if name in LINEAR_BUILTINS and node.args:
+                sized = not all(_is_constant(a) for a in node.args) and not (
+                    name in ('min', 'max') and len(node.args) > 1)
+                return LINEAR if sized else CONSTANT
+            return CONSTANT
+        if name == 'sort':
+            self._record(node.lineno, LINEARITHMIC, "sort()")
+            return LINEARITHMIC
+        if name in LINEAR_METHODS:
+            return LINEAR
+        if name == 'pop' and node.args and isinstance(node.args[0], ast.Constant) and node.args[0].value == 0:
+            return LINEAR  # pop(0) shifts the whole list
+        return CONSTANT
+
+    def _record(self, line: int, cost: Cost, reason: str) -> None:
+        current = self._hotspots.get(line)
+        if current is None or cost > current['_cost']:
+            self._hotspots[line] = {"line": line, "cost": cost.label(), "reason": reason, "_cost": cost}
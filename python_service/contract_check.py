@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Client Contract Check
+=====================
+Verifies that every request ``LearnerServiceClient`` sends matches the
+service's OpenAPI schema.
+
+The client is driven through an in-memory transport that records each
+request instead of sending it; every recorded request must hit a
+documented path and method, use only documented query parameters, and
+carry a JSON body that satisfies the request schema (required
+properties, no unknown properties, JSON types) or another body of a
+documented media type.
+
+Usage (from python_service/):
+    python contract_check.py                           # schema of the local app
+    python contract_check.py --url http://localhost:8000   # schema of a running service
+"""
+
+import sys
+import json
+import argparse
+from typing import Dict, List, Any, Optional
+
+import httpx
+
+from service_client import LearnerServiceClient
+
+JSON_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+    "null": type(None),
+}
+
+
+def load_schema(url: Optional[str] = None) -> Dict[str, Any]:
+    """OpenAPI document of a running service, or of the app in this process."""
+    if url:
+        return httpx.get(url.rstrip("/") + "/openapi.json", timeout=10).json()
+    from app import app
+    return app.openapi()
+
+
+def record_client_requests() -> List[httpx.Request]:
+    """Call every client method once with representative arguments."""
+    recorded = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        recorded.append(request)
+        if request.url.path == "/recommend/batch":
+            return httpx.Response(200, content=b'{"summary": {}}\n')
+        return httpx.Response(200, json={})
+
+    client = LearnerServiceClient(base_url="http://contract", transport=httpx.MockTransport(handler))
+    code = "def add(a, b):\n    return a + b"
+    tests = [{"input": {"a": 1, "b": 2}, "output": 3}]
+    results = [{"test_id": 1, "passed": False, "error": "TypeError"}]
+    with client:
+        client.evaluate(code, tests)
+        client.evaluate(code, tests, fields=["score", "passed"], timeout=5, mode="fail_fast",
+                        max_complexity="O(n)", count_instructions=True, reuse_setup=True)
+        client.evaluate(code, tests, summary=True)
+        client.update_profile(1, {"is_successful": True, "score": 100}, {"competency_id": 1})
+        client.recommend(1, code, results, error_message="unsupported operand", user_profile={})
+        list(client.recommend_batch([{"attempt_id": 1, "code": code, "test_results": results}]))
+        client.cluster(2, 4, feature_data=[{"cognitive_score": 80.0}], dtype="float32")
+        client.cluster_upload(b'{"cognitive_score": 80.0}\n', columns=["cognitive_score"])
+        client.cluster_upload(b"cognitive_score\n80\n", content_type="text/csv")
+        client.similar(code, limit=3, min_similarity=0.8)
+        client.health()
+        client.stats()
+    return recorded
+
+
+def _resolve(schema: Dict[str, Any], document: Dict[str, Any]) -> Dict[str, Any]:
+    while "$ref" in schema:
+        target = document
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            target = target[part]
+        schema = target
+    return schema
+
+
+def validate(value: Any, schema: Dict[str, Any], document: Dict[str, Any], path: str) -> List[str]:
+    """Structural violations of ``value`` against a JSON schema (the subset FastAPI emits)."""
+    schema = _resolve(schema, document)
+    if "anyOf" in schema:
+        options = [validate(value, option, document, path) for option in schema["anyOf"]]
+        if all(options):
+            return [f"{path}: matches none of anyOf ({'; '.join(o[0] for o in options)})"]
+        return []
+
+    errors = []
+    expected = schema.get("type")
+    if expected in JSON_TYPES:
+        python_type = JSON_TYPES[expected]
+        if not isinstance(value, python_type) or (expected in ("integer", "number") and isinstance(value, bool)):
+            return [f"{path}: expected {expected}, got {type(value).__name__}"]
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for name in schema.get("required", []):
+            if name not in value:
+                errors.append(f"{path}.{name}: required property missing")
+        for name, item in value.items():
+            if name in properties:
+                errors.extend(validate(item, properties[name], document, f"{path}.{name}"))
+            elif properties and schema.get("additionalProperties") is not True:
+                errors.append(f"{path}.{name}: not in schema")
+            elif isinstance(schema.get("additionalProperties"), dict):
+                errors.extend(validate(item, schema["additionalProperties"], document, f"{path}.{name}"))
+    elif isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], document, f"{path}[{i}]"))
+    return errors
+
+
+def check_request(request: httpx.Request, document: Dict[str, Any]) -> List[str]:
+    """Contract violations of one recorded request."""
+    method, path = request.method.lower(), request.url.path
+    operation = document.get("paths", {}).get(path, {}).get(method)
+    label = f"{request.method} {path}"
+    if operation is None:
+        return [f"{label}: not in the OpenAPI schema"]
+
+    errors = []
+    declared = {p["name"] for p in operation.get("parameters", []) if p.get("in") == "query"}
+    for name in request.url.params.keys():
+        if name not in declared:
+            errors.append(f"{label}: undocumented query parameter {name!r}")
+
+    content = operation.get("requestBody", {}).get("content", {})
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    body_schema = content.get("application/json", {}).get("schema")
+    if request.content:
+        if media_type != "application/json":
+            if media_type not in content:
+                errors.append(f"{label}: sends {media_type or 'untyped'} content the endpoint does not accept")
+        elif body_schema is None:
+            errors.append(f"{label}: sends a body the endpoint does not accept")
+        else:
+            errors.extend(f"{label} {error}" for error in
+                          validate(json.loads(request.content), body_schema, document, "body"))
+    elif operation.get("requestBody", {}).get("required"):
+        errors.append(f"{label}: required request body missing")
+    return errors
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="check against the schema of a running service")
+    args = parser.parse_args()
+
+    document = load_schema(args.url)
+    requests = record_client_requests()
+    violations = [error for request in requests for error in check_request(request, document)]
+
+    covered = {(r.method.lower(), r.url.path) for r in requests}
+    for path, operations in sorted(document.get("paths", {}).items()):
+        for method in operations:
+            marker = "covered" if (method, path) in covered else "-"
+            print(f"{method.upper():<6} {path:<32} {marker}")
+
+    print(f"\n{len(requests)} client requests checked, {len(violations)} violations")
+    for violation in violations:
+        print(f"  {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
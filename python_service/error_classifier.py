@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Error Classifier
+================
+Parses execution tracebacks into structured errors and maps them to
+mistake categories.
+
+Tracebacks produced by ``CodeEvaluator`` are parsed once per distinct
+text with precompiled patterns: the exception class, the failing line
+and function in the student's code (frames from ``<string>``) and the
+recursion depth. Results are aggregated across every failed test of a
+submission.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple
+
+# Frames of code run through exec() carry this filename
+STUDENT_FILENAME = "<string>"
+
+FRAME_RE = re.compile(r'^\s*File "(?P<file>[^"]+)", line (?P<line>\d+), in (?P<func>\S+)', re.MULTILINE)
+REPEATED_RE = re.compile(r'^\s*\[Previous line repeated (?P<count>\d+) more times?\]', re.MULTILINE)
+EXCEPTION_RE = re.compile(r'^(?P<exc>[A-Za-z_][\w.]*)(?::\s?(?P<msg>.*))?$')
+
+# Exception class -> mistake category
+EXCEPTION_CATEGORIES = {
+    'RecursionError': 'missing_base_case',
+    'IndexError': 'off_by_one',
+    'TimeoutError': 'infinite_loop',
+    'InstructionBudgetExceeded': 'infinite_loop',
+    'KeyError': 'missing_key',
+    'ZeroDivisionError': 'division_by_zero',
+    'NameError': 'undefined_name',
+    'UnboundLocalError': 'undefined_name',
+    'TypeError': 'type_mismatch',
+    'AttributeError': 'type_mismatch',
+    'ValueError': 'invalid_value',
+    'SyntaxError': 'syntax_error',
+    'IndentationError': 'syntax_error',
+}
+
+# Message refinements that override the class-level category
+MESSAGE_CATEGORIES: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"'NoneType' object is not (subscriptable|iterable)|unsupported operand type\(s\) .*'NoneType'"),
+     'missing_return'),
+]
+
+# Exception class recognisable from a bare error message without traceback
+MESSAGE_EXCEPTIONS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r'maximum recursion depth', re.IGNORECASE), 'RecursionError'),
+    (re.compile(r'index out of range', re.IGNORECASE), 'IndexError'),
+    (re.compile(r'division (or modulo )?by zero', re.IGNORECASE), 'ZeroDivisionError'),
+    (re.compile(r"name '\w+' is not defined", re.IGNORECASE), 'NameError'),
+    (re.compile(r'timed? ?out', re.IGNORECASE), 'TimeoutError'),
+    (re.compile(r'invalid syntax|expected .:.', re.IGNORECASE), 'SyntaxError'),
+]
+
+
+class ErrorClassifier:
+    """Structured classification of execution errors for a submission."""
+
+    def parse_traceback(self, text: str) -> Dict[str, Any]:
+        """
+        Parse one traceback.
+
+        Returns the exception class and message, the innermost frame in
+        student code (line and function), and the recursion depth seen.
+        """
+        exception, message = None, None
+        for line in reversed(text.strip().splitlines()):
+            found = EXCEPTION_RE.match(line)
+            if found:
+                exception, message = found.group('exc').rsplit('.', 1)[-1], found.group('msg')
+                break
+
+        student_frames = [f for f in FRAME_RE.finditer(text) if f.group('file') == STUDENT_FILENAME]
+        depth = len(student_frames) + sum(int(r.group('count')) for r in REPEATED_RE.finditer(text))
+        innermost = student_frames[-1] if student_frames else None
+
+        return {
+            'exception': exception,
+            'message': message,
+            'line': int(innermost.group('line')) if innermost else None,
+            'function': innermost.group('func') if innermost else None,
+            'depth': depth
+        }
+
+    def categorize(self, exception: Optional[str], message: Optional[str]) -> Optional[str]:
+        """Map an exception class (refined by its message) to a mistake category."""
+        if message:
+            for pattern, category in MESSAGE_CATEGORIES:
+                if pattern.search(message):
+                    return category
+        return EXCEPTION_CATEGORIES.get(exception) if exception else None
+
+    def exception_from_message(self, message: Optional[str]) -> Optional[str]:
+        """Best-effort exception class for a bare error message."""
+        if not message:
+            return None
+        found = EXCEPTION_RE.match(message.strip().splitlines()[-1]) if message.strip() else None
+        if found and found.group('exc') in EXCEPTION_CATEGORIES:
+            return found.group('exc')
+        for pattern, exception in MESSAGE_EXCEPTIONS:
+            if pattern.search(message):
+                return exception
+        return None
+
+    def classify(self,
+                 test_results: List[Dict[str, Any]],
+                 error_message: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Aggregate error information across all failed tests.
+
+        Uses, per test, the traceback when present, otherwise the
+        ``error_type``/``error`` fields; the submission-level
+        ``error_message`` is used when no test carries an error.
+        """
+        parsed_cache: Dict[str, Dict[str, Any]] = {}
+        exceptions: Counter = Counter()
+        categories: Counter = Counter()
+        lines, functions = set(), set()
+        max_depth = 0
+        tests_with_errors = 0
+
+        for result in test_results or []:
+            if result.get('passed', False):
+                continue
+            traceback_text = result.get('traceback')
+            if traceback_text:
+                parsed = parsed_cache.get(traceback_text)
+                if parsed is None:
+                    parsed = parsed_cache[traceback_text] = self.parse_traceback(traceback_text)
+            else:
+                message = result.get('error')
+                exception = result.get('error_type') or self.exception_from_message(message)
+                if not exception:
+                    continue
+                parsed = {'exception': exception, 'message': message,
+                          'line': None, 'function': None, 'depth': 0}
+
+            if not parsed['exception']:
+                continue
+            tests_with_errors += 1
+            exceptions[parsed['exception']] += 1
+            category = self.categorize(parsed['exception'], parsed['message'] or result.get('error'))
+            if category:
+                categories[category] += 1
+            if parsed['line'] is not None:
+                lines.add(parsed['line'])
+            if parsed['function']:
+                functions.add(parsed['function'])
+            max_depth = max(max_depth, parsed['depth'])
+
+        if not exceptions and error_message:
+            exception = self.exception_from_message(error_message)
+            if exception:
+                exceptions[exception] += 1
+                category = self.categorize(exception, error_message)
+                if category:
+                    categories[category] += 1
+
+        return {
+            'exceptions': dict(exceptions),
+            'categories': dict(categories),
+            'primary_exception': exceptions.most_common(1)[0][0] if exceptions else None,
+            'primary_category': categories.most_common(1)[0][0] if categories else None,
+            'failing_lines': sorted(lines),
+            'failing_functions': sorted(functions),
+            'tests_with_errors': tests_with_errors,
+            'max_recursion_depth': max_depth
+        }
@@ -8,16 +8,146 @@ Implements pedagogical rules based on Polya's problem-solving strategy
 and common programming mistake patterns.
 """
 
+import os
 import re
+import hashlib
 import ast
 import json
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+from typing import Dict, List, Any, Optional, Tuple, Hashable
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+
+from metrics import observe_stage, record_cache_lookup
+from pattern_matcher import MultiPatternMatcher
+from error_classifier import ErrorClassifier
+from similarity_index import SimilarityIndex
+from feature_encoder import CODE_FEATURE_ENCODER
+from rule_catalog import RuleCatalog, SEVERITIES
 
 logger = logging.getLogger(__name__)
 
+# Builtins reported in ``uses_builtins``, in reporting order
+TRACKED_BUILTINS = ('sorted', 'min', 'max', 'sum', 'len', 'enumerate', 'range')
+
+
+class CodeFeatureVisitor(ast.NodeVisitor):
+    """
+    Collects structural code features in one traversal of the AST.
+
+    Recursion is detected by tracking the stack of enclosing function
+    names, so each node is visited exactly once.
+    """
+    
+    def __init__(self):
+        self.function_stack: List[str] = []
+        self.function_count = 0
+        self.loop_count = 0
+        self.comprehension_count = 0
+        self.conditional_count = 0
+        self.recursive_functions = set()
+        # Functions containing a return guarded by a condition
+        self.guarded_returns = set()
+        self.builtin_calls = set()
+        self.operators = defaultdict(int)
+        self.node_types = set()
+        self._condition_depth = 0
+    
+    # Per-class handler lookup; NodeVisitor.visit formats a method name per node
+    _handlers: Dict[type, Any] = {}
+    
+    def visit(self, node: ast.AST) -> None:
+        cls = type(node)
+        self.node_types.add(cls.__name__)
+        handler = self._handlers.get(cls)
+        if handler is None:
+            handler = getattr(type(self), 'visit_' + cls.__name__, CodeFeatureVisitor.generic_visit)
+            self._handlers[cls] = handler
+        handler(self, node)
+    
+    def generic_visit(self, node: ast.AST) -> None:
+        for child in ast.iter_child_nodes(node):
+            self.visit(child)
+    
+    def _visit_function(self, node) -> None:
+        self.function_count += 1
+        self.function_stack.append(node.name)
+        saved_depth, self._condition_depth = self._condition_depth, 0
+        self.generic_visit(node)
+        self._condition_depth = saved_depth
+        self.function_stack.pop()
+    
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+    
+    def _visit_loop(self, node) -> None:
+        self.loop_count += 1
+        self.generic_visit(node)
+    
+    visit_For = _visit_loop
+    visit_AsyncFor = _visit_loop
+    visit_While = _visit_loop
+    
+    def visit_comprehension(self, node: ast.comprehension) -> None:
+        self.comprehension_count += 1
+        self.generic_visit(node)
+    
+    def _visit_conditional(self, node) -> None:
+        self.conditional_count += 1
+        self._condition_depth += 1
+        self.generic_visit(node)
+        self._condition_depth -= 1
+    
+    visit_If = _visit_conditional
+    visit_IfExp = _visit_conditional
+    
+    def visit_Return(self, node: ast.Return) -> None:
+        # ``return 1 if n <= 1 else n * f(n - 1)`` carries its own guard
+        guarded = self._condition_depth or (
+            node.value is not None and any(isinstance(n, ast.IfExp) for n in ast.walk(node.value))
+        )
+        if guarded and self.function_stack:
+            self.guarded_returns.add(self.function_stack[-1])
+        self.generic_visit(node)
+    
+    def visit_Call(self, node: ast.Call) -> None:
+        if isinstance(node.func, ast.Name):
+            name = node.func.id
+            if name in self.function_stack:
+                self.recursive_functions.add(name)
+            if name in TRACKED_BUILTINS:
+                self.builtin_calls.add(name)
+        self.generic_visit(node)
+    
+    def _visit_operator(self, node) -> None:
+        ops = node.ops if isinstance(node, ast.Compare) else [node.op]
+        for op in ops:
+            self.operators[type(op).__name__] += 1
+        self.generic_visit(node)
+    
+    visit_BinOp = _visit_operator
+    visit_BoolOp = _visit_operator
+    visit_UnaryOp = _visit_operator
+    visit_AugAssign = _visit_operator
+    visit_Compare = _visit_operator
+    
+    def features(self) -> Dict[str, Any]:
+        """Feature values in the shape used by ``extract_code_features``."""
+        has_recursion = bool(self.recursive_functions)
+        return {
+            'has_functions': self.function_count > 0,
+            'has_loops': self.loop_count > 0 or self.comprehension_count > 0,
+            'has_conditionals': self.conditional_count > 0,
+            'has_recursion': has_recursion,
+            # Every recursive function needs a condition that returns
+            'has_base_case': has_recursion and self.recursive_functions <= self.guarded_returns,
+            'loop_count': self.loop_count,
+            'conditional_count': self.conditional_count,
+            'uses_builtins': [b for b in TRACKED_BUILTINS if b in self.builtin_calls],
+            'operators': dict(self.operators),
+        }
+
 
 class ExpertRulesEngine:
     """
@@ -31,12 +161,28 @@ class ExpertRulesEngine:
         self.rules_path = Path(rules_path)
         self.rules_path.mkdir(exist_ok=True)
         
-        self.rules = self._load_rules()
+        # External rules from rules/*.json, hot-reloaded on change
+        self.rule_catalog = RuleCatalog(
+            self.rules_path,
+            reload_interval=float(os.getenv("RULES_RELOAD_INTERVAL", "2"))
+        )
+        self.error_classifier = ErrorClassifier()
         self.feedback_count = 0
-        self.pattern_cache = {}
-        
-        # Common mistake patterns from research
-        self.mistake_patterns = {
+        # LRU memo of feedback payloads keyed by (feature fingerprint, profile bucket)
+        self.pattern_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.cache_capacity = int(os.getenv("FEEDBACK_CACHE_SIZE", "1024"))
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache_lock = threading.Lock()
+        
+        # Near-duplicate submissions reuse previously extracted features
+        self.similarity_index = SimilarityIndex(
+            capacity=int(os.getenv("SIMILARITY_INDEX_SIZE", "10000"))
+        )
+        self.reuse_threshold = float(os.getenv("SIMILARITY_REUSE_THRESHOLD", "0.95"))
+        
+        # Common mistake patterns from research (catalog files may add or override)
+        self.builtin_patterns = {
             'missing_base_case': {
                 'indicators': ['recursion without base', 'no termination', 'infinite loop'],
                 'feedback': 'Your recursive function needs a base case to prevent infinite recursion.',
@@ -83,58 +229,101 @@ class ExpertRulesEngine:
                 ]
             }
         }
+        self._sync_rule_catalog()
     
+    def _sync_rule_catalog(self) -> None:
+        """Rebuild pattern tables if the rule catalog was reloaded."""
+        self.rule_catalog.maybe_reload()
+        if getattr(self, '_catalog_version', None) == self.rule_catalog.version:
+            return
+        self.mistake_patterns = {**self.builtin_patterns, **self.rule_catalog.mistake_patterns}
+        # All indicators of all patterns are matched in one scan
+        self.indicator_matcher = MultiPatternMatcher(
+            {name: info['indicators'] for name, info in self.mistake_patterns.items()}
+        )
+        self._catalog_version = self.rule_catalog.version
+    
+    @observe_stage("extract_code_features")
     def extract_code_features(self,
                              code: str,
                              test_results: List[Dict[str, Any]],
-                             error_message: Optional[str] = None) -> Dict[str, Any]:
+                             error_message: Optional[str] = None,
+                             submission_id: Optional[Hashable] = None) -> Dict[str, Any]:
         """
         Extract features from code for rule matching.
         
+        Features of an earlier submission with the same code text and test
+        outcomes are reused (``reuse_threshold`` above 1 turns this off).
+        Near-duplicates are not enough: the signature ignores identifiers and
+        literals, but pattern indicators and rule regexes read the raw text.
+        
         Args:
             code: Student's submitted code
             test_results: Results from test execution
             error_message: Any error message from execution
+            submission_id: Adds the submission to the similarity index
             
         Returns:
             Dictionary of extracted features
         """
+        self._sync_rule_catalog()
+        signature = self.similarity_index.signature(code)
+        outcome = self._outcome_key(code, test_results, error_message)
+        if self.reuse_threshold <= 1.0:
+            match = self.similarity_index.find_reusable(signature, outcome, self.reuse_threshold)
+            if match is not None:
+                features = dict(match['payload'])
+                features['code_length'] = len(code)
+                features['line_count'] = code.count('\n') + 1
+                features['similar_to'] = {'submission_id': match['meta'].get('submission_id'),
+                                          'similarity': match['similarity']}
+                if submission_id is not None:
+                    self.index_submission(submission_id, code, test_results, error_message,
+                                          features, signature)
+                return features
+        
+        code_lower = code.lower()
+        error_lower = (error_message or '').lower()
+        
         features = {
             'code_length': len(code),
             'line_count': code.count('\n') + 1,
-            'has_functions': 'def ' in code,
-            'has_loops': 'for ' in code or 'while ' in code,
-            'has_conditionals': 'if ' in code,
+            'has_functions': False,
+            'has_loops': False,
+            'has_conditionals': False,
             'has_recursion': False,
             'has_base_case': False,
+            'loop_count': 0,
+            'conditional_count': 0,
             'uses_builtins': [],
+            'operators': {},
             'error_type': None,
             'failing_tests': 0,
             'success_rate': 0.0,
-            'detected_patterns': []
+            'detected_patterns': [],
+            'pattern_hits': {},
+            'rule_hits': [],
+            'error_analysis': {}
         }
         
-        # Analyze code structure
+        # Analyze code structure in a single AST pass
+        tree = None
+        node_types = set()
         try:
             tree = ast.parse(code)
-            
-            # Check for recursion
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    func_name = node.name
-                    for inner_node in ast.walk(node):
-                        if isinstance(inner_node, ast.Call):
-                            if (isinstance(inner_node.func, ast.Name) and
-                                inner_node.func.id == func_name):
-                                features['has_recursion'] = True
-                                break
-            
-            # Check for base case in recursive functions
-            if features['has_recursion']:
-                features['has_base_case'] = 'return' in code and ('if' in code or 'elif' in code)
-            
+            visitor = CodeFeatureVisitor()
+            visitor.visit(tree)
+            features.update(visitor.features())
+            node_types = visitor.node_types
         except SyntaxError:
             features['error_type'] = 'syntax_error'
+            # Unparseable code: fall back to lexical hints
+            features['has_functions'] = 'def ' in code
+            features['has_loops'] = 'for ' in code or 'while ' in code
+            features['has_conditionals'] = 'if ' in code
+            features['uses_builtins'] = [b for b in TRACKED_BUILTINS if b + '(' in code]
+        except RecursionError:
+            logger.warning("Submission nesting too deep for AST analysis")
         
         # Analyze test results
         if test_results:
@@ -142,22 +331,92 @@ class ExpertRulesEngine:
             features['failing_tests'] = failing
             features['success_rate'] = 1.0 - (failing / len(test_results))
         
-        # Check for built-in functions
-        builtins_used = []
-        for builtin in ['sorted', 'min', 'max', 'sum', 'len', 'enumerate', 'range']:
-            if builtin + '(' in code:
-                builtins_used.append(builtin)
-        features['uses_builtins'] = builtins_used
-        
-        # Detect mistake patterns
-        detected = []
-        for pattern_name, pattern_info in self.mistake_patterns.items():
-            if self._matches_pattern(code, error_message, pattern_info['indicators']):
-                detected.append(pattern_name)
-        features['detected_patterns'] = detected
+        # Classify runtime errors from tracebacks of the failed tests
+        error_analysis = self.error_classifier.classify(test_results, error_message)
+        features['error_analysis'] = error_analysis
+        if not features['error_type'] and error_analysis['primary_exception']:
+            features['error_type'] = error_analysis['primary_exception']
+        
+        # Detect mistake patterns; categories classified from errors rank first
+        pattern_hits = self.indicator_matcher.scan({'code': code_lower, 'error': error_lower})
+        classified = sorted(error_analysis['categories'].items(), key=lambda item: -item[1])
+        features['detected_patterns'] = [
+            name for name, _ in classified if name in self.mistake_patterns
+        ]
+        features['detected_patterns'] += [
+            name for name in self.mistake_patterns
+            if name in pattern_hits and name not in features['detected_patterns']
+        ]
+        features['pattern_hits'] = pattern_hits
+        
+        # Apply catalog rules triggered by this submission
+        error_types = set(error_analysis['exceptions'])
+        if features['error_type']:
+            error_types.add(features['error_type'])
+        rule_hits = self.rule_catalog.evaluate(code, code_lower, tree, node_types, error_types)
+        for hit in rule_hits:
+            pattern = hit['pattern']
+            if pattern in self.mistake_patterns and pattern not in features['detected_patterns']:
+                features['detected_patterns'].append(pattern)
+        features['rule_hits'] = rule_hits
+        
+        if submission_id is not None:
+            self.index_submission(submission_id, code, test_results, error_message, features, signature)
         
         return features
     
+    def _outcome_key(self,
+                     code: str,
+                     test_results: List[Dict[str, Any]],
+                     error_message: Optional[str]) -> Tuple:
+        """What must match for extracted features to be reused."""
+        return (
+            self._catalog_version,
+            hashlib.sha1(code.encode('utf-8', 'surrogatepass')).hexdigest(),
+            error_message,
+            tuple((t.get('passed', False), t.get('error_type')) for t in test_results or [])
+        )
+    
+    def index_submission(self,
+                         submission_id: Hashable,
+                         code: str,
+                         test_results: List[Dict[str, Any]],
+                         error_message: Optional[str],
+                         features: Dict[str, Any],
+                         signature=None) -> None:
+        """Add a submission and its extracted features to the similarity index."""
+        if signature is None:
+            signature = self.similarity_index.signature(code)
+        self.similarity_index.add(
+            submission_id,
+            signature,
+            outcome=self._outcome_key(code, test_results, error_message),
+            payload=features,
+            meta={
+                'submission_id': submission_id,
+                'failing_tests': features['failing_tests'],
+                'error_type': features.get('error_type'),
+                'detected_patterns': features['detected_patterns']
+            }
+        )
+    
+    def encode_features(self, features_list: List[Dict[str, Any]]):
+        """
+        Encode extracted features as a dense matrix (one row per submission).
+        
+        Column layout and version are given by ``CODE_FEATURE_ENCODER.describe()``.
+        """
+        return CODE_FEATURE_ENCODER.encode_batch(features_list)
+    
+    def find_similar(self,
+                     code: str,
+                     limit: int = 5,
+                     min_similarity: float = 0.5) -> List[Dict[str, Any]]:
+        """Previously indexed submissions most similar to ``code``."""
+        signature = self.similarity_index.signature(code)
+        matches = self.similarity_index.query(signature, limit=limit, min_similarity=min_similarity)
+        return [{**match['meta'], 'similarity': match['similarity']} for match in matches]
+    
     def generate_feedback(self,
                          features: Dict[str, Any],
                          user_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -169,10 +428,31 @@ class ExpertRulesEngine:
             user_profile: Optional user learning profile
             
         Returns:
-            Comprehensive feedback dictionary
+            Comprehensive feedback dictionary. Nested values are shared with
+            the feedback cache and must be treated as read-only.
         """
         self.feedback_count += 1
         
+        fingerprint = self._feature_fingerprint(features)
+        bucket = self._profile_bucket(user_profile)
+        
+        feedback = self._cache_get((fingerprint, bucket))
+        if feedback is None:
+            base = self._cache_get((fingerprint, None), record=False) if bucket is not None else None
+            if base is None:
+                base = self._build_feedback(features)
+                self._cache_put((fingerprint, None), base)
+            feedback = base
+            if bucket is not None:
+                # Copy-on-write: shares every part personalization leaves untouched
+                feedback = self._personalize_feedback(base, user_profile)
+                self._cache_put((fingerprint, bucket), feedback)
+        
+        # Callers may add top-level keys (e.g. cluster_insight)
+        return dict(feedback)
+    
+    def _build_feedback(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the unpersonalized feedback payload for a set of features."""
         feedback = {
             'primary_feedback': {},
             'hints': [],
@@ -195,7 +475,7 @@ class ExpertRulesEngine:
             feedback['hints'] = pattern_info.get('hints', [])
         
         # Apply Polya strategy guidance
-        polya_guidance = self._generate_polya_guidance(features, user_profile)
+        polya_guidance = self._generate_polya_guidance(features)
         feedback['polya_guidance'] = polya_guidance
         
         # Syntax error handling
@@ -211,6 +491,32 @@ class ExpertRulesEngine:
                 'Ensure colons after if/for/while/def statements'
             ]
         
+        # Catalog rule insights
+        rule_hits = features.get('rule_hits', [])
+        if rule_hits:
+            if not feedback['primary_feedback']:
+                top = max(rule_hits, key=lambda hit: SEVERITIES.index(hit['severity']))
+                feedback['primary_feedback'] = {
+                    'category': top['pattern'] or top['category'],
+                    'message': top['message'],
+                    'severity': top['severity']
+                }
+                feedback['hints'] = top['hints']
+            feedback['primary_feedback']['insights'] = [
+                {'rule': hit['id'], 'message': hit['message'],
+                 'severity': hit['severity'], 'line': hit['line']}
+                for hit in rule_hits
+            ]
+        
+        # Point at where the runtime error happened
+        error_analysis = features.get('error_analysis') or {}
+        if feedback['primary_feedback'] and error_analysis.get('primary_exception'):
+            feedback['primary_feedback']['error'] = {
+                'exception': error_analysis['primary_exception'],
+                'lines': error_analysis['failing_lines'],
+                'functions': error_analysis['failing_functions']
+            }
+        
         # Performance-based feedback
         if features['success_rate'] == 1.0:
             feedback['next_steps'] = [
@@ -236,24 +542,65 @@ class ExpertRulesEngine:
         else:
             feedback['confidence'] = 0.6
         
-        # Personalize based on user profile
-        if user_profile:
-            feedback = self._personalize_feedback(feedback, user_profile)
-        
         return feedback
     
-    def _matches_pattern(self, 
-                        code: str, 
-                        error_msg: Optional[str],
-                        indicators: List[str]) -> bool:
-        """Check if code matches a mistake pattern."""
-        code_lower = code.lower()
-        error_lower = (error_msg or '').lower()
+    def _feature_fingerprint(self, features: Dict[str, Any]) -> Tuple:
+        """
+        Canonical key of the features ``_build_feedback`` depends on.
         
-        for indicator in indicators:
-            if indicator.lower() in code_lower or indicator.lower() in error_lower:
-                return True
-        return False
+        Values only compared against thresholds are reduced to the
+        outcome of the comparison.
+        """
+        success_rate = features['success_rate']
+        error_analysis = features.get('error_analysis') or {}
+        return (
+            self._catalog_version,
+            tuple(features['detected_patterns']),
+            features['failing_tests'],
+            features.get('error_type'),
+            success_rate == 1.0,
+            success_rate < 0.5,
+            success_rate < 0.3,
+            not features['has_functions'] and features['line_count'] > 20,
+            tuple((hit['id'], hit['line']) for hit in features.get('rule_hits', ())),
+            error_analysis.get('primary_exception'),
+            tuple(error_analysis.get('failing_lines', ())),
+            tuple(error_analysis.get('failing_functions', ())),
+        )
+    
+    @staticmethod
+    def _profile_bucket(profile: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str, str]]:
+        """Discretize the profile fields used by ``_personalize_feedback``."""
+        if not profile:
+            return None
+        cognitive = profile.get('cognitive', {}).get('problem_solving_score', 50)
+        motivation = profile.get('motivational', {}).get('engagement_level', 50)
+        pace = profile.get('behavioral', {}).get('learning_pace', 'moderate')
+        return (
+            'low' if cognitive < 40 else 'high' if cognitive > 70 else 'mid',
+            'low' if motivation < 30 else 'high' if motivation > 70 else 'mid',
+            pace if pace in ('slow', 'fast') else 'moderate',
+        )
+    
+    def _cache_get(self, key: Tuple, record: bool = True) -> Optional[Dict[str, Any]]:
+        with self._cache_lock:
+            payload = self.pattern_cache.get(key)
+            if payload is not None:
+                self.pattern_cache.move_to_end(key)
+        if record:
+            if payload is not None:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+            record_cache_lookup("feedback", hit=payload is not None)
+        return payload
+    
+    def _cache_put(self, key: Tuple, payload: Dict[str, Any]) -> None:
+        with self._cache_lock:
+            self.pattern_cache[key] = payload
+            self.pattern_cache.move_to_end(key)
+            while len(self.pattern_cache) > self.cache_capacity:
+                self.pattern_cache.popitem(last=False)
     
     def _generate_polya_guidance(self,
                                 features: Dict[str, Any],
@@ -340,20 +687,27 @@ class ExpertRulesEngine:
     def _personalize_feedback(self,
                              feedback: Dict[str, Any],
                              profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Personalize feedback based on user profile."""
+        """
+        Personalize feedback based on user profile.
+        
+        Returns a new top-level dict; nested values that change are
+        replaced rather than mutated, so ``feedback`` stays intact.
+        """
+        feedback = dict(feedback)
+        
         # Adjust based on cognitive level
         cognitive = profile.get('cognitive', {}).get('problem_solving_score', 50)
         
         if cognitive < 40:
             # Simplify for struggling students
             feedback['hints'] = feedback['hints'][:2]  # Fewer hints
-            feedback['primary_feedback']['message'] = (
-                feedback['primary_feedback'].get('message', '') + 
-                " Let's take it step by step."
-            )
+            feedback['primary_feedback'] = {
+                **feedback['primary_feedback'],
+                'message': feedback['primary_feedback'].get('message', '') + " Let's take it step by step."
+            }
         elif cognitive > 70:
             # Challenge advanced students
-            feedback['next_steps'].append('Can you solve this with a different approach?')
+            feedback['next_steps'] = feedback['next_steps'] + ['Can you solve this with a different approach?']
         
         # Adjust based on motivation
         motivation = profile.get('motivational', {}).get('engagement_level', 50)
@@ -384,33 +738,6 @@ class ExpertRulesEngine:
         
         return feedback
     
-    def _load_rules(self) -> Dict[str, Any]:
-        """Load expert rules from configuration."""
-        rules_file = self.rules_path / "expert_rules.json"
-        
-        if rules_file.exists():
-            try:
-                with open(rules_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Failed to load rules: {str(e)}")
-        
-        # Return default rules
-        return {
-            'syntax_rules': {
-                'missing_colon': {
-                    'pattern': r'(if|while|for|def|class)\s+[^:]+$',
-                    'message': 'Missing colon after control statement'
-                }
-            },
-            'logic_rules': {
-                'infinite_loop': {
-                    'pattern': r'while\s+True|while\s+1',
-                    'message': 'Potential infinite loop detected'
-                }
-            }
-        }
-    
     def apply_custom_rules(self, code: str) -> List[Dict[str, str]]:
         """
         Apply custom expert rules for additional insights.
@@ -445,9 +772,17 @@ class ExpertRulesEngine:
         """Get expert rules engine statistics."""
         return {
             "feedback_generated": self.feedback_count,
-            "rules_loaded": len(self.rules),
+            "rules_loaded": len(self.rule_catalog.rules),
+            "rule_catalog": self.rule_catalog.get_stats(),
+            "similarity_index": self.similarity_index.get_stats(),
+            "feature_schema": {"version": CODE_FEATURE_ENCODER.version, "width": CODE_FEATURE_ENCODER.width},
             "patterns_defined": len(self.mistake_patterns),
-            "cache_size": len(self.pattern_cache)
+            "cache_size": len(self.pattern_cache),
+            "cache_capacity": self.cache_capacity,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": (self.cache_hits / (self.cache_hits + self.cache_misses)
+                               if self.cache_hits + self.cache_misses else 0.0)
         }
     
     def health_check(self) -> bool:
@@ -459,4 +794,20 @@ class ExpertRulesEngine:
             feedback = self.generate_feedback(features)
             return 'primary_feedback' in feedback and 'hints' in feedback
         except:
-            return False
\ No newline at end of file
+            return False
+
+# Process-pool workers for batch feature extraction (see /recommend/batch)
+_worker_engine: Optional[ExpertRulesEngine] = None
+
+
+def init_batch_worker(rules_path: str) -> None:
+    """Pool initializer: build one engine per worker process."""
+    global _worker_engine
+    _worker_engine = ExpertRulesEngine(rules_path=rules_path)
+
+
+def extract_features_job(code: str,
+                         test_results: List[Dict[str, Any]],
+                         error_message: Optional[str] = None) -> Dict[str, Any]:
+    """Extract code features inside a pool worker."""
+    return _worker_engine.extract_code_features(code, test_results, error_message)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Feature Encoder
+===============
+Fixed-schema encoding of feature dictionaries into dense NumPy arrays.
+
+A schema lists every column once, in order; one submission encodes to a
+row and a batch to a preallocated matrix, so clustering and any learned
+model work on contiguous arrays instead of looking fields up by name.
+Vocabularies are part of the schema rather than derived from the code
+that produces the features: changing a column changes ``version``, and
+arrays of different versions must not be mixed.
+"""
+
+import math
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _lookup(features: Dict[str, Any], key: str, default: Any = None) -> Any:
+    """Dotted-key lookup (``error_analysis.max_recursion_depth``)."""
+    value = features
+    for part in key.split('.'):
+        if not isinstance(value, dict):
+            return default
+        value = value.get(part)
+        if value is None:
+            return default
+    return value
+
+
+class FeatureEncoder:
+    """
+    Encodes feature dictionaries with a fixed column layout.
+
+    Column groups, in order:
+        numeric:     ``(key, default, scale)`` -> ``value / scale``
+        log_numeric: ``key`` -> ``log1p(value)``
+        flags:       ``key`` -> 1.0 if truthy
+        lengths:     ``key`` -> ``len(value)``
+        categorical: ``key -> vocabulary`` one-hot, plus an ``other`` column
+        multi_hot:   ``key -> vocabulary`` for list values
+        counts:      ``key -> vocabulary`` ``log1p(count)`` for dict values
+    """
+
+    def __init__(self,
+                 version: int,
+                 numeric: Sequence[Tuple[str, float, float]] = (),
+                 log_numeric: Sequence[str] = (),
+                 flags: Sequence[str] = (),
+                 lengths: Sequence[str] = (),
+                 categorical: Optional[Dict[str, Sequence[str]]] = None,
+                 multi_hot: Optional[Dict[str, Sequence[str]]] = None,
+                 counts: Optional[Dict[str, Sequence[str]]] = None,
+                 dtype=np.float32):
+        self.version = version
+        self.dtype = np.dtype(dtype)
+        self.numeric = [(key, float(default), float(scale)) for key, default, scale in numeric]
+        self.log_numeric = list(log_numeric)
+        self.flags = list(flags)
+        self.lengths = list(lengths)
+        self.categorical = {key: {v: i for i, v in enumerate(vocab)} for key, vocab in (categorical or {}).items()}
+        self.multi_hot = {key: {v: i for i, v in enumerate(vocab)} for key, vocab in (multi_hot or {}).items()}
+        self.counts = {key: {v: i for i, v in enumerate(vocab)} for key, vocab in (counts or {}).items()}
+
+        names = [key for key, _, _ in self.numeric]
+        names += self.log_numeric + self.flags + [f"{key}.count" for key in self.lengths]
+        for key, vocab in self.categorical.items():
+            names += [f"{key}={value}" for value in vocab] + [f"{key}=other"]
+        for group in (self.multi_hot, self.counts):
+            for key, vocab in group.items():
+                names += [f"{key}:{value}" for value in vocab]
+        self.column_names: List[str] = names
+        self.width = len(names)
+        self.columns = {name: i for i, name in enumerate(names)}
+
+    def encode_into(self, features: Dict[str, Any], row: np.ndarray) -> None:
+        """Write the encoding of ``features`` into a zeroed row."""
+        i = 0
+        for key, default, scale in self.numeric:
+            value = _lookup(features, key, default)
+            row[i] = float(value) / scale
+            i += 1
+        for key in self.log_numeric:
+            row[i] = math.log1p(max(float(_lookup(features, key, 0)), 0.0))
+            i += 1
+        for key in self.flags:
+            row[i] = 1.0 if _lookup(features, key) else 0.0
+            i += 1
+        for key in self.lengths:
+            row[i] = len(_lookup(features, key, ()))
+            i += 1
+        for key, vocab in self.categorical.items():
+            value = _lookup(features, key)
+            if value is not None:
+                row[i + vocab.get(value, len(vocab))] = 1.0
+            i += len(vocab) + 1
+        for key, vocab in self.multi_hot.items():
+            for value in _lookup(features, key, ()):
+                position = vocab.get(value)
+                if position is not None:
+                    row[i + position] = 1.0
+            i += len(vocab)
+        for key, vocab in self.counts.items():
+            for value, count in _lookup(features, key, {}).items():
+                position = vocab.get(value)
+                if position is not None:
+                    row[i + position] = math.log1p(count)
+            i += len(vocab)
+
+    def encode(self, features: Dict[str, Any]) -> np.ndarray:
+        """Encode one feature dictionary as a row vector."""
+        row = np.zeros(self.width, dtype=self.dtype)
+        self.encode_into(features, row)
+        return row
+
+    def encode_batch(self, features_list: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Encode many feature dictionaries into one C-contiguous matrix."""
+        matrix = np.zeros((len(features_list), self.width), dtype=self.dtype)
+        for features, row in zip(features_list, matrix):
+            self.encode_into(features, row)
+        return matrix
+
+    def describe(self) -> Dict[str, Any]:
+        """Schema description for clients and stored arrays."""
+        return {
+            'version': self.version,
+            'width': self.width,
+            'dtype': self.dtype.name,
+            'columns': self.column_names
+        }
+
+
+# Output of ExpertRulesEngine.extract_code_features
+CODE_FEATURE_ENCODER = FeatureEncoder(
+    version=1,
+    numeric=[
+        ('success_rate', 0.0, 1.0),
+        ('loop_count', 0.0, 1.0),
+        ('conditional_count', 0.0, 1.0),
+        ('failing_tests', 0.0, 1.0),
+        ('error_analysis.tests_with_errors', 0.0, 1.0),
+    ],
+    log_numeric=['code_length', 'line_count', 'error_analysis.max_recursion_depth'],
+    flags=['has_functions', 'has_loops', 'has_conditionals', 'has_recursion', 'has_base_case'],
+    lengths=['rule_hits'],
+    categorical={
+        'error_type': ['syntax_error', 'RecursionError', 'IndexError', 'TypeError', 'NameError',
+                       'ValueError', 'KeyError', 'ZeroDivisionError', 'AttributeError', 'TimeoutError'],
+        'error_analysis.primary_category': ['missing_base_case', 'off_by_one', 'infinite_loop',
+                                            'missing_key', 'division_by_zero', 'undefined_name',
+                                            'type_mismatch', 'missing_return', 'invalid_value'],
+    },
+    multi_hot={
+        'detected_patterns': ['missing_base_case', 'off_by_one', 'wrong_operator', 'returns_constant',
+                              'uses_builtin_incorrectly', 'infinite_loop'],
+        'uses_builtins': ['sorted', 'min', 'max', 'sum', 'len', 'enumerate', 'range'],
+    },
+    counts={
+        'operators': ['Add', 'Sub', 'Mult', 'Div', 'FloorDiv', 'Mod', 'Pow', 'Eq', 'NotEq',
+                      'Lt', 'LtE', 'Gt', 'GtE', 'In', 'NotIn', 'Is', 'IsNot'],
+    },
+)
+
+# Student profile features used by ClusteringService; float64 to match the
+# fitted scaler and KMeans centers
+CLUSTER_FEATURE_ENCODER = FeatureEncoder(
+    version=1,
+    numeric=[
+        ('cognitive_score', 50.0, 100.0),    # Normalize to 0-1
+        ('behavioral_score', 50.0, 100.0),
+        ('motivational_score', 50.0, 100.0),
+        ('success_rate', 0.5, 1.0),
+        ('avg_time', 300.0, 600.0),          # Normalize assuming max 600 seconds
+        ('attempts_count', 1.0, 10.0),       # Normalize assuming max 10 attempts
+    ],
+    dtype=np.float64,
+)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Feature Upload
+==============
+Streaming parsers for large clustering uploads.
+
+``/cluster`` takes its samples as a JSON list of dictionaries, which for
+hundreds of thousands of learners means the whole document, a Python
+object per value and a float64 copy all live at once. The upload path
+parses the request body chunk by chunk instead, writing each row straight
+into a float32 matrix in the ``CLUSTER_FEATURE_ENCODER`` layout:
+
+    application/x-ndjson      one JSON object per line, keyed by feature name
+                              (or a JSON array per line, ordered by ``columns``)
+    text/csv                  header line of feature names, or ``columns``
+    application/octet-stream  little-endian float32 rows, ordered by ``columns``
+
+Columns are matched to features by name; names outside the schema are
+ignored, and features a row does not provide (or sends as NaN / an empty
+CSV field) get the encoder default. Values are scaled like
+``FeatureEncoder.numeric`` so uploads and the JSON path land in the same
+space as the recommendations that are later predicted against the model.
+"""
+
+import io
+import json
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from feature_encoder import FeatureEncoder, CLUSTER_FEATURE_ENCODER
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_MEDIA_TYPES = ("text/csv", "application/csv")
+BINARY_MEDIA_TYPES = ("application/octet-stream",)
+
+BINARY_DTYPE = np.dtype("<f4")
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+class FeatureUploadError(ValueError):
+    """Raised for uploads that cannot be parsed; ``status_code`` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_columns(columns: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated ``columns`` query parameter as a list (``-`` or an empty name skips a column)."""
+    if not columns:
+        return None
+    return [name.strip() for name in columns.split(",")]
+
+
+class FeatureMatrixBuilder:
+    """
+    Growable float32 matrix in an encoder's numeric column layout.
+
+    Rows are appended in blocks; capacity doubles when exhausted (or is
+    reserved up front when the row count is known), so filling ``n`` rows
+    costs amortized O(n) copying and never more than twice the final size.
+    """
+
+    def __init__(self,
+                 encoder: FeatureEncoder = CLUSTER_FEATURE_ENCODER,
+                 capacity: int = 4096,
+                 max_rows: Optional[int] = None,
+                 dtype=np.float32):
+        if not encoder.numeric or encoder.width != len(encoder.numeric):
+            raise ValueError("FeatureMatrixBuilder needs an encoder with numeric columns only")
+        self.dtype = np.dtype(dtype)
+        self.width = encoder.width
+        self.columns = dict(encoder.columns)
+        self.scales = np.array([scale for _, _, scale in encoder.numeric], dtype=self.dtype)
+        self.defaults = np.array([default / scale for _, default, scale in encoder.numeric], dtype=self.dtype)
+        self.max_rows = max_rows
+        self.matrix = np.empty((max(capacity, 1), self.width), dtype=self.dtype)
+        self.rows = 0
+
+    def reserve(self, rows: int) -> None:
+        """Make room for ``rows`` more rows."""
+        needed = self.rows + rows
+        if self.max_rows is not None and needed > self.max_rows:
+            raise FeatureUploadError(f"Upload exceeds the limit of {self.max_rows} rows", status_code=413)
+        if needed > len(self.matrix):
+            capacity = max(needed, 2 * len(self.matrix))
+            if self.max_rows is not None:
+                capacity = min(capacity, self.max_rows)
+            grown = np.empty((capacity, self.width), dtype=self.dtype)
+            grown[:self.rows] = self.matrix[:self.rows]
+            self.matrix = grown
+
+    def block(self, rows: int) -> np.ndarray:
+        """NaN-filled view of the next ``rows`` rows, for the caller to write raw values into."""
+        self.reserve(rows)
+        block = self.matrix[self.rows:self.rows + rows]
+        block.fill(np.nan)
+        return block
+
+    def commit(self, block: np.ndarray) -> None:
+        """Scale a filled block in place, default its missing values and append it."""
+        np.divide(block, self.scales, out=block)
+        np.copyto(block, self.defaults, where=np.isnan(block))
+        self.rows += len(block)
+
+    def result(self) -> np.ndarray:
+        """The filled rows (a view: no copy of the matrix is made)."""
+        return self.matrix[:self.rows]
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+
+class _UploadParser:
+    """Incremental parser: ``feed`` body chunks, then ``close``."""
+
+    def __init__(self, builder: FeatureMatrixBuilder, columns: Optional[Sequence[str]] = None):
+        self.builder = builder
+        self.buffer = b""
+        self.bytes_read = 0
+        self.lines = 0
+        self.ignored_columns: List[str] = []
+        self.positions = self._map_columns(columns) if columns is not None else None
+
+    def _map_columns(self, names: Sequence[str]) -> List[int]:
+        """Target feature index per source column (-1: not a feature)."""
+        positions = []
+        for name in names:
+            position = self.builder.columns.get(name, -1) if name not in ("", "-") else -1
+            if position < 0 and name not in ("", "-"):
+                self.ignored_columns.append(name)
+            positions.append(position)
+        if not any(position >= 0 for position in positions):
+            raise FeatureUploadError(
+                f"No known feature columns in {list(names)}; expected some of {list(self.builder.columns)}"
+            )
+        return positions
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_read += len(chunk)
+        data = self.buffer + chunk
+        end = data.rfind(b"\n") + 1
+        self.buffer = data[end:]
+        if end:
+            self._parse_lines(data[:end].splitlines())
+
+    def close(self) -> np.ndarray:
+        if self.buffer.strip():
+            self._parse_lines([self.buffer])
+        self.buffer = b""
+        return self.builder.result()
+
+    def _parse_lines(self, lines: List[bytes]) -> None:
+        raise NotImplementedError
+
+
+class NDJSONUploadParser(_UploadParser):
+    """One JSON object (or array, with ``columns``) per line."""
+
+    def _parse_lines(self, lines: List[bytes]) -> None:
+        lines = [line for line in lines if line.strip()]
+        block = self.builder.block(len(lines))
+        columns = self.builder.columns
+        for row, line in zip(block, lines):
+            self.lines += 1
+            try:
+                record = _loads(line)
+                if isinstance(record, dict):
+                    for name, value in record.items():
+                        position = columns.get(name)
+                        if position is not None and value is not None:
+                            row[position] = value
+                elif isinstance(record, list) and self.positions is not None:
+                    for position, value in zip(self.positions, record):
+                        if position >= 0 and value is not None:
+                            row[position] = value
+                else:
+                    raise ValueError("expected an object, or an array with the columns parameter")
+            except (ValueError, TypeError) as e:
+                raise FeatureUploadError(f"Line {self.lines}: {e}")
+        self.builder.commit(block)
+
+
+class CSVUploadParser(_UploadParser):
+    """Comma-separated rows; the first line names the columns unless ``columns`` is given."""
+
+    def _parse_lines(self, lines: List[bytes]) -> None:
+        if self.positions is None:
+            self.lines += 1
+            self.positions = self._map_columns(lines[0].decode("utf-8-sig").strip().split(","))
+            lines = lines[1:]
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            return
+        block = self.builder.block(len(lines))
+        used = [(source, target) for source, target in enumerate(self.positions) if target >= 0]
+        try:
+            # C parser for the common case: every field present and numeric
+            values = np.loadtxt(io.BytesIO(b"\n".join(lines)), delimiter=",", dtype=self.builder.dtype,
+                                ndmin=2, usecols=[source for source, _ in used])
+            if values.shape[0] != len(lines):
+                raise ValueError("row count mismatch")
+            for i, (_, target) in enumerate(used):
+                block[:, target] = values[:, i]
+        except ValueError:
+            self._parse_slow(lines, block, used)
+        self.lines += len(lines)
+        self.builder.commit(block)
+
+    def _parse_slow(self, lines: List[bytes], block: np.ndarray, used) -> None:
+        """Field by field, allowing empty fields and reporting the offending line."""
+        for offset, (row, line) in enumerate(zip(block, lines), start=1):
+            fields = line.decode("utf-8").split(",")
+            try:
+                for source, target in used:
+                    field = fields[source].strip() if source < len(fields) else ""
+                    if field:
+                        row[target] = float(field)
+            except ValueError as e:
+                raise FeatureUploadError(f"Line {self.lines + offset}: {e}")
+
+
+class BinaryUploadParser(_UploadParser):
+    """Raw little-endian float32 rows of ``len(columns)`` values each."""
+
+    def __init__(self, builder: FeatureMatrixBuilder, columns: Optional[Sequence[str]] = None,
+                 content_length: Optional[int] = None):
+        if not columns:
+            raise FeatureUploadError("Binary uploads need the columns parameter")
+        super().__init__(builder, columns)
+        self.row_bytes = BINARY_DTYPE.itemsize * len(columns)
+        if content_length:
+            if content_length % self.row_bytes:
+                raise FeatureUploadError(
+                    f"Body of {content_length} bytes is not a whole number of {len(columns)}-column float32 rows"
+                )
+            builder.reserve(content_length // self.row_bytes)
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_read += len(chunk)
+        data = self.buffer + chunk if self.buffer else chunk
+        end = len(data) - len(data) % self.row_bytes
+        self.buffer = data[end:]
+        if end:
+            values = np.frombuffer(data, dtype=BINARY_DTYPE, count=end // BINARY_DTYPE.itemsize)
+            values = values.reshape(-1, len(self.positions))
+            block = self.builder.block(len(values))
+            for source, target in enumerate(self.positions):
+                if target >= 0:
+                    block[:, target] = values[:, source]
+            self.lines += len(values)
+            self.builder.commit(block)
+
+    def close(self) -> np.ndarray:
+        if self.buffer:
+            raise FeatureUploadError(f"Body ends with a partial row ({len(self.buffer)} bytes)")
+        return self.builder.result()
+
+
+def create_parser(content_type: Optional[str],
+                  builder: FeatureMatrixBuilder,
+                  columns: Optional[Sequence[str]] = None,
+                  content_length: Optional[int] = None) -> _UploadParser:
+    """Parser for a request ``Content-Type``."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in NDJSON_MEDIA_TYPES:
+        return NDJSONUploadParser(builder, columns)
+    if media_type in CSV_MEDIA_TYPES:
+        return CSVUploadParser(builder, columns)
+    if media_type in BINARY_MEDIA_TYPES:
+        return BinaryUploadParser(builder, columns, content_length)
+    supported = NDJSON_MEDIA_TYPES[:1] + CSV_MEDIA_TYPES[:1] + BINARY_MEDIA_TYPES
+    raise FeatureUploadError(f"Unsupported upload type {media_type or 'none'!r}; use one of {list(supported)}",
+                             status_code=415)
+
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Health Monitor
+==============
+Background deep health checks with cached results.
+
+The service ``health_check`` methods are expensive (a full sandboxed
+evaluation, a KMeans fit), so they run on a fixed interval in a worker
+thread and probes only read the cached snapshot. Checks run with stage
+and cache metrics suppressed, so they never show up as request traffic;
+services with per-request state of their own (the evaluator's stats and
+test history, the expert rules' feedback cache and similarity index)
+should be given a dedicated instance to probe.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Tuple, Optional
+
+from metrics import suppress_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Runs service health checks periodically and caches their outcome.
+
+    ``/livez`` never touches this class; ``/readyz`` and ``/health`` serve
+    the last snapshot so probe traffic costs nothing on the request path.
+    """
+
+    def __init__(self,
+                 services: List[Tuple[str, Any]],
+                 interval: float = 60.0,
+                 stale_after: Optional[float] = None):
+        self.services = services
+        self.interval = interval
+        # A snapshot older than this is reported as not ready
+        self.stale_after = stale_after if stale_after is not None else interval * 3
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.last_run: Optional[float] = None
+        self.check_count = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def run_checks(self) -> Dict[str, Dict[str, Any]]:
+        """Run every deep health check once and cache the results."""
+        results = {}
+
+        for service_name, service in self.services:
+            started = time.perf_counter()
+            try:
+                with suppress_metrics():
+                    healthy = bool(service.health_check()) if service is not None else False
+                error = None if service is not None else "service not initialized"
+            except Exception as e:
+                logger.error(f"Health check failed for {service_name}: {e}")
+                healthy = False
+                error = str(e)
+
+            results[service_name] = {
+                "healthy": healthy,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "checked_at": datetime.now().isoformat(),
+                "error": error
+            }
+
+        self.results = results
+        self.last_run = time.time()
+        self.check_count += 1
+        return results
+
+    async def start(self) -> None:
+        """Start the background check loop on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        """Cancel the background check loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # Checks are blocking; keep them off the event loop
+                await loop.run_in_executor(None, self.run_checks)
+            except Exception as e:
+                logger.error(f"Background health check failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the cached health status without running any check."""
+        age = time.time() - self.last_run if self.last_run is not None else None
+
+        if age is None:
+            status = "starting"
+        elif age > self.stale_after:
+            status = "stale"
+        elif all(r["healthy"] for r in self.results.values()):
+            status = "healthy"
+        else:
+            status = "degraded"
+
+        return {
+            "overall": status,
+            "services": {name: r["healthy"] for name, r in self.results.items()},
+            "checks": self.results,
+            "last_checked": (datetime.fromtimestamp(self.last_run).isoformat()
+                             if self.last_run is not None else None),
+            "age_seconds": round(age, 3) if age is not None else None,
+            "interval_seconds": self.interval,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def is_ready(self) -> bool:
+        """Whether the cached snapshot is fresh and every service passed."""
+        return self.snapshot()["overall"] == "healthy"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get health monitor statistics."""
+        return {
+            "checks_run": self.check_count,
+            "interval_seconds": self.interval,
+            "last_run": self.last_run
+        }
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Instruction Meter
+=================
+Deterministic execution cost: counts the bytecode instructions executed
+by a submission's own code objects.
+
+Wall time depends on load, the machine and everything else running in
+the container; the number of instructions a function executes for a
+given input does not. Only code objects compiled from the submission are
+instrumented, so builtins and service code run at full speed.
+
+On Python 3.12+ ``sys.monitoring`` INSTRUCTION events are enabled locally
+on those code objects. Older interpreters fall back to a thread-local
+``sys.settrace`` hook with opcode tracing turned on only for frames of
+the submission.
+"""
+
+import sys
+import threading
+from types import CodeType
+from typing import Dict, Optional, Set
+
+
+class InstructionBudgetExceeded(RuntimeError):
+    """Raised inside the submission when it exceeds its instruction budget."""
+    pass
+
+
+def collect_code_objects(code: CodeType) -> Set[CodeType]:
+    """``code`` and every function, class body and comprehension nested in it."""
+    found = {code}
+    stack = [code]
+    while stack:
+        for const in stack.pop().co_consts:
+            if isinstance(const, CodeType) and const not in found:
+                found.add(const)
+                stack.append(const)
+    return found
+
+
+_monitoring = getattr(sys, "monitoring", None)
+_tool_id: Optional[int] = None
+_meters_by_code: Dict[CodeType, "InstructionMeter"] = {}
+_registry_lock = threading.Lock()
+
+
+def _on_instruction(code: CodeType, offset: int):
+    meter = _meters_by_code.get(code)
+    if meter is not None:
+        meter._tick()
+
+
+def _ensure_tool() -> Optional[int]:
+    """Claim a free sys.monitoring tool id (once per process)."""
+    global _tool_id
+    if _tool_id is None:
+        for tool_id in (4, 3):
+            if _monitoring.get_tool(tool_id) is None:
+                _monitoring.use_tool_id(tool_id, "learner-instruction-meter")
+                _monitoring.register_callback(tool_id, _monitoring.events.INSTRUCTION, _on_instruction)
+                _tool_id = tool_id
+                break
+    return _tool_id
+
+
+class InstructionMeter:
+    """
+    Context manager counting instructions executed in ``codes``.
+
+    With ``limit`` set, ``InstructionBudgetExceeded`` is raised inside the
+    submission as soon as the count goes over it, and again on exit if the
+    submission swallowed it. A trace function that raises is uninstalled
+    by the interpreter, so on the settrace fallback a submission that
+    catches the exception and keeps looping is only stopped by the
+    caller's time limit.
+    """
+
+    def __init__(self, codes: Set[CodeType], limit: Optional[int] = None):
+        self.codes = codes
+        self.limit = limit
+        self.count = 0
+        self.exceeded = False
+        self._threshold = limit if limit is not None else float("inf")
+        self._previous_trace = None
+        self._use_monitoring = _monitoring is not None
+
+    def _tick(self) -> None:
+        self.count += 1
+        if self.count > self._threshold:
+            self._over_budget()
+
+    def _over_budget(self) -> None:
+        self.exceeded = True
+        raise InstructionBudgetExceeded(f"Instruction budget of {self.limit} exceeded")
+
+    # sys.settrace fallback
+
+    def _global_trace(self, frame, event, arg):
+        if frame.f_code in self.codes:
+            frame.f_trace_opcodes = True
+            frame.f_trace_lines = False
+            return self._local_trace
+        return None
+
+    def _local_trace(self, frame, event, arg):
+        # Called for every opcode: kept to the bare minimum
+        if event == "opcode":
+            self.count += 1
+            if self.count > self._threshold:
+                self._over_budget()
+        return self._local_trace
+
+    def __enter__(self) -> "InstructionMeter":
+        if self._use_monitoring:
+            with _registry_lock:
+                tool_id = _ensure_tool()
+                if tool_id is None:
+                    self._use_monitoring = False
+                else:
+                    for code in self.codes:
+                        _meters_by_code[code] = self
+                        _monitoring.set_local_events(tool_id, code, _monitoring.events.INSTRUCTION)
+        if not self._use_monitoring:
+            self._previous_trace = sys.gettrace()
+            sys.settrace(self._global_trace)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self._use_monitoring:
+            with _registry_lock:
+                for code in self.codes:
+                    _monitoring.set_local_events(_tool_id, code, 0)
+                    _meters_by_code.pop(code, None)
+        else:
+            sys.settrace(self._previous_trace)
+        if self.exceeded and exc_type is None:
+            raise InstructionBudgetExceeded(f"Instruction budget of {self.limit} exceeded")
+        return False
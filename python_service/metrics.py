@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Metrics Module
+==============
+Prometheus-style counters, gauges and latency histograms.
+
+Each uvicorn worker keeps its own registry in memory and periodically
+writes a snapshot to a shared directory; ``/metrics`` merges the
+snapshots of all live workers so a scrape of any worker sees totals
+for the whole container. Counters and histograms of workers that have
+exited are folded into an archive snapshot, so container totals never
+go backwards when uvicorn recycles a worker.
+"""
+
+import os
+import json
+import atexit
+import time
+import tempfile
+import threading
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Totals of exited workers (counters and histograms; their gauges are dropped)
+ARCHIVE_FILE = "metrics_archive.json"
+
+# Set while background probes run so they do not skew request metrics
+_suppressed: ContextVar[bool] = ContextVar("metrics_suppressed", default=False)
+
+# Latency buckets in seconds, from sub-millisecond parsing to slow exec
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    """Base class holding per-label-set values."""
+
+    type_name = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str,
+                 labelnames: Tuple[str, ...] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": self.type_name,
+            "help": self.help,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(k), v] for k, v in self.values.items()]
+        }
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+        self.registry.maybe_flush()
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (in-flight requests, queue depth)."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = float(value)
+        self.registry.maybe_flush()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+        self.registry.maybe_flush()
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    type_name = "histogram"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str,
+                 labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self.registry.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self.values[key] = entry
+            # Stored non-cumulative; rendered cumulative
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][i] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+        self.registry.maybe_flush()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+class MetricsRegistry:
+    """
+    Process-local metric registry with shared-directory aggregation.
+
+    Snapshots are written at most every ``flush_interval`` seconds, so
+    observing a value costs a dict update and a lock. A background thread
+    writes whatever changed since the last snapshot once the interval has
+    passed, and ``close`` writes the final values, so updates made just
+    before a worker goes idle or exits still reach the other workers.
+    """
+
+    def __init__(self,
+                 multiproc_dir: Optional[str] = None,
+                 flush_interval: float = 1.0):
+        self.metrics: Dict[str, _Metric] = {}
+        self.lock = threading.Lock()
+        self.flush_interval = flush_interval
+        self.multiproc_dir = Path(
+            multiproc_dir or os.getenv("METRICS_MULTIPROC_DIR")
+            or os.path.join(tempfile.gettempdir(), "learner_metrics")
+        )
+        self._last_flush = 0.0
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid: Optional[int] = None
+        self._stop = threading.Event()
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self, name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(self, name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help_text, labelnames, buckets))
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self.metrics:
+            return self.metrics[metric.name]
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable copy of this process's metric values."""
+        with self.lock:
+            return {name: json.loads(json.dumps(m.to_dict())) for name, m in self.metrics.items()}
+
+    # ------------------------------------------------------------------
+    # Multi-process aggregation
+    # ------------------------------------------------------------------
+
+    def maybe_flush(self) -> None:
+        """Write this worker's snapshot if the flush interval elapsed (else leave it to the flusher)."""
+        self._dirty = True
+        if self._flusher_pid != os.getpid():
+            self._start_flusher()
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _start_flusher(self) -> None:
+        # Threads do not survive fork: each worker process starts its own
+        with self.lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._stop = threading.Event()
+            self._flusher = threading.Thread(target=self._run_flusher, name="metrics-flusher", daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            if self._dirty:
+                self.flush()
+
+    def close(self) -> None:
+        """Stop the background flusher and write the final snapshot."""
+        if self._flusher_pid != os.getpid():
+            return
+        self._stop.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=self.flush_interval + 1)
+        self._flusher_pid = None
+        if self._dirty:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write this worker's snapshot to the shared directory."""
+        self._last_flush = time.monotonic()
+        self._dirty = False
+        try:
+            self.multiproc_dir.mkdir(parents=True, exist_ok=True)
+            target = self.multiproc_dir / f"metrics_{os.getpid()}.json"
+            tmp = self.multiproc_dir / f"metrics_{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp, target)
+        except Exception as e:
+            logger.warning(f"Failed to flush metrics: {e}")
+
+    def collect(self) -> Dict[str, Any]:
+        """Merge the snapshots of every live worker process and the archive of exited ones."""
+        self.flush()
+        merged: Dict[str, Any] = {}
+        dead: List[Path] = []
+
+        for path in sorted(self.multiproc_dir.glob("metrics_*.json")):
+            try:
+                pid = int(path.stem.split("_", 1)[1])
+            except ValueError:
+                continue
+            if pid != os.getpid() and not _pid_alive(pid):
+                dead.append(path)
+                continue
+            snapshot = _read_snapshot(path)
+            if snapshot is not None:
+                _merge_snapshot(merged, snapshot)
+
+        if dead:
+            self._archive(dead)
+        archive = _read_snapshot(self.multiproc_dir / ARCHIVE_FILE)
+        if archive is not None:
+            _merge_snapshot(merged, archive)
+
+        return merged
+
+    def _archive(self, dead: List[Path]) -> None:
+        """Fold exited workers' counters and histograms into the archive and remove their snapshots."""
+        archive_path = self.multiproc_dir / ARCHIVE_FILE
+        with _archive_lock(self.multiproc_dir):
+            archive = _read_snapshot(archive_path) or {}
+            folded = []
+            for path in dead:
+                if not path.exists():
+                    continue  # another worker archived it first
+                snapshot = _read_snapshot(path) or {}
+                _merge_snapshot(archive, {name: metric for name, metric in snapshot.items()
+                                          if metric["type"] != "gauge"})
+                folded.append(path)
+            if not folded:
+                return
+            try:
+                tmp = self.multiproc_dir / f"{ARCHIVE_FILE}.{os.getpid()}.tmp"
+                with open(tmp, 'w') as f:
+                    json.dump(archive, f)
+                os.replace(tmp, archive_path)
+            except OSError as e:
+                logger.warning(f"Failed to archive metrics of exited workers: {e}")
+                return
+            for path in folded:
+                path.unlink(missing_ok=True)
+
+    def render(self) -> str:
+        """Render the merged metrics in Prometheus text exposition format."""
+        return render_prometheus(self.collect())
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_snapshot(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _archive_lock(directory: Path):
+    """Serialize archiving across worker processes (best effort without fcntl)."""
+    if fcntl is None:
+        yield
+        return
+    with open(directory / "metrics_archive.lock", 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _merge_snapshot(merged: Dict[str, Any], snapshot: Dict[str, Any]) -> None:
+    """Add one worker snapshot into the merged view (values are summed)."""
+    for name, metric in snapshot.items():
+        target = merged.setdefault(name, {**metric, "samples": []})
+        index = {tuple(labels): i for i, (labels, _) in enumerate(target["samples"])}
+
+        for labels, value in metric["samples"]:
+            key = tuple(labels)
+            if key not in index:
+                index[key] = len(target["samples"])
+                target["samples"].append([labels, json.loads(json.dumps(value))])
+                continue
+            current = target["samples"][index[key]][1]
+            if metric["type"] == "histogram":
+                current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+                current["sum"] += value["sum"]
+                current["count"] += value["count"]
+            else:
+                target["samples"][index[key]][1] = current + value
+
+
+def _format_labels(names: List[str], values: List[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_prometheus(metrics: Dict[str, Any]) -> str:
+    """Format a merged snapshot as Prometheus text (version 0.0.4)."""
+    lines = []
+
+    for name in sorted(metrics):
+        metric = metrics[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+
+        for labels, value in metric["samples"]:
+            if metric["type"] == "histogram":
+                cumulative = 0
+                for bound, count in zip(metric["buckets"], value["buckets"]):
+                    cumulative += count
+                    le = _format_labels(names, labels, ("le", _format_value(bound)))
+                    lines.append(f"{name}_bucket{le} {cumulative}")
+                le = _format_labels(names, labels, ("le", "+Inf"))
+                lines.append(f"{name}_bucket{le} {value['count']}")
+                lines.append(f"{name}_sum{_format_labels(names, labels)} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{_format_labels(names, labels)} {value['count']}")
+            else:
+                lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+
+    # Hit ratios are derived after merging so they are correct container-wide
+    cache = metrics.get("learner_cache_requests_total")
+    if cache:
+        totals: Dict[str, Dict[str, float]] = {}
+        for labels, value in cache["samples"]:
+            labelled = dict(zip(cache["labelnames"], labels))
+            totals.setdefault(labelled["cache"], {}).setdefault(labelled["result"], 0.0)
+            totals[labelled["cache"]][labelled["result"]] += value
+        lines.append("# HELP learner_cache_hit_ratio Fraction of cache lookups that were hits")
+        lines.append("# TYPE learner_cache_hit_ratio gauge")
+        for cache_name in sorted(totals):
+            hits = totals[cache_name].get("hit", 0.0)
+            total = hits + totals[cache_name].get("miss", 0.0)
+            ratio = hits / total if total else 0.0
+            lines.append(f'learner_cache_hit_ratio{{cache="{cache_name}"}} {_format_value(ratio)}')
+
+    return "\n".join(lines) + "\n"
+
+
+# Shared registry and the metrics every module reports into
+REGISTRY = MetricsRegistry()
+atexit.register(REGISTRY.close)
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "learner_http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ("endpoint", "method", "status")
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "learner_http_requests_in_flight",
+    "Requests currently being handled by endpoint",
+    ("endpoint",)
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "learner_stage_duration_seconds",
+    "Latency of internal service stages",
+    ("stage",)
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "learner_queue_depth",
+    "Pending items in internal work queues",
+    ("queue",)
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "learner_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ("cache", "result")
+)
+
+
+@contextmanager
+def suppress_metrics():
+    """Skip stage and cache metrics for the calls inside the block (health probes)."""
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+def observe_stage(stage: str) -> Callable:
+    """Decorator recording the wrapped call's latency under ``stage``."""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _suppressed.get():
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_LATENCY.observe(time.perf_counter() - started, stage=stage)
+        return wrapper
+    return decorator
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache lookup for the hit-ratio gauge."""
+    if _suppressed.get():
+        return
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Namespace Snapshot
+==================
+Run a submission's module-level code once and hand every test its own
+copy of the resulting globals.
+
+Re-executing the module per test repeats whatever top-level setup the
+submission does (lookup tables, precomputed primes). A snapshot keeps the
+globals from a single run and restores them into a fresh namespace per
+test:
+
+- immutable values are shared;
+- the submission's functions are re-created bound to the new namespace,
+  with mutable defaults copied, so ``global`` writes and default-argument
+  memo dicts never leak between tests;
+- mutable containers are copied only when a function of the submission
+  names them (flat containers shallowly, nested ones deeply, sharing one
+  memo so aliasing between globals is preserved). Containers no function
+  names cannot be reached from a test and are shared.
+
+Namespaces holding anything else (classes, instances, closures, bound
+methods such as ``print``) cannot be restored faithfully and raise
+``SnapshotUnsupported``; callers fall back to executing the module per
+test.
+"""
+
+import copy
+from types import BuiltinFunctionType, CodeType, FunctionType, ModuleType
+from typing import Dict, List, Any, Optional, Set
+
+from instruction_meter import collect_code_objects
+
+IMMUTABLE_TYPES = (int, float, complex, str, bytes, bool, type(None), range)
+
+
+class SnapshotUnsupported(Exception):
+    """Raised when a namespace cannot be restored from a snapshot."""
+    pass
+
+
+def is_immutable(value: Any) -> bool:
+    """True for values that can be shared between tests as they are."""
+    if isinstance(value, IMMUTABLE_TYPES):
+        return True
+    if isinstance(value, BuiltinFunctionType):
+        # len, sorted, ... but not bound methods such as ``seen.append``
+        return value.__self__ is None or isinstance(value.__self__, ModuleType)
+    if isinstance(value, (tuple, frozenset)):
+        return all(is_immutable(item) for item in value)
+    return False
+
+
+class NamespaceSnapshot:
+    """
+    Globals of one executed submission, restorable into fresh namespaces.
+
+    ``code`` is the compiled module and ``namespace`` the dict it was
+    executed in; ``output`` is whatever the module printed, replayed at
+    the start of every test's output.
+    """
+
+    def __init__(self, code: CodeType, namespace: Dict[str, Any], output: str = ""):
+        self.code = code
+        self.codes: Set[CodeType] = collect_code_objects(code)
+        self.output = output
+        self.globals = {name: value for name, value in namespace.items() if name != '__builtins__'}
+
+        # Global names any function body refers to (attribute names too,
+        # which only makes this conservative)
+        touched = set()
+        for function_code in self.codes:
+            if function_code is not code:
+                touched.update(function_code.co_names)
+
+        self.functions: List[FunctionType] = []
+        self.copies: Dict[str, bool] = {}  # touched mutable global -> needs a deep copy
+        seen: Set[int] = set()
+        for name, value in self.globals.items():
+            deep = self._inspect(name, value, seen)
+            if name in touched and deep is not None:
+                self.copies[name] = deep
+
+    def _inspect(self, name: str, value: Any, seen: Set[int]) -> Optional[bool]:
+        """
+        Validate one global and register the functions reachable from it.
+
+        Returns None for values shared as they are, otherwise whether a copy
+        has to be deep.
+        """
+        if is_immutable(value):
+            return None
+        deep = False
+        stack = [value]
+        while stack:
+            item = stack.pop()
+            if is_immutable(item):
+                continue
+            if item is not value:
+                deep = True
+            if id(item) in seen:
+                continue
+            seen.add(id(item))
+            if isinstance(item, FunctionType):
+                if item.__code__ not in self.codes or item.__closure__:
+                    raise SnapshotUnsupported(f"global {name!r} holds a function that cannot be rebound")
+                self.functions.append(item)
+                stack.extend(item.__defaults__ or ())
+                stack.extend((item.__kwdefaults__ or {}).values())
+                stack.extend(item.__dict__.values())
+            elif isinstance(item, dict):
+                stack.extend(item.keys())
+                stack.extend(item.values())
+            elif isinstance(item, (list, set, tuple, frozenset)):
+                stack.extend(item)
+            elif not isinstance(item, bytearray):
+                raise SnapshotUnsupported(f"global {name!r} holds a {type(item).__name__}")
+        return None if isinstance(value, FunctionType) else deep
+
+    def restore(self, namespace: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill ``namespace`` (already holding ``__builtins__``) with private copies of the globals."""
+        namespace.update(self.globals)
+        memo: Dict[int, Any] = {}
+        for function in self.functions:
+            memo[id(function)] = FunctionType(function.__code__, namespace, function.__name__)
+        for function in self.functions:
+            rebound = memo[id(function)]
+            rebound.__qualname__ = function.__qualname__
+            rebound.__defaults__ = copy.deepcopy(function.__defaults__, memo)
+            rebound.__kwdefaults__ = copy.deepcopy(function.__kwdefaults__, memo)
+            rebound.__dict__.update(copy.deepcopy(function.__dict__, memo))
+        for name, value in self.globals.items():
+            if id(value) in memo:
+                namespace[name] = memo[id(value)]
+            elif name in self.copies:
+                if self.copies[name]:
+                    namespace[name] = copy.deepcopy(value, memo)
+                else:
+                    # Flat container: a shallow copy is a full copy
+                    namespace[name] = memo[id(value)] = type(value)(value)
+        return namespace
+
+
+if __name__ == "__main__":
+    submission = '''
+PRIMES = [p for p in range(2, 50) if all(p % d for d in range(2, p))]
+COUNTS = {"calls": 0}
+TABLE = {"primes": PRIMES}
+total = 0
+
+def count(n, seen=[]):
+    global total
+    total += n
+    COUNTS["calls"] += 1
+    seen.append(n)
+    PRIMES.append(n)
+    return total, COUNTS["calls"], len(seen), TABLE["primes"] is PRIMES, helper() is count
+
+def helper():
+    return count
+'''
+    compiled = compile(submission, "<string>", "exec")
+    base = {'__builtins__': {'range': range, 'all': all, 'len': len}}
+    exec(compiled, base)
+    snapshot = NamespaceSnapshot(compiled, base)
+
+    for n in (3, 4):
+        namespace = snapshot.restore({'__builtins__': base['__builtins__']})
+        # Every test starts from the state the module left behind
+        assert namespace['count'](n) == (n, 1, 1, True, True)
+    assert base['total'] == 0 and base['COUNTS'] == {"calls": 0} and len(base['PRIMES']) == 15
+
+    decorated = "def trace(f):\n    def wrapper(n):\n        return f(n)\n    return wrapper\n\n@trace\ndef g(n):\n    return n\n"
+    for unsupported in (decorated, "SEEN = []\nremember = SEEN.append\n"):
+        namespace = {'__builtins__': {}}
+        code = compile(unsupported, "<string>", "exec")
+        exec(code, namespace)
+        try:
+            NamespaceSnapshot(code, namespace)
+            raise AssertionError("snapshot should be rejected")
+        except SnapshotUnsupported as e:
+            print(f"falls back: {e}")
+    print("snapshot isolation checks passed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Multi-Pattern Matcher
+=====================
+Finds every indicator of every mistake pattern in one scan of the text.
+
+Indicators are merged into a character trie which is emitted as a single
+compiled regex (``(?=(?:a(?:bc|d)|x...))``). The regex engine walks the
+trie at each position in C, so a scan costs one pass over the text
+instead of one substring search per indicator; positions where the trie
+fires are then resolved to the exact (possibly overlapping) indicators.
+"""
+
+import re
+from typing import Dict, List, Any, Iterable, Optional
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Build a regex matching any of ``words`` from a character trie."""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def emit(node: Dict[str, Any]) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + emit(child)
+                    for char, child in sorted(node.items()) if char != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # A shorter indicator ends here; longer ones are optional
+            return "(?:" + body + ")?"
+        return body
+
+    return emit(trie)
+
+
+class MultiPatternMatcher:
+    """
+    Matches many named groups of literal indicators in a single pass.
+
+    Indicators are matched case-insensitively by lowercasing them at build
+    time; callers pass text that is already lowercased.
+    """
+
+    def __init__(self, patterns: Dict[str, Iterable[str]], max_positions: int = 10):
+        self.max_positions = max_positions
+        # indicator -> names of the patterns that list it
+        self.owners: Dict[str, List[str]] = {}
+        for name, indicators in patterns.items():
+            for indicator in indicators:
+                indicator = indicator.lower()
+                if indicator and name not in self.owners.setdefault(indicator, []):
+                    self.owners[indicator].append(name)
+
+        # Candidates per first character, longest first
+        self._by_first_char: Dict[str, List[str]] = {}
+        for indicator in sorted(self.owners, key=len, reverse=True):
+            self._by_first_char.setdefault(indicator[0], []).append(indicator)
+
+        self._scanner: Optional[re.Pattern] = (
+            re.compile("(?=" + _trie_regex(self.owners) + ")") if self.owners else None
+        )
+        self.pattern_count = len(patterns)
+
+    def find_indicators(self, text: str) -> List[tuple]:
+        """All ``(position, indicator)`` occurrences, overlaps included."""
+        if self._scanner is None or not text:
+            return []
+        hits = []
+        startswith = text.startswith
+        for match in self._scanner.finditer(text):
+            position = match.start()
+            for indicator in self._by_first_char[text[position]]:
+                if startswith(indicator, position):
+                    hits.append((position, indicator))
+        return hits
+
+    def scan(self, sources: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Scan several named texts (e.g. code and error message).
+
+        Returns, for each pattern that fired, its hit count and the first
+        ``max_positions`` hits as ``{'indicator', 'source', 'position'}``.
+        """
+        fired: Dict[str, Dict[str, Any]] = {}
+        for source, text in sources.items():
+            for position, indicator in self.find_indicators(text):
+                for name in self.owners[indicator]:
+                    entry = fired.setdefault(name, {'count': 0, 'hits': []})
+                    entry['count'] += 1
+                    if len(entry['hits']) < self.max_positions:
+                        entry['hits'].append({
+                            'indicator': indicator,
+                            'source': source,
+                            'position': position
+                        })
+        return fired
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Empirical Performance Grading
+=============================
+Input generators and runtime curve fitting for scaling tests.
+
+A performance test runs the student function on generated inputs of
+increasing size, then fits the measured times against the usual
+complexity classes. Fitting is done in log space: for each class ``g``
+the constant ``c`` in ``t = c * g(n)`` is the mean of
+``log t - log g(n)``, and the class with the smallest squared residual
+wins. The log-log slope is reported alongside as a sanity check.
+"""
+
+import math
+import random
+import string
+from typing import Dict, List, Any, Callable, Sequence
+
+from complexity import Cost, CONSTANT, LOGARITHMIC, LINEAR, LINEARITHMIC, EXPONENTIAL
+
+# Classes the fit chooses from, slowest-growing first
+CANDIDATE_CLASSES: List[Cost] = [
+    CONSTANT,
+    LOGARITHMIC,
+    LINEAR,
+    LINEARITHMIC,
+    Cost(degree=2),
+    Cost(degree=2, log=1),
+    Cost(degree=3),
+    EXPONENTIAL,
+]
+
+# A simpler class is kept unless a more complex one fits clearly better.
+# Cache and allocator effects bend real timings upwards by about as much
+# as an extra log factor does, so the margin is wide.
+SIMPLER_CLASS_TOLERANCE = 4.0
+
+# Calls faster than this are repeated and averaged to get above timer noise
+MIN_TIMED_DURATION = 1e-4
+
+
+def _int_list(n: int, rng: random.Random) -> List[int]:
+    return [rng.randint(-10 * n - 10, 10 * n + 10) for _ in range(n)]
+
+
+INPUT_GENERATORS: Dict[str, Callable[[int, random.Random], Any]] = {
+    'int': lambda n, rng: n,
+    'int_list': _int_list,
+    'sorted_int_list': lambda n, rng: sorted(_int_list(n, rng)),
+    'distinct_int_list': lambda n, rng: rng.sample(range(-10 * n - 10, 10 * n + 10), n),
+    'string': lambda n, rng: ''.join(rng.choice(string.ascii_lowercase) for _ in range(n)),
+    'int_matrix': lambda n, rng: [_int_list(n, rng) for _ in range(n)],
+}
+
+
+def generate_input(generator: str, size: int, rng: random.Random) -> Any:
+    """Build one input of ``size`` with a named generator."""
+    try:
+        return INPUT_GENERATORS[generator](size, rng)
+    except KeyError:
+        raise ValueError(f"Unknown input generator: {generator!r}") from None
+
+
+def log_growth(cost: Cost, n: int) -> float:
+    """``log g(n)`` for a complexity class (log space avoids overflow for 2^n)."""
+    n = max(n, 2)
+    if cost.exponential:
+        return n * math.log(2)
+    return cost.degree * math.log(n) + cost.log * math.log(math.log(n))
+
+
+def fit_complexity(sizes: Sequence[int], times: Sequence[float]) -> Dict[str, Any]:
+    """
+    Pick the complexity class that best explains ``times`` over ``sizes``.
+
+    Needs at least three distinct sizes; returns the chosen class, the
+    residual of every candidate and the log-log slope.
+    """
+    points = [(n, t) for n, t in zip(sizes, times) if t > 0]
+    if len({n for n, _ in points}) < 3:
+        return {'complexity': None, 'slope': None, 'residuals': {}}
+
+    log_times = [math.log(t) for _, t in points]
+    residuals = {}
+    for cost in CANDIDATE_CLASSES:
+        offsets = [lt - log_growth(cost, n) for (n, _), lt in zip(points, log_times)]
+        mean = sum(offsets) / len(offsets)
+        residuals[cost] = sum((o - mean) ** 2 for o in offsets)
+
+    best = min(CANDIDATE_CLASSES, key=lambda c: residuals[c])
+    for cost in CANDIDATE_CLASSES:
+        if cost >= best:
+            break
+        if residuals[cost] <= residuals[best] * SIMPLER_CLASS_TOLERANCE + 1e-3:
+            best = cost
+            break
+
+    log_sizes = [math.log(n) for n, _ in points]
+    mean_x = sum(log_sizes) / len(log_sizes)
+    mean_y = sum(log_times) / len(log_times)
+    spread = sum((x - mean_x) ** 2 for x in log_sizes)
+    slope = (sum((x - mean_x) * (y - mean_y) for x, y in zip(log_sizes, log_times)) / spread
+             if spread else None)
+
+    return {
+        'complexity': best,
+        'slope': round(slope, 3) if slope is not None else None,
+        'residuals': {cost.label(): round(value, 4) for cost, value in residuals.items()}
+    }
@@ -15,6 +15,8 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import numpy as np
 
+from metrics import observe_stage, record_cache_lookup
+
 logger = logging.getLogger(__name__)
 
 
@@ -110,7 +112,9 @@ class ProfileManager:
         """Load existing profile or create new one."""
         # Check cache first
         if user_id in self.profile_cache:
+            record_cache_lookup("profile", hit=True)
             return self.profile_cache[user_id]
+        record_cache_lookup("profile", hit=False)
         
         profile_path = self.storage_path / f"profile_{user_id}.json"
         
@@ -124,6 +128,7 @@ class ProfileManager:
         self.profile_cache[user_id] = profile
         return profile
     
+    @observe_stage("save_profile")
     def _save_profile(self, user_id: int, profile: Dict[str, Any]) -> None:
         """Save profile to storage."""
         profile_path = self.storage_path / f"profile_{user_id}.json"
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Request Profiling Module
+========================
+Opt-in sampling profiler for individual requests.
+
+A background thread samples the stack of the thread handling the request
+at a fixed interval and folds the samples into collapsed-stack text
+(``frame;frame;frame count``), the input format of flamegraph.pl and
+speedscope. The last N traces are kept in a bounded ring buffer per
+worker process.
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+import logging
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler(threading.Thread):
+    """Samples one target thread's Python stack until stopped."""
+
+    def __init__(self, target_thread_id: int, interval: float = 0.001):
+        super().__init__(daemon=True, name="stack-sampler")
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.sample_count = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            self.stacks[self._collapse(frame)] += 1
+            self.sample_count += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        """Fold a frame chain into 'outer;...;inner' form."""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+class RequestProfiler:
+    """
+    Captures sampled stack traces for selected requests.
+
+    Requests are profiled when explicitly asked for (``X-Profile`` header)
+    or when randomly selected by ``sample_rate``.
+    """
+
+    def __init__(self,
+                 capacity: int = 20,
+                 sample_rate: float = 0.0,
+                 interval: float = 0.001):
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.traces: deque = deque(maxlen=capacity)
+        self.profiled_count = 0
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def should_profile(self, requested: bool = False) -> bool:
+        """Decide whether the current request is profiled."""
+        if requested:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def capture(self, label: str):
+        """
+        Profile the enclosed block on the current thread.
+
+        Yields a dict that receives the trace id once the block finishes.
+        """
+        info: Dict[str, Any] = {"trace_id": None}
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            yield info
+        finally:
+            sampler.stop()
+            info["trace_id"] = self._store(label, sampler, time.perf_counter() - started)
+
+    def _store(self, label: str, sampler: StackSampler, duration: float) -> int:
+        with self._lock:
+            trace_id = self._next_id
+            self._next_id += 1
+            self.profiled_count += 1
+            self.traces.append({
+                "trace_id": trace_id,
+                "label": label,
+                "pid": os.getpid(),
+                "captured_at": datetime.now().isoformat(),
+                "duration_ms": round(duration * 1000, 3),
+                "samples": sampler.sample_count,
+                "stacks": dict(sampler.stacks)
+            })
+        return trace_id
+
+    def list_traces(self) -> List[Dict[str, Any]]:
+        """Summaries of buffered traces, newest first."""
+        with self._lock:
+            return [
+                {k: v for k, v in trace.items() if k != "stacks"}
+                for trace in reversed(self.traces)
+            ]
+
+    def get_collapsed(self, trace_id: int) -> Optional[str]:
+        """Collapsed-stack text for one trace, or None if evicted."""
+        with self._lock:
+            for trace in self.traces:
+                if trace["trace_id"] == trace_id:
+                    return "\n".join(
+                        f"{stack} {count}"
+                        for stack, count in sorted(trace["stacks"].items())
+                    ) + "\n"
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get profiler statistics."""
+        return {
+            "requests_profiled": self.profiled_count,
+            "traces_buffered": len(self.traces),
+            "capacity": self.capacity,
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval * 1000
+        }
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Rule Catalog
+============
+Loads expert rules from JSON files, compiles them once and indexes them
+by trigger so only rules relevant to a submission are evaluated.
+
+Rule files live in the rules directory (``*.json``) and are re-read when
+any of them changes, so workers pick up edits without a restart.
+
+Rule file format::
+
+    {
+      "rules": [
+        {
+          "id": "while_true_without_break",
+          "category": "logic",
+          "pattern": "missing_base_case",            # optional mistake pattern
+          "message": "Potential infinite loop detected",
+          "severity": "medium",                      # low | medium | high | critical
+          "hints": ["Make sure the loop condition can become false"],
+          "triggers": {                              # any key present -> evaluate
+            "keywords": ["while true", "while 1"],
+            "node_types": ["While"],
+            "error_types": ["TimeoutError"]
+          },
+          "match": {                                 # all given matchers must hit
+            "regex": "while\\\\s+(True|1)\\\\s*:",
+            "flags": ["MULTILINE"],
+            "ast": {"node": "While", "without": "Break"}
+          }                                          # ast "calls_self": true matches
+        }                                            # functions calling themselves
+      ],
+      "mistake_patterns": {
+        "name": {"indicators": [...], "feedback": "...", "hints": [...]}
+      }
+    }
+
+The legacy ``{"syntax_rules": {...}, "logic_rules": {...}}`` format with
+``pattern``/``message`` entries is still accepted.
+"""
+
+import re
+import ast
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from pattern_matcher import MultiPatternMatcher
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ('low', 'medium', 'high', 'critical')
+
+REGEX_FLAGS = {
+    'IGNORECASE': re.IGNORECASE,
+    'MULTILINE': re.MULTILINE,
+    'DOTALL': re.DOTALL,
+    'VERBOSE': re.VERBOSE,
+}
+
+# Used when the rules directory holds no rule files
+DEFAULT_RULES = {
+    'syntax_rules': {
+        'missing_colon': {
+            'pattern': r'^\s*(if|while|for|def|class)\b[^:\n]*$',
+            'message': 'Missing colon after control statement'
+        }
+    },
+    'logic_rules': {
+        'infinite_loop': {
+            'pattern': r'while\s+True|while\s+1',
+            'message': 'Potential infinite loop detected'
+        }
+    }
+}
+
+
+class RuleValidationError(ValueError):
+    """Raised when a rule definition is malformed."""
+    pass
+
+
+class CompiledRule:
+    """A validated rule with its regex and AST matchers compiled."""
+
+    def __init__(self, definition: Dict[str, Any], source: str):
+        self.source = source
+        self.id = definition.get('id')
+        if not isinstance(self.id, str) or not self.id:
+            raise RuleValidationError("rule needs a non-empty string 'id'")
+
+        self.message = definition.get('message')
+        if not isinstance(self.message, str) or not self.message:
+            raise RuleValidationError(f"rule {self.id}: 'message' is required")
+
+        self.category = definition.get('category', 'logic')
+        self.pattern = definition.get('pattern')
+        self.severity = definition.get('severity', 'medium')
+        if self.severity not in SEVERITIES:
+            raise RuleValidationError(f"rule {self.id}: severity must be one of {SEVERITIES}")
+        self.hints = list(definition.get('hints', []))
+
+        triggers = definition.get('triggers', {})
+        self.keywords = [k.lower() for k in triggers.get('keywords', [])]
+        self.node_types = list(triggers.get('node_types', []))
+        self.error_types = [e.lower() for e in triggers.get('error_types', [])]
+        for node_type in self.node_types:
+            if not isinstance(getattr(ast, node_type, None), type):
+                raise RuleValidationError(f"rule {self.id}: unknown AST node type '{node_type}'")
+
+        match = definition.get('match', {})
+        self.regex: Optional[re.Pattern] = None
+        if 'regex' in match:
+            flags = 0
+            for flag in match.get('flags', []):
+                if flag not in REGEX_FLAGS:
+                    raise RuleValidationError(f"rule {self.id}: unknown regex flag '{flag}'")
+                flags |= REGEX_FLAGS[flag]
+            try:
+                self.regex = re.compile(match['regex'], flags)
+            except re.error as e:
+                raise RuleValidationError(f"rule {self.id}: invalid regex: {e}")
+
+        self.ast_node: Optional[type] = None
+        self.ast_func: Optional[str] = None
+        self.ast_calls_self = False
+        self.ast_without: Optional[type] = None
+        if 'ast' in match:
+            spec = match['ast']
+            self.ast_node = getattr(ast, spec.get('node', ''), None)
+            if not isinstance(self.ast_node, type):
+                raise RuleValidationError(f"rule {self.id}: unknown AST node '{spec.get('node')}'")
+            self.ast_func = spec.get('func')
+            self.ast_calls_self = bool(spec.get('calls_self', False))
+            if self.ast_calls_self and self.ast_node not in (ast.FunctionDef, ast.AsyncFunctionDef):
+                raise RuleValidationError(f"rule {self.id}: 'calls_self' needs a FunctionDef node")
+            if 'without' in spec:
+                self.ast_without = getattr(ast, spec['without'], None)
+                if not isinstance(self.ast_without, type):
+                    raise RuleValidationError(f"rule {self.id}: unknown AST node '{spec['without']}'")
+
+        if self.regex is None and self.ast_node is None:
+            raise RuleValidationError(f"rule {self.id}: 'match' needs a 'regex' or 'ast' matcher")
+
+    @property
+    def unconditional(self) -> bool:
+        return not (self.keywords or self.node_types or self.error_types)
+
+    def evaluate(self, code: str, tree: Optional[ast.AST]) -> Optional[Dict[str, Any]]:
+        """Return a hit description if every matcher of the rule fires."""
+        line = None
+
+        if self.regex is not None:
+            found = self.regex.search(code)
+            if found is None:
+                return None
+            line = code.count('\n', 0, found.start()) + 1
+
+        if self.ast_node is not None:
+            if tree is None:
+                return None
+            node = self._find_ast_match(tree)
+            if node is None:
+                return None
+            line = getattr(node, 'lineno', line)
+
+        return {
+            'id': self.id,
+            'category': self.category,
+            'pattern': self.pattern,
+            'message': self.message,
+            'severity': self.severity,
+            'hints': self.hints,
+            'line': line
+        }
+
+    def _find_ast_match(self, tree: ast.AST) -> Optional[ast.AST]:
+        for node in ast.walk(tree):
+            if not isinstance(node, self.ast_node):
+                continue
+            if self.ast_func is not None:
+                func = getattr(node, 'func', None)
+                name = getattr(func, 'id', None) or getattr(func, 'attr', None)
+                if name != self.ast_func:
+                    continue
+            if self.ast_calls_self and not _calls_itself(node):
+                continue
+            if self.ast_without is not None and any(
+                    isinstance(child, self.ast_without) for child in ast.walk(node)):
+                continue
+            return node
+        return None
+
+
+def _calls_itself(function: ast.AST) -> bool:
+    for node in ast.walk(function):
+        if isinstance(node, ast.Call):
+            func = node.func
+            name = getattr(func, 'id', None) or getattr(func, 'attr', None)
+            if name == function.name:
+                return True
+    return False
+
+
+class _RuleIndex:
+    """Compiled rules with their trigger indexes; replaced as a whole on reload."""
+
+    def __init__(self, rules: Dict[str, CompiledRule]):
+        self.rules = rules
+        self.by_error_type: Dict[str, List[CompiledRule]] = {}
+        self.by_node_type: Dict[str, List[CompiledRule]] = {}
+        self.unconditional: List[CompiledRule] = []
+        keywords = {}
+
+        for rule in rules.values():
+            if rule.unconditional:
+                self.unconditional.append(rule)
+            for error_type in rule.error_types:
+                self.by_error_type.setdefault(error_type, []).append(rule)
+            for node_type in rule.node_types:
+                self.by_node_type.setdefault(node_type, []).append(rule)
+            if rule.keywords:
+                keywords[rule.id] = rule.keywords
+
+        self.keyword_matcher = MultiPatternMatcher(keywords, max_positions=0)
+
+
+class RuleCatalog:
+    """
+    Indexed, hot-reloadable collection of compiled rules.
+
+    Rules are indexed by error type, AST node type and keyword; a rule is
+    only evaluated when one of its keys is present in the submission.
+    A reload swaps rules and indexes in one assignment, so concurrent
+    lookups see either the old catalog or the new one.
+    """
+
+    def __init__(self, rules_path: Path, reload_interval: float = 2.0):
+        self.rules_path = Path(rules_path)
+        self.reload_interval = reload_interval
+        self._index = _RuleIndex({})
+        self.mistake_patterns: Dict[str, Dict[str, Any]] = {}
+        self.errors: List[str] = []
+        self.version = 0
+        self.evaluated_count = 0
+        self.skipped_count = 0
+        self._signature: Tuple = ()
+        self._last_check = 0.0
+
+        self.load()
+
+    @property
+    def rules(self) -> Dict[str, CompiledRule]:
+        return self._index.rules
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _file_signature(self) -> Tuple:
+        try:
+            return tuple(sorted(
+                (p.name, p.stat().st_mtime_ns, p.stat().st_size)
+                for p in self.rules_path.glob('*.json')
+            ))
+        except OSError:
+            return ()
+
+    def load(self) -> None:
+        """(Re)load, validate, compile and index every rule file."""
+        self._signature = self._file_signature()
+        self._last_check = time.monotonic()
+
+        documents: List[Tuple[str, Dict[str, Any]]] = []
+        errors: List[str] = []
+        for path in sorted(self.rules_path.glob('*.json')):
+            try:
+                with open(path, 'r') as f:
+                    documents.append((path.name, json.load(f)))
+            except Exception as e:
+                errors.append(f"{path.name}: {e}")
+        if not documents:
+            documents.append(('<defaults>', DEFAULT_RULES))
+
+        rules: Dict[str, CompiledRule] = {}
+        patterns: Dict[str, Dict[str, Any]] = {}
+        for source, document in documents:
+            for definition in self._rule_definitions(document):
+                try:
+                    rule = CompiledRule(definition, source)
+                except RuleValidationError as e:
+                    errors.append(f"{source}: {e}")
+                    continue
+                if rule.id in rules:
+                    logger.warning(f"Rule {rule.id} from {source} overrides {rules[rule.id].source}")
+                rules[rule.id] = rule
+
+            for name, info in document.get('mistake_patterns', {}).items():
+                if not info.get('indicators') or not info.get('feedback'):
+                    errors.append(f"{source}: mistake pattern {name} needs 'indicators' and 'feedback'")
+                    continue
+                patterns[name] = {
+                    'indicators': list(info['indicators']),
+                    'feedback': info['feedback'],
+                    'hints': list(info.get('hints', []))
+                }
+
+        for error in errors:
+            logger.error(f"Rule catalog: {error}")
+
+        self._index = _RuleIndex(rules)
+        self.mistake_patterns = patterns
+        self.errors = errors
+        self.version += 1
+        logger.info(f"Rule catalog v{self.version}: {len(rules)} rules, {len(patterns)} patterns")
+
+    @staticmethod
+    def _rule_definitions(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+        definitions = list(document.get('rules', []))
+
+        # Legacy {'syntax_rules': {name: {pattern, message}}, 'logic_rules': ...}
+        for section, category in (('syntax_rules', 'syntax'), ('logic_rules', 'logic')):
+            for name, info in document.get(section, {}).items():
+                definitions.append({
+                    'id': name,
+                    'category': category,
+                    'message': info.get('message'),
+                    'severity': 'high' if category == 'syntax' else 'medium',
+                    'triggers': {'error_types': ['syntax_error']} if category == 'syntax' else {},
+                    'match': {'regex': info.get('pattern', ''), 'flags': ['MULTILINE']}
+                })
+        return definitions
+
+    def maybe_reload(self) -> bool:
+        """Reload if any rule file changed; checks at most every reload_interval."""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return False
+        self._last_check = now
+        if self._file_signature() == self._signature:
+            return False
+        self.load()
+        return True
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def candidate_rules(self,
+                        code_lower: str,
+                        node_types: Set[str],
+                        error_types: Set[str]) -> List[CompiledRule]:
+        """Rules whose trigger keys occur in the submission, in catalog order."""
+        return self._candidates(self._index, code_lower, node_types, error_types)
+
+    @staticmethod
+    def _candidates(index: _RuleIndex,
+                    code_lower: str,
+                    node_types: Set[str],
+                    error_types: Set[str]) -> List[CompiledRule]:
+        selected: Dict[str, CompiledRule] = {r.id: r for r in index.unconditional}
+        for error_type in error_types:
+            for rule in index.by_error_type.get(error_type.lower(), ()):
+                selected[rule.id] = rule
+        for node_type in node_types:
+            for rule in index.by_node_type.get(node_type, ()):
+                selected[rule.id] = rule
+        for rule_id in index.keyword_matcher.scan({'code': code_lower}):
+            selected[rule_id] = index.rules[rule_id]
+        return [rule for rule_id, rule in index.rules.items() if rule_id in selected]
+
+    def evaluate(self,
+                 code: str,
+                 code_lower: str,
+                 tree: Optional[ast.AST],
+                 node_types: Set[str],
+                 error_types: Set[str]) -> List[Dict[str, Any]]:
+        """Evaluate only the rules triggered by this submission."""
+        self.maybe_reload()
+        index = self._index
+        candidates = self._candidates(index, code_lower, node_types, error_types)
+        self.evaluated_count += len(candidates)
+        self.skipped_count += len(index.rules) - len(candidates)
+
+        hits = []
+        for rule in candidates:
+            hit = rule.evaluate(code, tree)
+            if hit is not None:
+                hits.append(hit)
+        return hits
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get rule catalog statistics."""
+        return {
+            "version": self.version,
+            "rules_loaded": len(self.rules),
+            "catalog_patterns": len(self.mistake_patterns),
+            "unconditional_rules": len(self._index.unconditional),
+            "rules_evaluated": self.evaluated_count,
+            "rules_skipped": self.skipped_count,
+            "load_errors": self.errors
+        }
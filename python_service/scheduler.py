@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test Scheduler
+==============
+Historical cost tracking and ordering of test cases.
+
+Every test case is identified by a digest of its definition together with
+the function under test, so the same hidden test seen across submissions
+accumulates a running (exponentially weighted) duration and a failure
+count. Smoke-first evaluation runs tests in increasing order of
+``expected cost / failure probability``, the order that minimizes the
+expected time until the first failure when tests are run one by one.
+Tests never seen before are costed from their ``size`` hint or the size
+of their input.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Hashable, Sequence
+
+# Unknown tests: seconds per input element plus a fixed call overhead
+SECONDS_PER_ELEMENT = 1e-7
+BASE_TEST_COST = 2e-5
+
+
+def input_size(value: Any, limit: int = 1_000_000) -> int:
+    """Number of scalar elements in a test input, counted up to ``limit``."""
+    count = 0
+    stack = [value]
+    while stack and count < limit:
+        item = stack.pop()
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            stack.extend(item)
+        elif isinstance(item, (str, bytes)):
+            count += max(len(item), 1)
+        else:
+            count += 1
+    return count
+
+
+class TestScheduler:
+    """
+    Bounded per-test history of durations and outcomes.
+
+    ``capacity`` entries are kept, least recently used evicted first;
+    ``smoothing`` is the weight of the newest duration in the running
+    average.
+    """
+
+    def __init__(self, capacity: int = 50000, smoothing: float = 0.3):
+        self.capacity = capacity
+        self.smoothing = smoothing
+        self.history: "OrderedDict[Hashable, Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def test_key(self, func_name: str, test_case: Dict[str, Any]) -> str:
+        """Stable identity of a test case for a given function."""
+        definition = {k: test_case.get(k) for k in ('input', 'output', 'performance')}
+        blob = json.dumps(definition, sort_keys=True, default=str)
+        return hashlib.sha1(f"{func_name}\0{blob}".encode()).hexdigest()[:20]
+
+    def static_cost(self, test_case: Dict[str, Any]) -> float:
+        """Cost estimate in seconds for a test without history."""
+        if 'size' in test_case:
+            size = float(test_case['size'])
+        elif 'performance' in test_case:
+            spec = test_case['performance']
+            size = sum(int(n) for n in spec.get('sizes', [])) * max(1, int(spec.get('repeat', 3)))
+        else:
+            size = input_size(test_case.get('input'))
+        return BASE_TEST_COST + size * SECONDS_PER_ELEMENT
+
+    def estimate(self, func_name: str, test_case: Dict[str, Any]) -> Dict[str, float]:
+        """Expected duration and failure probability of one test."""
+        key = self.test_key(func_name, test_case)
+        with self._lock:
+            entry = self.history.get(key)
+            if entry is not None:
+                self.history.move_to_end(key)
+                # Laplace-smoothed, so a test that always passed keeps some weight
+                return {
+                    'duration': entry['duration'],
+                    'failure_rate': (entry['failures'] + 1) / (entry['runs'] + 2),
+                    'known': True
+                }
+        return {'duration': self.static_cost(test_case), 'failure_rate': 0.5, 'known': False}
+
+    def order(self, func_name: str, test_cases: Sequence[Dict[str, Any]]) -> List[int]:
+        """Indices of ``test_cases``, most likely to fail per second spent first."""
+        priorities = []
+        for i, test_case in enumerate(test_cases):
+            estimate = self.estimate(func_name, test_case)
+            priorities.append((estimate['duration'] / estimate['failure_rate'], i))
+        priorities.sort()
+        return [i for _, i in priorities]
+
+    def record(self, func_name: str, test_case: Dict[str, Any], duration: float, passed: bool) -> None:
+        """Fold one run of a test into its history."""
+        key = self.test_key(func_name, test_case)
+        with self._lock:
+            entry = self.history.get(key)
+            if entry is None:
+                if len(self.history) >= self.capacity:
+                    self.history.popitem(last=False)
+                entry = self.history[key] = {'duration': duration, 'runs': 0, 'failures': 0}
+            else:
+                self.history.move_to_end(key)
+                entry['duration'] += self.smoothing * (duration - entry['duration'])
+            entry['runs'] += 1
+            if not passed:
+                entry['failures'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler statistics."""
+        with self._lock:
+            return {
+                'tracked_tests': len(self.history),
+                'capacity': self.capacity
+            }
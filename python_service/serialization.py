@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Response Serialization
+======================
+Content negotiation between JSON and MessagePack for API responses.
+
+Clients pick the format with the ``Accept`` header; ``application/msgpack``
+(or ``application/x-msgpack``) gets MessagePack, anything else JSON. JSON
+is encoded with orjson when it is installed, which serializes NumPy arrays
+and scalars natively, and with the standard library otherwise. Both
+encoders are optional: without msgpack, MessagePack requests are answered
+with JSON and the ``Content-Type`` says so.
+"""
+
+import json
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Set, Tuple
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Media type chosen for the current request (set by the negotiation middleware)
+response_media_type: ContextVar[str] = ContextVar("response_media_type", default=JSON_MEDIA_TYPE)
+
+
+def describe() -> Dict[str, Any]:
+    """Formats and encoders available in this process."""
+    return {
+        "formats": [JSON_MEDIA_TYPE] + ([MSGPACK_MEDIA_TYPE] if msgpack is not None else []),
+        "json_encoder": "orjson" if orjson is not None else "json"
+    }
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Media type to answer with for an ``Accept`` header."""
+    if accept and msgpack is not None:
+        preferred = []
+        for position, part in enumerate(accept.split(",")):
+            fields = part.strip().split(";")
+            quality = 1.0
+            for param in fields[1:]:
+                name, _, value = param.strip().partition("=")
+                if name == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            preferred.append((-quality, position, fields[0].strip().lower()))
+        for negative_quality, _, media_type in sorted(preferred):
+            if negative_quality >= 0:
+                break
+            if media_type in MSGPACK_ALIASES:
+                return MSGPACK_MEDIA_TYPE
+            if media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+                return JSON_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def _to_builtin(value: Any) -> Any:
+    """Fallback conversion for types the encoder does not know."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def encode_json(content: Any) -> bytes:
+    """Compact JSON, through orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=_to_builtin, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers beyond 64 bits, which student code returns
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":"), default=_to_builtin).encode("utf-8")
+
+
+def encode(content: Any, media_type: str = JSON_MEDIA_TYPE) -> Tuple[bytes, str]:
+    """
+    Serialize ``content`` for ``media_type``.
+
+    Returns the body and the media type actually used: content MessagePack
+    cannot represent (integers beyond 64 bits) is sent as JSON instead.
+    """
+    if media_type == MSGPACK_MEDIA_TYPE and msgpack is not None:
+        try:
+            # No typed arrays the PHP client understands: ndarrays go out as plain arrays
+            return msgpack.packb(content, default=_to_builtin, use_bin_type=True), MSGPACK_MEDIA_TYPE
+        except (OverflowError, TypeError, ValueError):
+            pass
+    return encode_json(content), JSON_MEDIA_TYPE
+
+
+class NegotiatedResponse(JSONResponse):
+    """Default response class: encodes with the format negotiated for the request."""
+
+    def __init__(self, content: Any, status_code: int = 200, headers=None,
+                 media_type: Optional[str] = None, background=None):
+        super().__init__(content, status_code=status_code, headers=headers,
+                         media_type=media_type or response_media_type.get(), background=background)
+
+    def render(self, content: Any) -> bytes:
+        # Runs before the headers are built, so a fallback media type is reported
+        body, self.media_type = encode(content, self.media_type)
+        return body
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Set[str]]:
+    """Comma-separated ``fields`` query parameter as a set (None keeps everything)."""
+    if not fields:
+        return None
+    selected = {name.strip() for name in fields.split(",") if name.strip()}
+    return selected or None
+
+
+def select_fields(payload: Dict[str, Any], fields: Set[str], nested: str = "test_results") -> Dict[str, Any]:
+    """
+    Keep only ``fields`` of a response and of each entry of its ``nested`` list.
+
+    A name selects a key at either level (``score`` at the top,
+    ``passed`` per test); the nested list is kept whenever any of its
+    entries' keys are selected, with each entry's ``test_id``.
+    """
+    selected = {key: value for key, value in payload.items() if key in fields and key != nested}
+    entries = payload.get(nested)
+    if entries is not None:
+        keep_all = nested in fields
+        entry_fields = fields | {"test_id"}
+        slimmed = [entry if keep_all else {k: v for k, v in entry.items() if k in entry_fields}
+                   for entry in entries]
+        if keep_all or any(len(entry) > ("test_id" in entry) for entry in slimmed):
+            selected[nested] = slimmed
+    return selected
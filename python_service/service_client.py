@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Service Client
+==============
+Pooled HTTP client for the AI service, for ops scripts and as the
+reference for other clients (the Laravel side in particular).
+
+One ``LearnerServiceClient`` keeps a pool of keep-alive connections (and
+HTTP/2 when the ``h2`` package is installed and requested), so calls after
+the first skip TCP setup entirely. Transient failures are retried with
+capped exponential backoff and full jitter; requests that change state
+(``/update_profile``) are only retried when the connection failed before
+anything was sent.
+
+Usage:
+    with LearnerServiceClient("http://python_service:8000") as client:
+        result = client.evaluate(code, test_cases, summary=True)
+        results = client.evaluate_many(submissions, concurrency=8)
+"""
+
+import importlib.util
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = os.getenv("PYTHON_SERVICE_URL", "http://localhost:8000")
+
+# Worth retrying: overload and gateway errors
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# POST endpoints whose repetition has no further effect
+IDEMPOTENT_POSTS = frozenset({"/evaluate", "/cluster", "/cluster/upload", "/recommend", "/recommend/batch", "/similar"})
+
+
+class ServiceError(Exception):
+    """Raised for error responses and for requests that exhausted their retries."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, detail: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class LearnerServiceClient:
+    """
+    Synchronous, thread-safe client with a shared connection pool.
+
+    ``retries`` is the number of extra attempts after the first;
+    ``backoff`` and ``max_backoff`` bound the jittered delay in seconds.
+    """
+
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 timeout: float = 30.0,
+                 max_connections: int = 20,
+                 http2: bool = False,
+                 retries: int = 3,
+                 backoff: float = 0.1,
+                 max_backoff: float = 2.0,
+                 transport: Optional[httpx.BaseTransport] = None):
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._rng = random.Random()
+        self._http = httpx.Client(
+            base_url=base_url or DEFAULT_BASE_URL,
+            timeout=timeout,
+            http2=http2,
+            transport=transport,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+    def __enter__(self) -> "LearnerServiceClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self._http.close()
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Full-jitter backoff, or the server's Retry-After when it sent one."""
+        if response is not None and response.headers.get("retry-after", "").isdigit():
+            return min(float(response.headers["retry-after"]), self.max_backoff)
+        return self._rng.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _send(self, method: str, path: str, stream: bool = False, **kwargs) -> httpx.Response:
+        idempotent = method == "GET" or path in IDEMPOTENT_POSTS
+        attempt = 0
+        while True:
+            try:
+                request = self._http.build_request(method, path, **kwargs)
+                response = self._http.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # Nothing reached the server: safe to retry any request
+                error, response = e, None
+            except httpx.TransportError as e:
+                if not idempotent:
+                    raise ServiceError(f"{method} {path} failed: {e}") from e
+                error, response = e, None
+            else:
+                if response.status_code not in RETRY_STATUSES or not idempotent:
+                    break
+                error = None
+            if attempt >= self.retries:
+                if response is not None:
+                    break
+                raise ServiceError(f"{method} {path} failed after {attempt + 1} attempts: {error}") from error
+            delay = self._delay(attempt, response)
+            if response is not None:
+                response.close()
+            logger.debug(f"Retrying {method} {path} in {delay:.3f}s (attempt {attempt + 1})")
+            time.sleep(delay)
+            attempt += 1
+
+        if response.status_code >= 400:
+            if stream:
+                response.read()
+            try:
+                detail = response.json().get("detail")
+            except ValueError:
+                detail = response.text
+            response.close()
+            raise ServiceError(f"{method} {path} returned {response.status_code}: {detail}",
+                               status_code=response.status_code, detail=detail)
+        return response
+
+    def request(self, method: str, path: str,
+                json_body: Optional[Dict[str, Any]] = None,
+                params: Optional[Dict[str, Any]] = None) -> Any:
+        """Send one request and return the decoded JSON body."""
+        return self._send(method, path, json=json_body, params=params).json()
+
+    # Endpoints
+
+    def evaluate(self, code: str, test_cases: List[Dict[str, Any]],
+                 fields: Optional[Union[str, List[str]]] = None,
+                 summary: bool = False,
+                 **options) -> Dict[str, Any]:
+        """
+        Run a submission against test cases.
+
+        ``options`` are passed through (``timeout``, ``mode``,
+        ``max_complexity``, ...); ``fields``/``summary`` slim the response.
+        """
+        params = {}
+        if summary:
+            params["summary"] = "true"
+        if fields:
+            params["fields"] = fields if isinstance(fields, str) else ",".join(fields)
+        return self.request("POST", "/evaluate", {"code": code, "test_cases": test_cases, **options},
+                            params=params or None)
+
+    def update_profile(self, user_id: int, attempt_data: Dict[str, Any],
+                       challenge_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold one attempt into a learner profile (not retried once sent)."""
+        return self.request("POST", "/update_profile", {
+            "user_id": user_id,
+            "attempt_data": attempt_data,
+            "challenge_data": challenge_data
+        })
+
+    def recommend(self, attempt_id: int, code: str, test_results: List[Dict[str, Any]],
+                  error_message: Optional[str] = None,
+                  user_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Feedback, hints and next steps for one attempt."""
+        body = {"attempt_id": attempt_id, "code": code, "test_results": test_results}
+        if error_message is not None:
+            body["error_message"] = error_message
+        if user_profile is not None:
+            body["user_profile"] = user_profile
+        return self.request("POST", "/recommend", body)
+
+    def recommend_batch(self, attempts: List[Dict[str, Any]],
+                        include_cluster_insight: bool = True) -> Iterator[Dict[str, Any]]:
+        """Stream recommendations for many attempts, one dict per NDJSON line."""
+        response = self._send("POST", "/recommend/batch", stream=True, json={
+            "attempts": attempts,
+            "include_cluster_insight": include_cluster_insight
+        })
+        try:
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+        finally:
+            response.close()
+
+    def cluster(self, min_clusters: int = 3, max_clusters: int = 6,
+                feature_data: Optional[List[Dict[str, float]]] = None,
+                dtype: Optional[str] = None) -> Dict[str, Any]:
+        """Cluster students (synthetic data when ``feature_data`` is omitted)."""
+        body = {"min_clusters": min_clusters, "max_clusters": max_clusters}
+        if feature_data is not None:
+            body["feature_data"] = feature_data
+        if dtype is not None:
+            body["dtype"] = dtype
+        return self.request("POST", "/cluster", body)
+
+    def cluster_upload(self, content: Union[bytes, Iterable[bytes]],
+                       content_type: str = "application/x-ndjson",
+                       columns: Optional[List[str]] = None,
+                       min_clusters: int = 3, max_clusters: int = 6,
+                       dtype: str = "float32") -> Dict[str, Any]:
+        """
+        Cluster a streamed feature upload (NDJSON, CSV or float32 rows).
+
+        ``content`` may be an iterator of chunks to stream a large file;
+        only ``bytes`` can be resent if the request has to be retried.
+        """
+        params = {"min_clusters": min_clusters, "max_clusters": max_clusters, "dtype": dtype}
+        if columns:
+            params["columns"] = ",".join(columns)
+        return self._send("POST", "/cluster/upload", content=content, params=params,
+                          headers={"Content-Type": content_type}).json()
+
+    def similar(self, code: str, limit: int = 5, min_similarity: float = 0.5) -> Dict[str, Any]:
+        """Previously analyzed submissions similar to ``code``."""
+        return self.request("POST", "/similar", {"code": code, "limit": limit, "min_similarity": min_similarity})
+
+    def health(self) -> Dict[str, Any]:
+        return self.request("GET", "/health")
+
+    def stats(self) -> Dict[str, Any]:
+        return self.request("GET", "/stats")
+
+    # Batching
+
+    def evaluate_many(self, submissions: Iterable[Dict[str, Any]],
+                      concurrency: int = 8) -> List[Union[Dict[str, Any], ServiceError]]:
+        """
+        Evaluate many submissions over the shared pool.
+
+        Each item holds ``evaluate`` keyword arguments. Results come back in
+        input order; a failed item yields its ``ServiceError`` instead of
+        raising, so one bad submission does not lose the rest.
+        """
+        def run(kwargs: Dict[str, Any]) -> Union[Dict[str, Any], ServiceError]:
+            try:
+                return self.evaluate(**kwargs)
+            except ServiceError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(run, submissions))
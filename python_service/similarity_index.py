@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Submission Similarity Index
+===========================
+MinHash/LSH index over previously seen submissions.
+
+Code is reduced to a normalized token stream (identifiers, literals and
+comments collapsed, keywords and builtins kept) so renamed variables or
+reformatting do not hide a near-duplicate. Overlapping token shingles are
+MinHashed into a fixed-size signature and banded into LSH buckets, so a
+lookup touches only the few submissions that share a band instead of the
+whole index.
+"""
+
+import builtins
+import keyword
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Hashable
+
+import numpy as np
+
+# Comments and string literals are matched first so their contents never
+# become tokens
+TOKEN_RE = re.compile(
+    r'#[^\n]*'
+    r'|(?P<str>[rbuf]*(?:"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'))'
+    r'|(?P<num>\d[\w.]*)'
+    r'|(?P<name>[A-Za-z_]\w*)'
+    r'|(?P<op>\*\*|//|==|!=|<=|>=|->|[^\s\w])',
+    re.IGNORECASE
+)
+KEPT_NAMES = frozenset(keyword.kwlist) | frozenset(dir(builtins))
+
+# Mersenne prime for the universal hash family; a * h stays below 2**63
+_PRIME = (1 << 31) - 1
+
+
+def normalize_tokens(code: str) -> List[str]:
+    """Token stream with user identifiers and literals collapsed."""
+    tokens = []
+    for match in TOKEN_RE.finditer(code):
+        kind = match.lastgroup
+        if kind is None:
+            continue  # comment
+        if kind == 'name':
+            text = match.group()
+            tokens.append(text if text in KEPT_NAMES else 'ID')
+        elif kind == 'op':
+            tokens.append(match.group())
+        else:
+            tokens.append(kind.upper())
+    return tokens
+
+
+class SimilarityIndex:
+    """
+    Bounded MinHash/LSH index of submissions.
+
+    Each entry keeps its signature, a caller-supplied ``outcome`` key (what
+    must also match for computed results to be reused) and a payload such
+    as extracted features. The least recently added entries are evicted
+    once ``capacity`` is reached.
+    """
+
+    def __init__(self,
+                 num_perm: int = 64,
+                 bands: int = 16,
+                 shingle_size: int = 4,
+                 capacity: int = 10000,
+                 seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.capacity = capacity
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, size=(num_perm, 1)).astype(np.uint64)
+        self._b = rng.randint(0, _PRIME, size=(num_perm, 1)).astype(np.uint64)
+
+        self.entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self.buckets: List[Dict[bytes, set]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.reuse_hits = 0
+
+    def signature(self, code: str) -> np.ndarray:
+        """MinHash signature of the code's normalized token shingles."""
+        tokens = normalize_tokens(code)
+        size = self.shingle_size
+        if len(tokens) < size:
+            shingles = {' '.join(tokens)}
+        else:
+            shingles = {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows].tobytes() for i in range(self.bands)]
+
+    def add(self,
+            key: Hashable,
+            signature: np.ndarray,
+            outcome: Hashable = None,
+            payload: Any = None,
+            meta: Optional[Dict[str, Any]] = None) -> None:
+        """Insert or replace the entry for ``key``."""
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            elif len(self.entries) >= self.capacity:
+                self._remove(next(iter(self.entries)))
+            self.entries[key] = {
+                'signature': signature,
+                'band_keys': band_keys,
+                'outcome': outcome,
+                'payload': payload,
+                'meta': meta or {},
+                'added_at': time.time()
+            }
+            for band, band_key in zip(self.buckets, band_keys):
+                band.setdefault(band_key, set()).add(key)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self.entries.pop(key)
+        for band, band_key in zip(self.buckets, entry['band_keys']):
+            members = band.get(band_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del band[band_key]
+
+    def query(self,
+              signature: np.ndarray,
+              limit: int = 5,
+              min_similarity: float = 0.5,
+              outcome: Hashable = None,
+              match_outcome: bool = False) -> List[Dict[str, Any]]:
+        """
+        Nearest indexed submissions by estimated Jaccard similarity.
+
+        Only entries sharing at least one LSH band are scored. With
+        ``match_outcome`` the entry's outcome key must equal ``outcome``.
+        """
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            self.queries += 1
+            candidates = set()
+            for band, band_key in zip(self.buckets, band_keys):
+                candidates.update(band.get(band_key, ()))
+            scored = []
+            for key in candidates:
+                entry = self.entries[key]
+                if match_outcome and entry['outcome'] != outcome:
+                    continue
+                similarity = float(np.count_nonzero(entry['signature'] == signature)) / self.num_perm
+                if similarity >= min_similarity:
+                    scored.append((similarity, key, entry))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [
+            {'key': key, 'similarity': round(similarity, 4), 'payload': entry['payload'], 'meta': entry['meta']}
+            for similarity, key, entry in scored[:limit]
+        ]
+
+    def find_reusable(self,
+                      signature: np.ndarray,
+                      outcome: Hashable,
+                      threshold: float) -> Optional[Dict[str, Any]]:
+        """Closest entry with the same outcome at or above ``threshold``."""
+        matches = self.query(signature, limit=1, min_similarity=threshold,
+                             outcome=outcome, match_outcome=True)
+        if not matches:
+            return None
+        with self._lock:
+            self.reuse_hits += 1
+        return matches[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get similarity index statistics."""
+        with self._lock:
+            return {
+                'entries': len(self.entries),
+                'capacity': self.capacity,
+                'num_perm': self.num_perm,
+                'bands': self.bands,
+                'queries': self.queries,
+                'reuse_hits': self.reuse_hits
+            }
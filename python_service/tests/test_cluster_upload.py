@@ -0,0 +1,67 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app as service_app
+from feature_encoder import CLUSTER_FEATURE_ENCODER
+from feature_upload import FeatureMatrixBuilder, create_parser
+
+ROWS = [{"cognitive_score": 80, "behavioral_score": 60, "avg_time": 120, "user_id": 7},
+        {"cognitive_score": 90, "success_rate": 0.9, "attempts_count": 3}]
+NAMES = ["cognitive_score", "behavioral_score", "success_rate", "avg_time", "attempts_count"]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(service_app, "clustering_service",
+                        service_app.ClusteringService(model_path=str(tmp_path / "models")))
+    return TestClient(service_app.app)
+
+
+def upload(client, query):
+    rng = np.random.default_rng(0)
+    rows = "\n".join(f"{a:.1f},{b:.1f}" for a, b in rng.uniform(0, 100, (60, 2)))
+    return client.post(f"/cluster/upload?{query}", content=f"cognitive_score,behavioral_score\n{rows}\n",
+                       headers={"Content-Type": "text/csv"})
+
+
+def test_equal_cluster_bounds_are_accepted_like_cluster(client):
+    response = upload(client, "min_clusters=3&max_clusters=3")
+    assert response.status_code == 200, response.text
+    assert response.json()["optimal_k"] == 3
+    assert client.post("/cluster", json={"min_clusters": 3, "max_clusters": 3}).status_code == 200
+
+
+def test_inverted_cluster_bounds_are_rejected(client):
+    assert upload(client, "min_clusters=4&max_clusters=3").status_code == 400
+
+
+def test_clustering_errors_become_structured_responses(client, monkeypatch):
+    def fail(**kwargs):
+        raise ValueError("boom")
+    monkeypatch.setattr(service_app.clustering_service, "cluster_students", fail)
+    response = upload(client, "min_clusters=2&max_clusters=3")
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Clustering analysis failed: boom"
+
+
+@pytest.mark.parametrize("content_type, body, columns", [
+    ("application/x-ndjson", b"".join(json.dumps(r).encode() + b"\n" for r in ROWS), None),
+    ("text/csv", ("user_id," + ",".join(NAMES) + "\n" + "\n".join(
+        ",".join([str(r.get("user_id", ""))] + [str(r.get(n, "")) for n in NAMES]) for r in ROWS)).encode(), None),
+    ("application/octet-stream",
+     np.array([[r.get(n, np.nan) for n in NAMES] for r in ROWS], dtype="<f4").tobytes(), NAMES),
+])
+def test_every_format_matches_the_json_encoding(content_type, body, columns):
+    expected = np.zeros((len(ROWS), CLUSTER_FEATURE_ENCODER.width), dtype=np.float32)
+    for features, row in zip(ROWS, expected):
+        CLUSTER_FEATURE_ENCODER.encode_into(features, row)
+
+    parser = create_parser(content_type, FeatureMatrixBuilder(capacity=1), columns, len(body))
+    for start in range(0, len(body), 7):  # chunk boundaries inside rows
+        parser.feed(body[start:start + 7])
+    matrix = parser.close()
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(matrix, expected)
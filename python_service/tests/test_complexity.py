@@ -0,0 +1,55 @@
+import ast
+
+from complexity import ComplexityAnalyzer
+from evaluator import CodeEvaluator
+
+
+TWO_SUM = '''
+def two_sum(nums, target):
+    for i in range(len(nums)):
+        for j in range(i + 1, len(nums)):
+            if nums[i] + nums[j] == target:
+                return [i, j]
+    return []
+'''
+
+HELPER = '''
+def helper(x):
+    return x + 1
+'''
+
+DEDUPE = '''
+def dedupe(nums):
+    out = {init}
+    for x in nums:
+        if x not in out:
+            out.append(x)
+    return out
+'''
+
+
+def analyze(code, entry):
+    return ComplexityAnalyzer().analyze(ast.parse(code), entry=entry)
+
+
+def test_entry_point_is_graded_with_later_helpers():
+    evaluator = CodeEvaluator()
+    quality = evaluator._analyze_code_quality(TWO_SUM + HELPER, "two_sum")
+    assert quality["complexity"]["entry"] == "two_sum"
+    assert quality["time_complexity"] == "O(n^2)"
+
+
+def test_large_test_skipped_with_later_helpers():
+    tests = [{"input": {"nums": [1, 2, 3], "target": 5}, "output": [1, 2], "large": True}]
+    result = CodeEvaluator().evaluate(TWO_SUM + HELPER, tests, max_complexity="O(n)")
+    assert result["test_results"][0].get("skipped") is True
+
+
+def test_membership_on_grown_list_literal_is_linear():
+    assert analyze(DEDUPE.format(init="[]"), "dedupe")["time_complexity"] == "O(n^2)"
+    assert analyze(DEDUPE.format(init="list()"), "dedupe")["time_complexity"] == "O(n^2)"
+
+
+def test_membership_on_constant_list_literal_is_constant():
+    code = "def vowels(s):\n    v = ['a', 'e']\n    return [c for c in s if c in v]\n"
+    assert analyze(code, "vowels")["time_complexity"] == "O(n)"
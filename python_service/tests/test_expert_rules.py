@@ -0,0 +1,53 @@
+import ast
+
+import pytest
+
+from expert_rules import CodeFeatureVisitor
+
+
+def features(code):
+    visitor = CodeFeatureVisitor()
+    visitor.visit(ast.parse(code))
+    return visitor.features()
+
+
+@pytest.mark.parametrize("code", [
+    "def f(n):\n    if n <= 1:\n        return 1\n    return n * f(n - 1)\n",
+    "def f(n):\n    return 1 if n <= 1 else n * f(n - 1)\n",
+])
+def test_guarded_recursion_has_base_case(code):
+    found = features(code)
+    assert found["has_recursion"] and found["has_base_case"]
+
+
+def test_unguarded_recursion_has_no_base_case():
+    found = features("def f(n):\n    return n * f(n - 1)\n")
+    assert found["has_recursion"] and not found["has_base_case"]
+
+
+@pytest.mark.parametrize("first, second", [
+    ("def f(x):\n    return 0\n", "def f(x):\n    return 7\n"),
+    ("def solve(nums, target):\n    return nums[len(nums) - 1] > target\n",
+     "def solve(nums, boundary):\n    return nums[len(nums) - 1] > boundary\n"),
+])
+def test_reuse_matches_fresh_analysis(first, second):
+    from expert_rules import ExpertRulesEngine
+
+    engine = ExpertRulesEngine()
+    failing = [{"passed": False, "error_type": "AssertionError"}]
+    engine.extract_code_features(first, failing, submission_id="first")
+    reused = engine.extract_code_features(second, failing, submission_id="second")
+    fresh = ExpertRulesEngine().extract_code_features(second, failing)
+
+    assert "similar_to" not in reused
+    assert reused["detected_patterns"] == fresh["detected_patterns"]
+
+
+def test_identical_code_reuses_features():
+    from expert_rules import ExpertRulesEngine
+
+    engine = ExpertRulesEngine()
+    code = "def f(x):\n    return 0\n"
+    engine.extract_code_features(code, [], submission_id="first")
+    reused = engine.extract_code_features(code, [], submission_id="second")
+    assert reused["similar_to"] == {"submission_id": "first", "similarity": 1.0}
@@ -0,0 +1,42 @@
+import numpy as np
+
+from evaluator import CodeEvaluator
+from health import HealthMonitor
+from metrics import STAGE_LATENCY
+
+
+def stage_count(stage):
+    entry = STAGE_LATENCY.values.get((stage,))
+    return entry["count"] if entry else 0
+
+
+def test_probes_leave_metrics_untouched():
+    before = stage_count("run_single_test")
+    monitor = HealthMonitor(services=[("evaluator", CodeEvaluator())])
+    assert monitor.run_checks()["evaluator"]["healthy"]
+    assert stage_count("run_single_test") == before
+
+    CodeEvaluator().evaluate("def f(): return 1", [{"input": {}, "output": 1}])
+    assert stage_count("run_single_test") == before + 1
+
+
+def test_probes_leave_live_services_untouched(tmp_path):
+    import app as service_app
+    from cluster import ClusteringService
+
+    engine = service_app.expert_rules
+    probed = dict(service_app.health_monitor.services)
+    assert probed["expert_rules"] is not engine
+    before = (engine.feedback_count, engine.cache_hits, engine.cache_misses,
+              engine.similarity_index.queries)
+
+    np.random.seed(7)
+    expected = np.random.random_sample()
+    np.random.seed(7)
+    monitor = HealthMonitor(services=[("expert_rules", probed["expert_rules"]),
+                                      ("clustering", ClusteringService(model_path=str(tmp_path)))])
+    assert all(result["healthy"] for result in monitor.run_checks().values())
+
+    assert np.random.random_sample() == expected
+    assert (engine.feedback_count, engine.cache_hits, engine.cache_misses,
+            engine.similarity_index.queries) == before
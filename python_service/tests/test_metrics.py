@@ -0,0 +1,57 @@
+import json
+import subprocess
+import sys
+import time
+
+from metrics import MetricsRegistry
+
+
+def read_value(directory, name):
+    snapshot = json.loads(next(directory.glob("metrics_*.json")).read_text())
+    return snapshot[name]["samples"][0][1]
+
+
+def test_updates_inside_the_interval_are_flushed_in_the_background(tmp_path):
+    registry = MetricsRegistry(multiproc_dir=str(tmp_path), flush_interval=0.05)
+    gauge = registry.gauge("in_flight", "Requests in flight", ("endpoint",))
+    try:
+        gauge.inc(endpoint="/evaluate")    # first update flushes immediately
+        gauge.dec(endpoint="/evaluate")    # lands inside the interval
+        assert read_value(tmp_path, "in_flight") == 1.0
+        deadline = time.monotonic() + 2
+        while read_value(tmp_path, "in_flight") != 0.0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert read_value(tmp_path, "in_flight") == 0.0
+    finally:
+        registry.close()
+
+
+def test_close_writes_the_final_values(tmp_path):
+    registry = MetricsRegistry(multiproc_dir=str(tmp_path), flush_interval=60)
+    counter = registry.counter("evaluations_total", "Evaluations")
+    counter.inc()
+    counter.inc()
+    registry.close()
+    assert read_value(tmp_path, "evaluations_total") == 2.0
+
+
+def test_exited_workers_keep_their_counters_but_not_their_gauges(tmp_path):
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    worker = MetricsRegistry(multiproc_dir=str(tmp_path))
+    worker.counter("evaluations_total", "Evaluations").inc(3)
+    worker.gauge("in_flight", "Requests in flight").set(2)
+    worker.histogram("latency_seconds", "Latency", buckets=(1.0,)).observe(0.5)
+    (tmp_path / f"metrics_{exited.pid}.json").write_text(json.dumps(worker.snapshot()))
+
+    registry = MetricsRegistry(multiproc_dir=str(tmp_path))
+    registry.counter("evaluations_total", "Evaluations").inc()
+    try:
+        for _ in range(2):   # archived totals survive the next scrape too
+            merged = registry.collect()
+            assert merged["evaluations_total"]["samples"][0][1] == 4.0
+            assert merged["latency_seconds"]["samples"][0][1]["count"] == 1
+            assert "in_flight" not in merged
+        assert not (tmp_path / f"metrics_{exited.pid}.json").exists()
+    finally:
+        registry.close()
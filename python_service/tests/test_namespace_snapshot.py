@@ -0,0 +1,51 @@
+import pytest
+
+from evaluator import CodeEvaluator
+
+
+def evaluate(code, test_cases):
+    result = CodeEvaluator().evaluate(code, test_cases, reuse_setup=True)
+    assert result["setup_reuse"]["used"], result["setup_reuse"]
+    return result
+
+
+def repeated(output, times=3, **inputs):
+    return [{"id": i, "input": inputs, "output": output} for i in range(times)]
+
+
+def assert_all_passed(result):
+    failures = [(r["test_id"], r.get("actual"), r.get("error")) for r in result["test_results"] if not r["passed"]]
+    assert not failures
+
+
+@pytest.mark.parametrize("code", [
+    # Mutated global list
+    "SEEN = []\ndef f(x):\n    SEEN.append(x)\n    return len(SEEN)\n",
+    # Mutated global dict
+    "CACHE = {}\ndef f(x):\n    CACHE[len(CACHE)] = x\n    return len(CACHE)\n",
+    # Rebound global
+    "COUNT = 0\ndef f(x):\n    global COUNT\n    COUNT += 1\n    return COUNT\n",
+    # Mutable nested inside an immutable tuple
+    "STATE = (1, [])\ndef f(x):\n    STATE[1].append(x)\n    return len(STATE[1])\n",
+    # Mutable default argument
+    "def f(x, memo=[]):\n    memo.append(x)\n    return len(memo)\n",
+])
+def test_state_does_not_leak_between_tests(code):
+    assert_all_passed(evaluate(code, repeated(1, x=7)))
+
+
+def test_aliasing_between_globals_is_preserved():
+    code = "A = [[]]\nB = A[0]\ndef f(x):\n    B.append(x)\n    return len(A[0])\n"
+    assert_all_passed(evaluate(code, repeated(1, x=7)))
+
+
+def test_module_output_is_replayed_for_every_test():
+    code = "print('setup')\ndef f(x):\n    print('call', x)\n    return x\n"
+    result = evaluate(code, repeated(7, x=7))
+    assert_all_passed(result)
+    assert [r["stdout"] for r in result["test_results"]] == ["setup\ncall 7\n"] * 3
+
+
+def test_setup_runs_once():
+    code = "CALLS = []\nCALLS.append(1)\ndef f(x):\n    return len(CALLS)\n"
+    assert_all_passed(evaluate(code, repeated(1, x=0)))
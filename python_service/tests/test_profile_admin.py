@@ -0,0 +1,29 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app as service_app
+
+
+@pytest.fixture
+def client():
+    return TestClient(service_app.app)
+
+
+def force_profile(client, **headers):
+    return client.get("/livez", headers={"X-Profile": "1", **headers})
+
+
+def test_profiling_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(service_app, "PROFILE_ADMIN_TOKEN", None)
+    assert "X-Profile-Id" not in force_profile(client).headers
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get("/admin/profiles/1").status_code == 403
+
+
+def test_profiling_requires_matching_token(client, monkeypatch):
+    monkeypatch.setattr(service_app, "PROFILE_ADMIN_TOKEN", "secret")
+    assert "X-Profile-Id" not in force_profile(client, **{"X-Admin-Token": "wrong"}).headers
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    assert "X-Profile-Id" in force_profile(client, **{"X-Admin-Token": "secret"}).headers
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "secret"}).status_code == 200
@@ -0,0 +1,50 @@
+import ast
+import json
+import threading
+from pathlib import Path
+
+from rule_catalog import RuleCatalog
+
+RULES_DIR = Path(__file__).resolve().parents[2] / "rules"
+
+
+def keyword_rule(rule_id, keyword):
+    return {"id": rule_id, "message": f"uses {keyword}", "triggers": {"keywords": [keyword]},
+            "match": {"regex": keyword}}
+
+
+def recursion_hits(code):
+    catalog = RuleCatalog(RULES_DIR, reload_interval=3600)
+    return [hit["id"] for hit in catalog.evaluate(code, code.lower(), ast.parse(code),
+                                                  set(), {"recursionerror"})]
+
+
+def test_unbounded_recursion_needs_a_self_call():
+    assert recursion_hits("def f(n):\n    return n * f(n - 1)\n") == ["unbounded_recursion"]
+    assert recursion_hits("def helper(x):\n    return x\n\n"
+                          "def f(n):\n    if n <= 1:\n        return 1\n    return n * f(n - 1)\n") == []
+
+
+def test_reload_swaps_rules_and_indexes_together(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [keyword_rule("first", "alpha")]}))
+    catalog = RuleCatalog(tmp_path)
+    errors = []
+
+    def lookup():
+        try:
+            for _ in range(2000):
+                catalog.candidate_rules("alpha beta", set(), set())
+        except Exception as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=lookup)
+    reader.start()
+    for i in range(200):
+        rule = keyword_rule("first", "alpha") if i % 2 else keyword_rule("second", "beta")
+        path.write_text(json.dumps({"rules": [rule]}))
+        catalog.load()
+    reader.join()
+
+    assert not errors
+    assert [rule.id for rule in catalog.candidate_rules("alpha beta", set(), set())] == ["first"]